@@ -0,0 +1,149 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .custom_exceptions import RequestCanceledException
+from .helpers import logInfoMessage
+
+
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 8
+INITIAL_CONCURRENCY = 2
+
+MIN_TILES_PER_SIDE = 1
+MAX_TILES_PER_SIDE = 16
+
+# A window whose throughput falls below this share of the best window counts as congestion
+CONGESTION_THROUGHPUT_RATIO = 0.7
+# An increase of concurrency is kept only if the throughput grows by this factor
+INCREASE_THROUGHPUT_RATIO = 1.05
+# Tiles are made smaller above and larger below these request durations (seconds)
+MAX_TILE_SECONDS = 15.0
+MIN_TILE_SECONDS = 2.0
+# Weight of the latest request in the moving average of the request duration
+LATENCY_SMOOTHING = 0.3
+
+# Interval in seconds in which callers waiting for a request slot check whether they were canceled
+SLOT_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class ServiceTuning:
+    concurrency: int
+    tilesPerSide: int
+
+
+class AdaptiveController:
+    """
+    Adjusts the number of parallel GetCoverage requests and the tile size of one service (AIMD).
+
+    Completed requests are grouped into windows of as many requests as run in parallel.
+    After a window without errors whose throughput is higher than before, one more request
+    may run in parallel (additive increase). Errors or a clear drop of throughput halve the
+    number of parallel requests (multiplicative decrease).
+    The moving average of the request duration decides about the number of tiles of the next download.
+    """
+
+    def __init__(self, tuning: ServiceTuning) -> None:
+        self.concurrency = min(max(tuning.concurrency, MIN_CONCURRENCY), MAX_CONCURRENCY)
+        self.tilesPerSide = min(max(tuning.tilesPerSide, MIN_TILES_PER_SIDE), MAX_TILES_PER_SIDE)
+        self.running = 0
+        self.averageSeconds: Optional[float] = None
+        self.bestThroughput = 0.0
+        self.windowBytes = 0
+        self.windowCount = 0
+        self.windowFailed = False
+        self.windowStart: Optional[float] = None
+        self._condition = threading.Condition()
+
+    def getTuning(self) -> ServiceTuning:
+        with self._condition:
+            return ServiceTuning(concurrency=self.concurrency, tilesPerSide=self.tilesPerSide)
+
+    def acquireSlot(self, feedback=None) -> None:
+        """
+        Blocks until fewer requests than the current concurrency are running.
+        Raises:
+            RequestCanceledException
+        """
+        with self._condition:
+            while self.running >= self.concurrency:
+                if feedback is not None and feedback.isCanceled():
+                    raise RequestCanceledException('Request canceled')
+                self._condition.wait(SLOT_POLL_INTERVAL)
+            self.running += 1
+            if self.windowStart is None:
+                self.windowStart = time.monotonic()
+
+    def releaseSlot(self, size: int, seconds: float, failed: bool = False) -> None:
+        """Records a finished request (size in bytes, duration in seconds) and adjusts the concurrency."""
+        with self._condition:
+            self.running -= 1
+            self.windowBytes += size
+            self.windowCount += 1
+            self.windowFailed = self.windowFailed or failed
+            if not failed:
+                self.averageSeconds = (seconds if self.averageSeconds is None
+                                       else LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * self.averageSeconds)
+            if self.windowCount >= self.concurrency:
+                self._finishWindow()
+            self._condition.notify_all()
+
+    def releaseSlotUnmeasured(self) -> None:
+        """Releases a slot of a request that does not say anything about the service (canceled, cached)."""
+        with self._condition:
+            self.running -= 1
+            self._condition.notify_all()
+
+    def _finishWindow(self) -> None:
+        """Applies AIMD to the concurrency (lock must be held)."""
+        elapsed = max(time.monotonic() - self.windowStart, 1e-3)
+        throughput = self.windowBytes / elapsed
+        previousConcurrency = self.concurrency
+
+        if self.windowFailed or throughput < CONGESTION_THROUGHPUT_RATIO * self.bestThroughput:
+            self.concurrency = max(MIN_CONCURRENCY, self.concurrency // 2)
+        elif throughput > INCREASE_THROUGHPUT_RATIO * self.bestThroughput:
+            self.concurrency = min(MAX_CONCURRENCY, self.concurrency + 1)
+        self.bestThroughput = max(self.bestThroughput, throughput)
+
+        if self.concurrency != previousConcurrency:
+            logInfoMessage(f'Parallel requests: {previousConcurrency} -> {self.concurrency} '
+                           f'({throughput / 1024 / 1024:.2f} MB/s)')
+        self.windowBytes = 0
+        self.windowCount = 0
+        self.windowFailed = False
+        self.windowStart = time.monotonic() if self.running else None
+
+    def adjustTileSize(self) -> None:
+        """Makes the tiles of the next download smaller or larger, if requests took too long or were very short."""
+        with self._condition:
+            if self.averageSeconds is None:
+                return
+            if self.averageSeconds > MAX_TILE_SECONDS:
+                self.tilesPerSide = min(MAX_TILES_PER_SIDE, self.tilesPerSide + 1)
+            elif self.averageSeconds < MIN_TILE_SECONDS:
+                self.tilesPerSide = max(MIN_TILES_PER_SIDE, self.tilesPerSide - 1)
+
+
+_controllers: Dict[str, AdaptiveController] = {}
+_controllersLock = threading.Lock()
+
+
+def getAdaptiveController(serviceKey: str, tuning: ServiceTuning) -> AdaptiveController:
+    """Returns the controller of a service, tuning is used if the service has no controller yet in this session."""
+    with _controllersLock:
+        if serviceKey not in _controllers:
+            _controllers[serviceKey] = AdaptiveController(tuning)
+        return _controllers[serviceKey]
@@ -0,0 +1,265 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import asyncio
+import os
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET # nosec
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsRectangle
+
+from .capabilities import Capabilities
+from .coverage import CoverageInformation, DescribeCoverage
+from .crs_utils import buildSubsets, switchCrsUriToOpenGis
+from .custom_exceptions import CapabilitiesException, DescribeCoverageException, RequestCanceledException
+from .helpers import logInfoMessage
+from .network import (XML_DETECTION_BYTES,
+                      buildCapabilitiesRequest,
+                      buildDescribeCoverageRequest,
+                      checkUrlSyntax,
+                      readOwsException,
+                      wcs_ns)
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT_SECONDS = 60
+# Responses are written to their file in chunks of this size
+STREAM_CHUNK_BYTES = 256 * 1024
+
+
+@dataclass
+class CoverageRequest:
+    """GetCoverage request of AsyncWcsClient.getCoverages, see AsyncWcsClient.buildGetCoverageUrl."""
+    covId: str
+    path: str
+    extent: Optional[QgsRectangle] = None
+    extentCrs: Optional[QgsCoordinateReferenceSystem] = None
+    subsetCrsUri: Optional[str] = None
+    outputCrsUri: Optional[str] = None
+    format: str = 'image/tiff'
+    extraParams: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class AsyncWcsClient:
+    """
+    asyncio client of a WCS service for scripts and notebooks, independent of the QGIS task manager.
+    Subsets are computed like in the plugin (buildSubsets). Requests run in a thread pool, at most
+    maxConcurrency at the same time, coverages are streamed to their files.
+
+        async with AsyncWcsClient('https://isk.geobasis-bb.de/ows/dop20_wcs') as client:
+            await client.getCapabilities()
+            paths = await client.getCoverages([CoverageRequest(covId, path, extent, crs) for ...])
+    """
+
+    def __init__(self,
+                 baseUrl: str,
+                 version: str = '2.0.1',
+                 maxConcurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS) -> None:
+        self.baseUrl = baseUrl
+        self.version = version
+        self.timeout = timeout
+        self.capabilities: Optional[Capabilities] = None
+        self.describeCov: Optional[DescribeCoverage] = None
+        self.executor = ThreadPoolExecutor(max_workers=maxConcurrency, thread_name_prefix='simplewcs2')
+        self.maxConcurrency = maxConcurrency
+        # created on first use, so that it belongs to the event loop of the requests
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._capabilitiesRequest: Optional[asyncio.Future] = None
+        self._descriptions: Dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> 'AsyncWcsClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def runBlocking(self, function, *args):
+        """
+        Runs function(*args, canceled) in the thread pool, bounded by the concurrency limit.
+        canceled (threading.Event) is set when the awaiting task is cancelled.
+        """
+        canceled = threading.Event()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.maxConcurrency)
+        async with self._semaphore:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args, canceled)
+            except asyncio.CancelledError:
+                canceled.set()
+                raise
+
+    async def getCapabilities(self) -> Capabilities:
+        """
+        Raises:
+            CapabilitiesException
+        """
+        url = buildCapabilitiesRequest(self.version, self.baseUrl)
+        root = await self.runBlocking(self.readXml, url)
+        if root.tag != f'{wcs_ns}Capabilities':
+            raise CapabilitiesException('Error: Could not read capabilities for this service')
+        self.capabilities = Capabilities(ET.ElementTree(root))
+        return self.capabilities
+
+    async def ensureCapabilities(self) -> Capabilities:
+        """Returns the capabilities, concurrent calls share one capabilities request."""
+        if self.capabilities is not None:
+            return self.capabilities
+        if self._capabilitiesRequest is None:
+            self._capabilitiesRequest = asyncio.ensure_future(self.getCapabilities())
+        try:
+            return await asyncio.shield(self._capabilitiesRequest)
+        except Exception:
+            self._capabilitiesRequest = None
+            raise
+
+    async def describeCoverage(self, covIds: Sequence[str]) -> DescribeCoverage:
+        """
+        Requests the descriptions of the coverages, they are added to describeCov.
+        Raises:
+            DescribeCoverageException
+        """
+        await self.ensureCapabilities()
+        url = buildDescribeCoverageRequest(self.capabilities.describeCoverageUrl, list(covIds), self.version)
+        root = await self.runBlocking(self.readXml, url)
+        if root.tag != f'{wcs_ns}CoverageDescriptions':
+            raise DescribeCoverageException('Error: Could not read describeCoverage for this service')
+        if self.describeCov is None:
+            self.describeCov = DescribeCoverage(ET.ElementTree(root))
+        else:
+            self.describeCov.updateFromDescribeCoverage(ET.ElementTree(root))
+        return self.describeCov
+
+    async def getCoverageInformation(self, covId: str) -> CoverageInformation:
+        """Returns the description of a coverage, concurrent calls share one describe coverage request."""
+        if self.describeCov is not None and covId in self.describeCov.coverageInformation:
+            return self.describeCov.coverageInformation[covId]
+        if covId not in self._descriptions:
+            self._descriptions[covId] = asyncio.ensure_future(self.describeCoverage([covId]))
+        try:
+            await asyncio.shield(self._descriptions[covId])
+        except Exception:
+            self._descriptions.pop(covId, None)
+            raise
+        try:
+            return self.describeCov.coverageInformation[covId]
+        except KeyError:
+            raise DescribeCoverageException(f'Coverage is not described by the service: {covId}')
+
+    async def buildGetCoverageUrl(self, request: CoverageRequest) -> str:
+        """
+        Returns the GetCoverage url of a request. Subset and output crs default to the native crs of the coverage,
+        the extent (optional, in extentCrs, default subset crs) is transformed to the subset crs like in the plugin.
+        Raises:
+            ValueError: If a OGC URI string could not be created for the extent CRS
+        """
+        await self.ensureCapabilities()
+        coverageInformation = await self.getCoverageInformation(request.covId)
+        subsetCrsUri = request.subsetCrsUri or coverageInformation.nativeCrs
+        params = [
+            ('REQUEST', 'GetCoverage'),
+            ('SERVICE', 'WCS'),
+            ('VERSION', self.version),
+            ('COVERAGEID', request.covId),
+            ('OUTPUTCRS', request.outputCrsUri or coverageInformation.nativeCrs),
+            ('FORMAT', request.format),
+        ]
+        if request.extent is not None:
+            extentCrs = request.extentCrs or QgsCoordinateReferenceSystem.fromOgcWmsCrs(switchCrsUriToOpenGis(subsetCrsUri))
+            subset0, subset1 = buildSubsets(request.extent, extentCrs, subsetCrsUri, coverageInformation.nativeCrs,
+                                            coverageInformation.axisLabels, gridAxes=coverageInformation.gridAxes)
+            params += [('SUBSETTINGCRS', subsetCrsUri), ('SUBSET', subset0), ('SUBSET', subset1)]
+        params += request.extraParams
+        return checkUrlSyntax(self.capabilities.getCoverageUrl) + urllib.parse.urlencode(params)
+
+    async def getCoverage(self, request: CoverageRequest) -> Optional[str]:
+        """
+        Streams a coverage into request.path and returns the path, None if the service responds with another xml document.
+        Raises:
+            OwsException, if the service responds with an exception report
+            OSError, for network and http errors
+        """
+        url = await self.buildGetCoverageUrl(request)
+        return await self.runBlocking(self.streamCoverage, url, request.path)
+
+    async def getCoverages(self, requests: Sequence[CoverageRequest]) -> List:
+        """
+        Requests coverages concurrently and returns, in the order of the requests, the path
+        (None, see getCoverage) or the exception of every request.
+        """
+        return await asyncio.gather(*(self.getCoverage(request) for request in requests), return_exceptions=True)
+
+    def open(self, url: str):
+        """Opens a request, http error responses (e.g. exception reports) are returned as well."""
+        try:
+            return urllib.request.urlopen(url, timeout=self.timeout) # nosec
+        except urllib.error.HTTPError as e:
+            return e
+
+    def readXml(self, url: str, canceled: threading.Event) -> ET.Element:
+        """
+        Raises:
+            ET.ParseError
+            OSError
+        """
+        logInfoMessage('Requested URL: ' + url)
+        with self.open(url) as response:
+            root = ET.fromstring(response.read()) # nosec
+        if 'ExceptionReport' in root.tag:
+            raise readOwsException(root)
+        return root
+
+    def streamCoverage(self, url: str, path: str, canceled: threading.Event) -> Optional[str]:
+        """
+        Raises:
+            OwsException
+            OSError
+            RequestCanceledException, the partial file is removed
+        """
+        logInfoMessage('Requested URL: ' + url)
+        with self.open(url) as response, open(path, 'wb') as coverageFile:
+            status = response.status
+            firstBytes = b''
+            while True:
+                if canceled.is_set():
+                    break
+                chunk = response.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if len(firstBytes) < XML_DETECTION_BYTES:
+                    firstBytes += chunk[:XML_DETECTION_BYTES]
+                coverageFile.write(chunk)
+
+        if canceled.is_set():
+            os.remove(path)
+            raise RequestCanceledException('Request canceled')
+        if firstBytes.lstrip().startswith(b'<'):
+            try:
+                root = ET.parse(path).getroot() # nosec
+            except ET.ParseError:
+                pass
+            else:
+                os.remove(path)
+                if 'ExceptionReport' in root.tag:
+                    raise readOwsException(root)
+                return None
+        if status >= 400:
+            os.remove(path)
+            raise OSError(f'HTTP {status}: {url}')
+        return path
@@ -3,9 +3,8 @@ from dataclasses import dataclass
 
 from qgis.core import (Qgis,
                        QgsCoordinateReferenceSystem,
-                       QgsCoordinateTransform,
                        QgsGeometry,
-                       QgsPoint,
+                       QgsPointXY,
                        QgsProject,
                        QgsRectangle)
 from qgis.gui import QgsRubberBand
@@ -13,6 +12,8 @@ from qgis.utils import iface
 from qgis.PyQt.QtGui import QColor
 from qgis.PyQt.QtCore import Qt
 
+from .crs_utils import getCoordinateTransform, getCrsFromUri, transformPoints
+
 
 @dataclass
 class RubberBandStyle:
@@ -27,7 +28,10 @@ rubberBandStyles = {
                                        RUBBERBANDCOLOR=QColor(255, 0, 0, 50)),
     'request_extent': RubberBandStyle(PENWIDTH=2,
                                       COLOR=QColor(0, 0, 0),
-                                      RUBBERBANDCOLOR=QColor(255, 0, 0, 0))
+                                      RUBBERBANDCOLOR=QColor(255, 0, 0, 0)),
+    'offline_extent': RubberBandStyle(PENWIDTH=2,
+                                      COLOR=QColor(0, 150, 0),
+                                      RUBBERBANDCOLOR=QColor(0, 150, 0, 40))
 }
 
 
@@ -58,14 +62,9 @@ class BoundingBox(QgsRubberBand):
 
     def setBoundingBoxFromWgsCoordinates(self, x_1: float, y_1: float, x_2: float, y_2: float) -> None:
         """ Calculates a rectangle from wgs84 coordinates and sets the boundingbox rubberband to the geometry of the rectangle"""
-        sourceCrs = QgsCoordinateReferenceSystem('EPSG:4326')
+        sourceCrs = getCrsFromUri('EPSG:4326')
         destCrs = QgsProject.instance().crs()
-        coordsTransform = QgsCoordinateTransform(sourceCrs, destCrs, QgsProject.instance())
-
-        lowerPoint = QgsPoint(x_1, y_1)
-        lowerPoint.transform(coordsTransform)
-        upperPoint = QgsPoint(x_2, y_2)
-        upperPoint.transform(coordsTransform)
+        lowerPoint, upperPoint = transformPoints([QgsPointXY(x_1, y_1), QgsPointXY(x_2, y_2)], sourceCrs, destCrs)
 
         boundingBoxRectangle = QgsRectangle(lowerPoint.x(), lowerPoint.y(), upperPoint.x(), upperPoint.y())
         geom = QgsGeometry.fromRect(boundingBoxRectangle)
@@ -77,8 +76,7 @@ class BoundingBox(QgsRubberBand):
         """ Calculates a rectangle from the bounding box of a polygon and sets the boundingbox rubberband to the geometry of the rectangle"""
         if sourceCrs:
             destCrs = QgsProject.instance().crs()
-            coordsTransform = QgsCoordinateTransform(sourceCrs, destCrs, QgsProject.instance())
-            geom.transform(coordsTransform)
+            geom.transform(getCoordinateTransform(sourceCrs, destCrs))
 
         boundingBoxRectangle = geom.boundingBox()
         geomBB = QgsGeometry.fromRect(boundingBoxRectangle)
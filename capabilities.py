@@ -8,8 +8,8 @@
 
         Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
 """
-from dataclasses import dataclass
-from typing import List, Dict
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Set
 import xml.etree.ElementTree
 
 from .helpers import logWarnMessage
@@ -22,6 +22,19 @@ crs_ns = '{http://www.opengis.net/wcs/crs/1.0}'
 crs_serviceextension_ns = '{http://www.opengis.net/wcs/service-extension/crs/1.0}'
 xlink_ns = '{http://www.w3.org/1999/xlink}'
 
+# WCS versions supported by the plugin, highest first
+ACCEPTED_WCS_VERSIONS = ['2.1.0', '2.0.1', '2.0.0']
+
+# Conformance class of the range subsetting extension (OGC 12-040), listed as ows:Profile
+RANGE_SUBSETTING_PROFILE = 'range-subsetting'
+# Conformance class of the scaling extension (OGC 12-039), required for SCALEFACTOR
+SCALING_PROFILE = 'scaling'
+
+
+def getHighestAcceptedVersion(serviceVersions: List[str]) -> Optional[str]:
+    """Returns the highest version offered by a service that the plugin supports, None if there is none."""
+    return next((version for version in ACCEPTED_WCS_VERSIONS if version in serviceVersions), None)
+
 
 @dataclass
 class BbCorners:
@@ -30,6 +43,27 @@ class BbCorners:
     bbUpperCorner: str
 
 
+@dataclass
+class CoverageSummaryDiff:
+    """Stores the coverages that differ between two capabilities responses of a service"""
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+
+    def isEmpty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def compareCoverageSummaries(previous: Dict[str, BbCorners], current: Dict[str, BbCorners]) -> CoverageSummaryDiff:
+    """Returns the coverages that were added, removed or whose bounding box changed."""
+    previousIds = previous.keys()
+    currentIds = current.keys()
+    return CoverageSummaryDiff(added=set(currentIds - previousIds),
+                               removed=set(previousIds - currentIds),
+                               changed={covId for covId in currentIds & previousIds
+                                        if current[covId] != previous[covId]})
+
+
 class Capabilities:
     """Stores information from a get capabilities response of a wcs service"""
 
@@ -44,7 +78,9 @@ class Capabilities:
         self.versions: List[str] = []
         self.formats: List[str] = []
         self.coverageSummary: Dict[str, BbCorners]
+        self.coverageTitles: Dict[str, str] = {}
         self.crsx: List[str] = []
+        self.profiles: List[str] = []
 
         self.__initializeFromCapabilitiesResponse(capabilitiesXmlResponse)
 
@@ -120,6 +156,14 @@ class Capabilities:
     def coverageSummary(self, newCoverageSummary: Dict[str, BbCorners]):
         self._coverageSummary = newCoverageSummary
 
+    @property
+    def coverageTitles(self) -> Dict[str, str]:
+        return self._coverageTitles
+
+    @coverageTitles.setter
+    def coverageTitles(self, newCoverageTitles: Dict[str, str]):
+        self._coverageTitles = newCoverageTitles
+
     @property
     def crsx(self) -> List[str]:
         return self._crsx
@@ -128,6 +172,21 @@ class Capabilities:
     def crsx(self, newCrsx: List[str]):
         self._crsx = newCrsx
 
+    @property
+    def profiles(self) -> List[str]:
+        """Conformance classes of the service, e.g. of supported extensions"""
+        return self._profiles
+
+    @profiles.setter
+    def profiles(self, newProfiles: List[str]):
+        self._profiles = newProfiles
+
+    def supportsRangeSubsetting(self) -> bool:
+        return any(RANGE_SUBSETTING_PROFILE in profile.lower() for profile in self._profiles)
+
+    def supportsScaling(self) -> bool:
+        return any(SCALING_PROFILE in profile.lower() for profile in self._profiles)
+
     def __initializeFromCapabilitiesResponse(self, capabilitiesXmlResponse: xml.etree.ElementTree) -> None:
 
         operationsMetadataElement = capabilitiesXmlResponse.find(f'{ows_ns}OperationsMetadata')
@@ -180,6 +239,12 @@ class Capabilities:
             for version in serviceIdentificationContents.findall(f'.//{ows_ns}ServiceTypeVersion'):
                 self._versions.append(version.text)
         self._versions.sort(reverse=True)
+
+        self._profiles = []
+        if serviceIdentificationContents is not None:
+            for profile in serviceIdentificationContents.findall(f'{ows_ns}Profile'):
+                if profile.text:
+                    self._profiles.append(profile.text.strip())
         if not self._versions:
             logWarnMessage('Error in getCapabilities response: no information about versions found')
 
@@ -204,6 +269,7 @@ class Capabilities:
                         self._crsx.append(crsElement.text)
 
         self._coverageSummary = {}
+        self._coverageTitles = {}
         contents = capabilitiesXmlResponse.find(f'{wcs_ns}Contents')
         if contents is not None:
             for coverageSummary in contents.findall(f'.//{wcs_ns}CoverageSummary'):
@@ -211,6 +277,9 @@ class Capabilities:
                 if coverageIdElement is None:
                     continue
                 coverageId = coverageIdElement.text
+                coverageTitleElement = coverageSummary.find(f'{ows_ns}Title')
+                if coverageTitleElement is not None and coverageTitleElement.text:
+                    self._coverageTitles[coverageId] = coverageTitleElement.text.strip()
                 coverageBbWgsLowerCornerElement = coverageSummary.find(
                     f'.//{ows_ns}WGS84BoundingBox/{ows_ns}LowerCorner')
                 if coverageBbWgsLowerCornerElement is not None:
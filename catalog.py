@@ -0,0 +1,304 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from qgis.core import QgsTask
+
+from .capabilities import ACCEPTED_WCS_VERSIONS, Capabilities, getHighestAcceptedVersion
+from .coverage import DescribeCoverage
+from .custom_exceptions import CapabilitiesException, DescribeCoverageException
+from .helpers import getPluginDataDir, logInfoMessage, logWarnMessage
+from .network import requestCapabilities, requestDescribeCoverage
+from .rate_limiter import backgroundRequests
+
+
+CATALOG_FILENAME = 'coverage_catalog.sqlite'
+# Number of services whose capabilities are requested at the same time
+HARVEST_WORKERS = 4
+SEARCH_LIMIT = 200
+
+
+@dataclass
+class CatalogEntry:
+    """Stores one coverage of a harvested service"""
+    serviceUrl: str
+    version: str
+    serviceTitle: str
+    coverageId: str
+    title: str = ''
+    crs: List[str] = field(default_factory=list)
+    # WGS84 footprint (xMin, yMin, xMax, yMax) from the capabilities, None if unknown
+    footprint: Optional[Tuple[float, float, float, float]] = None
+
+
+def getCatalogPath() -> str:
+    return os.path.join(getPluginDataDir(), CATALOG_FILENAME)
+
+
+def buildFullTextQuery(searchText: str) -> str:
+    """
+    Creates a FTS5 query from user input: every word must match as a prefix,
+    e.g. 'DGM1 Brandenburg' -> '"dgm1"* "brandenburg"*'
+    Returns an empty string if the input has no words (e.g. '-'), FTS5 rejects empty queries.
+    """
+    words = re.findall(r'\w+', searchText.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class CoverageCatalog:
+    """
+    Local SQLite catalog of the coverages of all harvested services.
+
+    Full-text search uses a FTS5 table and spatial search a R*Tree on the WGS84 footprints.
+    If the SQLite library of the QGIS installation lacks one of the modules,
+    the catalog falls back to LIKE and plain range queries.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or getCatalogPath()
+        self.connection = sqlite3.connect(self.path)
+        self.hasFullText = False
+        self.hasRtree = False
+        self.createSchema()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def createSchema(self) -> None:
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS services (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    title TEXT,
+                    harvested TEXT,
+                    UNIQUE (url, version));
+                CREATE TABLE IF NOT EXISTS coverages (
+                    id INTEGER PRIMARY KEY,
+                    service_id INTEGER NOT NULL REFERENCES services(id) ON DELETE CASCADE,
+                    coverage_id TEXT NOT NULL,
+                    title TEXT,
+                    crs TEXT,
+                    xmin REAL, ymin REAL, xmax REAL, ymax REAL,
+                    UNIQUE (service_id, coverage_id));
+                """)
+            try:
+                self.connection.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS coverages_fts
+                    USING fts5(coverage_id, title, service_title, crs)""")
+                self.hasFullText = True
+            except sqlite3.OperationalError:
+                logInfoMessage('SQLite without FTS5: catalog search falls back to LIKE queries')
+            try:
+                self.connection.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS coverages_rtree
+                    USING rtree(id, xmin, xmax, ymin, ymax)""")
+                self.hasRtree = True
+            except sqlite3.OperationalError:
+                logInfoMessage('SQLite without R*Tree: catalog spatial search falls back to range queries')
+
+    def replaceService(self, serviceUrl: str, version: str, serviceTitle: str, entries: List[CatalogEntry]) -> None:
+        """Replaces all coverages of a service in one transaction."""
+        harvested = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self.connection:
+            self.connection.execute("""
+                INSERT INTO services (url, version, title, harvested) VALUES (?, ?, ?, ?)
+                ON CONFLICT (url, version) DO UPDATE SET title = excluded.title, harvested = excluded.harvested""",
+                (serviceUrl, version, serviceTitle, harvested))
+            serviceId = self.connection.execute('SELECT id FROM services WHERE url = ? AND version = ?',
+                                                (serviceUrl, version)).fetchone()[0]
+
+            oldIds = [row[0] for row in self.connection.execute('SELECT id FROM coverages WHERE service_id = ?',
+                                                                (serviceId,))]
+            if oldIds:
+                oldIdRows = [(oldId,) for oldId in oldIds]
+                if self.hasFullText:
+                    self.connection.executemany('DELETE FROM coverages_fts WHERE rowid = ?', oldIdRows)
+                if self.hasRtree:
+                    self.connection.executemany('DELETE FROM coverages_rtree WHERE id = ?', oldIdRows)
+                self.connection.execute('DELETE FROM coverages WHERE service_id = ?', (serviceId,))
+
+            for entry in entries:
+                footprint = entry.footprint or (None, None, None, None)
+                crsText = ' '.join(entry.crs)
+                cursor = self.connection.execute("""
+                    INSERT INTO coverages (service_id, coverage_id, title, crs, xmin, ymin, xmax, ymax)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (serviceId, entry.coverageId, entry.title, crsText, *footprint))
+                rowId = cursor.lastrowid
+                if self.hasFullText:
+                    self.connection.execute("""
+                        INSERT INTO coverages_fts (rowid, coverage_id, title, service_title, crs)
+                        VALUES (?, ?, ?, ?, ?)""",
+                        (rowId, entry.coverageId, entry.title, serviceTitle, crsText))
+                if self.hasRtree and entry.footprint:
+                    xMin, yMin, xMax, yMax = entry.footprint
+                    self.connection.execute('INSERT INTO coverages_rtree (id, xmin, xmax, ymin, ymax) VALUES (?, ?, ?, ?, ?)',
+                                            (rowId, xMin, xMax, yMin, yMax))
+
+    def search(self,
+               searchText: str = '',
+               extent: Optional[Tuple[float, float, float, float]] = None,
+               limit: int = SEARCH_LIMIT) -> List[CatalogEntry]:
+        """
+        Returns coverages matching all words of searchText (coverage id, titles, crs)
+        and intersecting the WGS84 extent (xMin, yMin, xMax, yMax), if given.
+        """
+        joins = []
+        conditions = []
+        params: list = []
+
+        fullTextQuery = buildFullTextQuery(searchText)
+        if fullTextQuery:
+            if self.hasFullText:
+                joins.append('JOIN coverages_fts ON coverages_fts.rowid = c.id')
+                conditions.append('coverages_fts MATCH ?')
+                params.append(fullTextQuery)
+            else:
+                for word in re.findall(r'\w+', searchText):
+                    conditions.append("(c.coverage_id || ' ' || IFNULL(c.title, '') || ' ' || IFNULL(s.title, '') || ' ' || IFNULL(c.crs, '')) LIKE ?")
+                    params.append(f'%{word}%')
+
+        if extent:
+            xMin, yMin, xMax, yMax = extent
+            if self.hasRtree:
+                joins.append('JOIN coverages_rtree r ON r.id = c.id')
+                conditions.append('r.xmax >= ? AND r.xmin <= ? AND r.ymax >= ? AND r.ymin <= ?')
+            else:
+                conditions.append('c.xmax >= ? AND c.xmin <= ? AND c.ymax >= ? AND c.ymin <= ?')
+            params.extend([xMin, xMax, yMin, yMax])
+
+        query = f"""
+            SELECT s.url, s.version, s.title, c.coverage_id, c.title, c.crs, c.xmin, c.ymin, c.xmax, c.ymax
+            FROM coverages c JOIN services s ON s.id = c.service_id
+            {' '.join(joins)}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY s.title, c.coverage_id
+            LIMIT ?"""
+        params.append(limit)
+
+        entries = []
+        for row in self.connection.execute(query, params):
+            serviceUrl, version, serviceTitle, coverageId, title, crsText, xMin, yMin, xMax, yMax = row
+            footprint = (xMin, yMin, xMax, yMax) if xMin is not None else None
+            entries.append(CatalogEntry(serviceUrl=serviceUrl,
+                                        version=version,
+                                        serviceTitle=serviceTitle or '',
+                                        coverageId=coverageId,
+                                        title=title or '',
+                                        crs=crsText.split() if crsText else [],
+                                        footprint=footprint))
+        return entries
+
+    def countCoverages(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM coverages').fetchone()[0]
+
+
+def readFootprint(lowerCorner: Optional[str], upperCorner: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """Returns the WGS84 footprint from the corner strings of the capabilities, None if they can not be read."""
+    if not lowerCorner or not upperCorner:
+        return None
+    try:
+        x_1, y_1 = (float(value) for value in lowerCorner.split())
+        x_2, y_2 = (float(value) for value in upperCorner.split())
+    except ValueError:
+        return None
+    return min(x_1, x_2), min(y_1, y_2), max(x_1, x_2), max(y_1, y_2)
+
+
+def harvestService(serviceUrl: str, version: str, feedback=None) -> Tuple[str, List[CatalogEntry]]:
+    """
+    Requests capabilities and describe coverage of a service and returns its title and catalog entries.
+    Raises:
+    - CapabilitiesException, also if the service supports none of the versions of the plugin
+    - RequestCanceledException
+    """
+    capabilities = Capabilities(requestCapabilities(version=version, baseUrl=serviceUrl, feedback=feedback))
+    if version not in capabilities.versions and capabilities.versions:
+        version = getHighestAcceptedVersion(capabilities.versions)
+        if version is None:
+            raise CapabilitiesException(f'Service does not support one of the following Versions: '
+                                        f'{", ".join(ACCEPTED_WCS_VERSIONS)}')
+
+    nativeCrs = {}
+    covIds = list(capabilities.coverageSummary.keys())
+    if covIds and capabilities.describeCoverageUrl:
+        try:
+            describeCov = DescribeCoverage(requestDescribeCoverage(capabilities.describeCoverageUrl, covIds, version, feedback))
+            nativeCrs = {covId: information.nativeCrs for covId, information in describeCov.coverageInformation.items()}
+        except DescribeCoverageException as e:
+            # Coverages stay searchable by id and title
+            logWarnMessage(f'Catalog: {serviceUrl}: {e.args[0]}')
+
+    entries = []
+    for covId, corners in capabilities.coverageSummary.items():
+        crs = [nativeCrs[covId]] if covId in nativeCrs else []
+        crs += [crsUri for crsUri in capabilities.crsx if crsUri not in crs]
+        entries.append(CatalogEntry(serviceUrl=serviceUrl,
+                                    version=version,
+                                    serviceTitle=capabilities.title or '',
+                                    coverageId=covId,
+                                    title=capabilities.coverageTitles.get(covId, ''),
+                                    crs=crs,
+                                    footprint=readFootprint(corners.bbLowerCorner, corners.bbUpperCorner)))
+    return capabilities.title or '', entries
+
+
+class CatalogHarvestTask(QgsTask):
+    """
+    Background task refreshing the catalog from a list of services (dicts with 'url' and 'version'),
+    the capabilities of up to HARVEST_WORKERS services are requested concurrently.
+    """
+
+    def __init__(self, services: List[dict]) -> None:
+        super().__init__('Simple WCS 2: Harvest coverage catalog', QgsTask.Flag.CanCancel)
+        self.services = services
+        self.harvestedCount = 0
+        self.failedServices: List[str] = []
+
+    def harvestBackgroundService(self, service: dict) -> Tuple[str, List[CatalogEntry]]:
+        """Harvests a service in a worker thread, its requests count as background work for the rate limiter."""
+        with backgroundRequests():
+            return harvestService(service['url'], service['version'], self)
+
+    def run(self) -> bool:
+        # The connection is used by the task thread only
+        catalog = CoverageCatalog()
+        try:
+            with ThreadPoolExecutor(max_workers=HARVEST_WORKERS) as executor:
+                futures = {executor.submit(self.harvestBackgroundService, service): service
+                           for service in self.services}
+                for finishedCount, future in enumerate(as_completed(futures), start=1):
+                    service = futures[future]
+                    if self.isCanceled():
+                        for pendingFuture in futures:
+                            pendingFuture.cancel()
+                        return False
+                    try:
+                        serviceTitle, entries = future.result()
+                    except Exception as e:
+                        message = e.args[0] if isinstance(e, CapabilitiesException) and e.args else str(e)
+                        logWarnMessage(f"Catalog: {service['url']}: {message}")
+                        self.failedServices.append(service['url'])
+                    else:
+                        catalog.replaceService(service['url'], service['version'], serviceTitle, entries)
+                        self.harvestedCount += 1
+                    self.setProgress(100 * finishedCount / len(futures))
+        finally:
+            catalog.close()
+        return True
@@ -6,22 +6,97 @@
         email: marcus.mohr@geobasis-bb.de
         licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
 """
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Iterable, List, Dict, Optional, Tuple
+import math
+import urllib.parse
 import xml.etree.ElementTree
 
 from .helpers import logWarnMessage
+from .profiling import profiled
+
+@dataclass
+class AxisInformation:
+    """Axis of a coverage besides the two horizontal ones (e.g. time or elevation)."""
+    label: str
+    lowerBound: str
+    upperBound: str
+    isTemporal: bool
+    # Positions of the grid slices along the axis (unquoted), empty if they are unknown
+    positions: List[str] = field(default_factory=list)
+
+# Subset bounds within this share of a cell from a cell edge are snapped to that edge
+GRID_SNAP_TOLERANCE = 1e-6
+
+@dataclass
+class GridAxis:
+    """Regular horizontal axis of the native grid (RectifiedGrid of the domain set)."""
+    # Position of the center of the first cell
+    origin: float
+    # Cell size, always positive
+    resolution: float
+
+    def snapInterval(self, lower: float, upper: float) -> Tuple[float, float]:
+        """Enlarges an interval to the cell edges of the grid, so that it covers whole cells."""
+        firstEdge = self.origin - self.resolution / 2
+        lowerIndex = math.floor((lower - firstEdge) / self.resolution + GRID_SNAP_TOLERANCE)
+        upperIndex = math.ceil((upper - firstEdge) / self.resolution - GRID_SNAP_TOLERANCE)
+        upperIndex = max(upperIndex, lowerIndex + 1)
+        return firstEdge + lowerIndex * self.resolution, firstEdge + upperIndex * self.resolution
 
 @dataclass
 class CoverageInformation:
     nativeCrs: str
+    # Labels of the two horizontal axes
     axisLabels: List[str]
+    extraAxes: List[AxisInformation] = field(default_factory=list)
+    # Names of the fields of the range type (bands), as used in RANGESUBSET
+    bands: List[str] = field(default_factory=list)
+    # Native grid by horizontal axis label, empty if the grid is not regular or rotated
+    gridAxes: Dict[str, GridAxis] = field(default_factory=dict)
 
 wcs_ns = '{http://www.opengis.net/wcs/2.0}'
 gml_ns = '{http://www.opengis.net/gml/3.2}'
 gmlcov_ns = '{http://www.opengis.net/gmlcov/1.0}'
+gmlrgrid_ns = '{http://www.opengis.net/gml/3.3/rgrid}'
 swe_ns = '{http://www.opengis.net/swe/2.0}'
 
+# Lower case labels of axes which are not horizontal, axes with non numeric bounds are temporal as well
+TEMPORAL_AXIS_LABELS = {'time', 't', 'date', 'ansi', 'unix', 'datetime'}
+ELEVATION_AXIS_LABELS = {'elevation', 'height', 'z', 'depth', 'level', 'pressure'}
+
+# Slice positions of regular axes are only listed up to this number
+MAX_AXIS_POSITIONS = 1000
+
+
+def isNumber(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def splitCompoundCrs(crsUri: str) -> List[str]:
+    """Returns the components of a compound crs uri (crs-compound?1=...&2=...), a single crs otherwise."""
+    if 'crs-compound' not in crsUri:
+        return [crsUri]
+    query = urllib.parse.urlsplit(crsUri).query
+    return [component for _, component in sorted(urllib.parse.parse_qsl(query), key=lambda item: int(item[0]))]
+
+
+def getRangeSubsetParams(bands: List[str], chosenBands: List[str]) -> List[Tuple[str, str]]:
+    """
+    Returns the RANGESUBSET parameter of the chosen bands, none if all bands are chosen.
+    Raises:
+        ValueError: If no band is chosen
+    """
+    if not chosenBands:
+        raise ValueError('Please choose at least one band')
+    if len(chosenBands) == len(bands):
+        return []
+    return [('RANGESUBSET', ','.join(chosenBands))]
+
 class DescribeCoverage:
 
     """Stores information from descrive coverage response"""
@@ -43,6 +118,11 @@ class DescribeCoverage:
     def readDescribeCoverage(self, coverageXmlResponse: xml.etree.ElementTree) -> None:
 
         self.coverageInformation = {}
+        self.updateFromDescribeCoverage(coverageXmlResponse)
+
+    @profiled('parse_describe_coverage')
+    def updateFromDescribeCoverage(self, coverageXmlResponse: xml.etree.ElementTree) -> None:
+        """Adds or replaces the information of the coverages described in the response, other coverages are kept."""
 
         for covIdDescription in coverageXmlResponse.findall(f'.//{wcs_ns}CoverageDescription'):
 
@@ -59,10 +139,15 @@ class DescribeCoverage:
                     continue
                 axisLabels = envelopeElement.attrib.get('axisLabels')
                 if axisLabels:
-                    axisLabels = axisLabels.split(" ")
+                    axisLabels = axisLabels.split()
+                    envelopeAxisLabels = axisLabels
+                    extraAxes = []
                     if len(axisLabels) > 2:
-                        logWarnMessage(f"More than two axes are not supported (yet): {axisLabels}")
-                        continue
+                        nativeCrs, axisLabels, extraAxes = self.readExtraAxes(covIdDescription, envelopeElement,
+                                                                              nativeCrs, axisLabels)
+                        if len(axisLabels) != 2:
+                            logWarnMessage(f"Horizontal axes of {covId} could not be identified: {axisLabels}")
+                            continue
                 else:
                     logWarnMessage("Error in Describe Coverage: native crs could not be read")
                     continue
@@ -70,4 +155,145 @@ class DescribeCoverage:
                 logWarnMessage("Error in Describe Coverage: envelope could not be read")
                 continue
 
-            self.coverageInformation[covId] = CoverageInformation(nativeCrs=nativeCrs, axisLabels=axisLabels)
+            self.coverageInformation[covId] = CoverageInformation(nativeCrs=nativeCrs,
+                                                                  axisLabels=axisLabels,
+                                                                  extraAxes=extraAxes,
+                                                                  bands=self.readBands(covIdDescription),
+                                                                  gridAxes=self.readGridAxes(covIdDescription,
+                                                                                             envelopeAxisLabels,
+                                                                                             axisLabels))
+
+    def readBands(self, covIdDescription: xml.etree.ElementTree.Element) -> List[str]:
+        """Returns the field names of the range type (gmlcov:rangeType/swe:DataRecord), empty if it is missing."""
+        dataRecord = covIdDescription.find(f'{gmlcov_ns}rangeType/{swe_ns}DataRecord')
+        if dataRecord is None:
+            return []
+        return [fieldElement.attrib['name'] for fieldElement in dataRecord.findall(f'{swe_ns}field')
+                if fieldElement.attrib.get('name')]
+
+    def readGridAxes(self,
+                     covIdDescription: xml.etree.ElementTree.Element,
+                     envelopeAxisLabels: List[str],
+                     horizontalLabels: List[str]) -> Dict[str, GridAxis]:
+        """
+        Reads origin and cell size of the horizontal axes from the RectifiedGrid of the domain set.
+        Coordinates of origin and offset vectors are in the axis order of the crs (envelope),
+        grid axis labels are not used, as some services label grid axes i and j.
+        Returns an empty dict for other grids and rotated grids.
+        """
+        grid = covIdDescription.find(f'{gml_ns}domainSet/{gml_ns}RectifiedGrid')
+        if grid is None:
+            return {}
+        origin = (grid.findtext(f'{gml_ns}origin/{gml_ns}Point/{gml_ns}pos') or '').split()
+        if len(origin) != len(envelopeAxisLabels):
+            return {}
+        horizontalIndices = [envelopeAxisLabels.index(label) for label in horizontalLabels]
+        if not all(isNumber(origin[index]) for index in horizontalIndices):
+            return {}
+
+        steps = {}
+        for offsetVector in grid.findall(f'{gml_ns}offsetVector'):
+            offsets = (offsetVector.text or '').split()
+            if len(offsets) != len(origin):
+                return {}
+            horizontalOffsets = [(index, float(offsets[index])) for index in horizontalIndices
+                                 if isNumber(offsets[index]) and float(offsets[index]) != 0]
+            if len(horizontalOffsets) > 1:
+                return {}
+            if horizontalOffsets:
+                index, step = horizontalOffsets[0]
+                steps[index] = abs(step)
+        if len(steps) != len(horizontalIndices):
+            return {}
+        return {label: GridAxis(origin=float(origin[index]), resolution=steps[index])
+                for label, index in zip(horizontalLabels, horizontalIndices)}
+
+    def readExtraAxes(self,
+                      covIdDescription: xml.etree.ElementTree.Element,
+                      envelopeElement: xml.etree.ElementTree.Element,
+                      nativeCrs: str,
+                      axisLabels: List[str]) -> Tuple[str, List[str], List[AxisInformation]]:
+        """
+        Separates time and elevation axes from the horizontal axes of a coverage.
+        Returns the horizontal crs (component of a compound crs), the horizontal axis labels and the other axes.
+        """
+        lowerCorner = (envelopeElement.findtext(f'{gml_ns}lowerCorner') or '').split()
+        upperCorner = (envelopeElement.findtext(f'{gml_ns}upperCorner') or '').split()
+        if len(lowerCorner) != len(axisLabels) or len(upperCorner) != len(axisLabels):
+            lowerCorner = upperCorner = [''] * len(axisLabels)
+
+        horizontalLabels = []
+        extraAxes = []
+        leadingExtraAxes = 0
+        for label, lowerBound, upperBound in zip(axisLabels, lowerCorner, upperCorner):
+            lowerBound = lowerBound.strip('"')
+            upperBound = upperBound.strip('"')
+            isTemporal = label.lower() in TEMPORAL_AXIS_LABELS or (bool(lowerBound) and not isNumber(lowerBound))
+            if isTemporal or label.lower() in ELEVATION_AXIS_LABELS:
+                extraAxes.append(AxisInformation(label=label,
+                                                 lowerBound=lowerBound,
+                                                 upperBound=upperBound,
+                                                 isTemporal=isTemporal,
+                                                 positions=self.readAxisPositions(covIdDescription, label)))
+                if not horizontalLabels:
+                    leadingExtraAxes += 1
+            else:
+                horizontalLabels.append(label)
+
+        # Time and elevation axes usually have a crs of their own, the horizontal crs follows the leading ones
+        crsComponents = splitCompoundCrs(nativeCrs)
+        horizontalCrs = crsComponents[min(leadingExtraAxes, len(crsComponents) - 1)]
+
+        return horizontalCrs, horizontalLabels, extraAxes
+
+    def readAxisPositions(self, covIdDescription: xml.etree.ElementTree.Element, label: str) -> List[str]:
+        """
+        Reads the slice positions of an axis from the domain set:
+        - coefficients of an irregular axis (ReferenceableGridByVectors)
+        - origin, offset vector and grid limits of a regular numeric axis
+        """
+        domainSet = covIdDescription.find(f'{gml_ns}domainSet')
+        if domainSet is None or not len(domainSet):
+            return []
+        grid = domainSet[0]
+
+        for generalGridAxis in grid.iter(f'{gmlrgrid_ns}GeneralGridAxis'):
+            if (generalGridAxis.findtext(f'{gmlrgrid_ns}gridAxesSpanned') or '').strip() == label:
+                coefficients = generalGridAxis.findtext(f'{gmlrgrid_ns}coefficients') or ''
+                if coefficients.strip():
+                    return [coefficient.strip('"') for coefficient in coefficients.split()]
+
+        gridLabels = (grid.findtext(f'{gml_ns}axisLabels') or '').split()
+        if label not in gridLabels:
+            return []
+        axisIndex = gridLabels.index(label)
+
+        origin = None
+        for originTag in (f'{gml_ns}origin', f'{gmlrgrid_ns}origin'):
+            origin = grid.findtext(f'{originTag}/{gml_ns}Point/{gml_ns}pos')
+            if origin:
+                break
+        low = (grid.findtext(f'{gml_ns}limits/{gml_ns}GridEnvelope/{gml_ns}low') or '').split()
+        high = (grid.findtext(f'{gml_ns}limits/{gml_ns}GridEnvelope/{gml_ns}high') or '').split()
+        if not origin or len(low) != len(gridLabels) or len(high) != len(gridLabels):
+            return []
+        origin = origin.split()
+        if len(origin) != len(gridLabels) or not isNumber(origin[axisIndex]):
+            return []
+
+        step = None
+        for offsetVector in grid.iter(f'{gml_ns}offsetVector'):
+            offsets = (offsetVector.text or '').split()
+            if len(offsets) == len(gridLabels) and isNumber(offsets[axisIndex]) and float(offsets[axisIndex]) != 0:
+                step = float(offsets[axisIndex])
+                break
+        if step is None:
+            return []
+
+        count = min(int(high[axisIndex]) - int(low[axisIndex]) + 1, MAX_AXIS_POSITIONS)
+        start = float(origin[axisIndex])
+        return [f'{start + index * step:.12g}' for index in range(count)]
+
+    def removeCoverages(self, covIds: Iterable[str]) -> None:
+        for covId in covIds:
+            self.coverageInformation.pop(covId, None)
@@ -0,0 +1,315 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+from osgeo import gdal
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import (QgsCoordinateReferenceSystem,
+                       QgsGeometry,
+                       QgsProcessingUtils,
+                       QgsRectangle)
+
+from .crs_utils import getCoordinateTransform
+from .helpers import getPluginDataDir, logWarnMessage
+from .request_coordinator import normalizeRequestUrl
+
+
+CACHE_DIRNAME = 'coverage_cache'
+CACHE_INDEX_FILENAME = 'index.sqlite'
+DOCUMENT_CACHE_FILENAME = 'documents.sqlite'
+SETTINGS_CACHE_MAX_MB = 'plugins/simplewcs2/coverage_cache_max_mb'
+DEFAULT_CACHE_MAX_MB = 1024
+# Horizontal trim subsets, e.g. E(390000,391000)
+TRIM_SUBSET_PATTERN = re.compile(r'^\s*([^(]+)\(\s*(-?[\d.eE+-]+)\s*,\s*(-?[\d.eE+-]+)\s*\)\s*$')
+# Columns added to the index after its first version, with their types
+INDEX_FOOTPRINT_COLUMNS = [('params', 'TEXT'), ('x_min', 'REAL'), ('y_min', 'REAL'), ('x_max', 'REAL'), ('y_max', 'REAL'),
+                           ('crs', 'TEXT')]
+
+
+def getCacheKey(url: str) -> str:
+    """Returns the cache key of a request, identical normalized requests share one key."""
+    return hashlib.sha256(normalizeRequestUrl(url).encode('utf-8')).hexdigest()
+
+
+def splitTrimSubsets(urlGetCoverage: str) -> Tuple[List[Tuple[str, str]], Dict[str, Tuple[float, float]]]:
+    """Returns the sorted parameters of a request without its numeric trim subsets and the trim ranges by axis label."""
+    params = []
+    trims = {}
+    for key, value in urllib.parse.parse_qsl(urllib.parse.urlsplit(urlGetCoverage).query, keep_blank_values=True):
+        trimMatch = TRIM_SUBSET_PATTERN.match(value) if key.upper() == 'SUBSET' else None
+        if trimMatch:
+            label, lower, upper = trimMatch.groups()
+            trims[label.strip()] = (min(float(lower), float(upper)), max(float(lower), float(upper)))
+        else:
+            params.append((key.upper(), value))
+    return sorted(params), trims
+
+
+def getMatchingParams(url: str) -> str:
+    """Returns the parameters of a request without its trim subsets, requests of the same settings (crs, format, slices) share them."""
+    params, _ = splitTrimSubsets(url)
+    return urllib.parse.urlencode(params)
+
+
+def readFootprint(path: str) -> Optional[Tuple[QgsRectangle, str]]:
+    """Returns the extent and the crs (wkt) of a raster file, None if it can not be read."""
+    dataset = gdal.Open(path)
+    if dataset is None:
+        return None
+    xMin, pixelWidth, _, yMax, _, pixelHeight = dataset.GetGeoTransform()
+    extent = QgsRectangle(xMin, yMax + pixelHeight * dataset.RasterYSize, xMin + pixelWidth * dataset.RasterXSize, yMax)
+    crsWkt = dataset.GetProjection()
+    dataset = None
+    return extent, crsWkt
+
+
+class CoverageCache:
+    """
+    Disk cache of GetCoverage responses, keyed by the normalized request url.
+
+    The index is a SQLite table next to the cached files, it stores the matching parameters
+    (see getMatchingParams) and the footprint of every response, so that lookups do not open the files. Least recently used
+    entries are evicted when the cache grows beyond its size limit.
+    Entries written by the prefetcher are flagged until they are used for the first time,
+    so that the prefetcher can keep the amount of unused speculative data within its budget.
+    The cache is used from the main thread and from task threads.
+    """
+
+    def __init__(self, cacheDir: Optional[str] = None, maxBytes: Optional[int] = None) -> None:
+        self.cacheDir = cacheDir or os.path.join(getPluginDataDir(), CACHE_DIRNAME)
+        os.makedirs(self.cacheDir, exist_ok=True)
+        if maxBytes is None:
+            maxBytes = QSettings().value(SETTINGS_CACHE_MAX_MB, DEFAULT_CACHE_MAX_MB, type=int) * 1024 * 1024
+        self.maxBytes = maxBytes
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(self.cacheDir, CACHE_INDEX_FILENAME), check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    coverage_id TEXT,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    prefetched INTEGER NOT NULL DEFAULT 0)""")
+            existingColumns = {row[1] for row in self.connection.execute('PRAGMA table_info(entries)')}
+            for column, columnType in INDEX_FOOTPRINT_COLUMNS:
+                if column not in existingColumns:
+                    self.connection.execute(f'ALTER TABLE entries ADD COLUMN {column} {columnType}')
+            # entries of older indexes: the parameters are read from the url, footprints on first use
+            for key, url in self.connection.execute('SELECT key, url FROM entries WHERE params IS NULL').fetchall():
+                self.connection.execute('UPDATE entries SET params = ? WHERE key = ?', (getMatchingParams(url), key))
+            self.connection.execute('CREATE INDEX IF NOT EXISTS entries_coverage ON entries (coverage_id, params)')
+
+    def getEntryPath(self, key: str) -> str:
+        return os.path.join(self.cacheDir, f'{key}.bin')
+
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            return self.connection.execute('SELECT 1 FROM entries WHERE key = ?', (getCacheKey(url),)).fetchone() is not None
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Returns a temporary copy of the cached response of a request, None if it is not cached.
+        The copy can be used as layer source without being affected by eviction.
+        """
+        key = getCacheKey(url)
+        with self._lock:
+            if self.connection.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is None:
+                return None
+            copyPath = QgsProcessingUtils.generateTempFilename('wcs')
+            try:
+                shutil.copyfile(self.getEntryPath(key), copyPath)
+            except OSError as e:
+                logWarnMessage(f'Coverage cache entry could not be read: {e}')
+                with self.connection:
+                    self.connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                return None
+            with self.connection:
+                self.connection.execute('UPDATE entries SET last_access = ?, prefetched = 0 WHERE key = ?',
+                                        (time.time(), key))
+        return copyPath
+
+    def put(self, url: str, covId: str, path: str, prefetched: bool = False) -> None:
+        """Stores a copy of the response file of a request and evicts old entries if the cache is full."""
+        size = os.path.getsize(path)
+        if size > self.maxBytes:
+            return
+        key = getCacheKey(url)
+        footprint = readFootprint(path)
+        extent, crsWkt = footprint if footprint is not None else (None, None)
+        with self._lock:
+            temporaryPath = self.getEntryPath(key) + '.part'
+            try:
+                shutil.copyfile(path, temporaryPath)
+                os.replace(temporaryPath, self.getEntryPath(key))
+            except OSError as e:
+                logWarnMessage(f'Coverage could not be written to cache: {e}')
+                return
+            now = time.time()
+            with self.connection:
+                self.connection.execute("""
+                    INSERT OR REPLACE INTO entries (key, url, coverage_id, size, created, last_access, prefetched,
+                                                    params, x_min, y_min, x_max, y_max, crs)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (key, url, covId, size, now, now, int(prefetched), getMatchingParams(url),
+                     extent.xMinimum() if extent else None, extent.yMinimum() if extent else None,
+                     extent.xMaximum() if extent else None, extent.yMaximum() if extent else None, crsWkt))
+            self._evict()
+
+    def listEntries(self, covId: str, params: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Returns url and file path of all cached responses of a coverage (the files must only be read),
+        only those with the matching parameters (see getMatchingParams), if given.
+        """
+        with self._lock:
+            if params is None:
+                rows = self.connection.execute('SELECT key, url FROM entries WHERE coverage_id = ?', (covId,)).fetchall()
+            else:
+                rows = self.connection.execute('SELECT key, url FROM entries WHERE coverage_id = ? AND params = ?',
+                                               (covId, params)).fetchall()
+        return [(url, self.getEntryPath(key)) for key, url in rows]
+
+    def listFootprints(self, covId: str) -> List[Tuple[QgsRectangle, str]]:
+        """Returns extent and crs (wkt) of all cached responses of a coverage, footprints missing in older indexes are read once."""
+        footprints = []
+        with self._lock:
+            rows = self.connection.execute('SELECT key, x_min, y_min, x_max, y_max, crs FROM entries WHERE coverage_id = ?',
+                                           (covId,)).fetchall()
+            for key, xMin, yMin, xMax, yMax, crsWkt in rows:
+                if crsWkt is not None:
+                    footprints.append((QgsRectangle(xMin, yMin, xMax, yMax), crsWkt))
+                    continue
+                footprint = readFootprint(self.getEntryPath(key))
+                if footprint is None:
+                    continue
+                extent, crsWkt = footprint
+                with self.connection:
+                    self.connection.execute('UPDATE entries SET x_min = ?, y_min = ?, x_max = ?, y_max = ?, crs = ? WHERE key = ?',
+                                            (extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum(),
+                                             crsWkt, key))
+                footprints.append(footprint)
+        return footprints
+
+    def unusedPrefetchedBytes(self) -> int:
+        """Returns the size of prefetched entries that have not been used yet."""
+        with self._lock:
+            return self.connection.execute('SELECT IFNULL(SUM(size), 0) FROM entries WHERE prefetched = 1').fetchone()[0]
+
+    def totalBytes(self) -> int:
+        with self._lock:
+            return self.connection.execute('SELECT IFNULL(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _evict(self) -> None:
+        """Removes least recently used entries until the cache fits into its size limit (lock must be held)."""
+        totalBytes = self.connection.execute('SELECT IFNULL(SUM(size), 0) FROM entries').fetchone()[0]
+        if totalBytes <= self.maxBytes:
+            return
+        evictedKeys = []
+        for key, size in self.connection.execute('SELECT key, size FROM entries ORDER BY last_access'):
+            if totalBytes <= self.maxBytes:
+                break
+            evictedKeys.append(key)
+            totalBytes -= size
+        with self.connection:
+            self.connection.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in evictedKeys])
+        for key in evictedKeys:
+            try:
+                os.remove(self.getEntryPath(key))
+            except OSError:
+                pass
+
+
+_coverageCache: Optional[CoverageCache] = None
+_coverageCacheLock = threading.Lock()
+
+
+def getCoverageCache() -> CoverageCache:
+    """Returns the coverage cache shared by the dialog, its tasks and the prefetcher (created on first use)."""
+    global _coverageCache
+    with _coverageCacheLock:
+        if _coverageCache is None:
+            _coverageCache = CoverageCache()
+        return _coverageCache
+
+
+class DocumentCache:
+    """
+    Persistent store of the last capabilities and describe coverage responses of every request,
+    so that services can be loaded in offline mode.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        cacheDir = os.path.join(getPluginDataDir(), CACHE_DIRNAME)
+        os.makedirs(cacheDir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path or os.path.join(cacheDir, DOCUMENT_CACHE_FILENAME), check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    fetched REAL NOT NULL)""")
+
+    def get(self, url: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.connection.execute('SELECT content FROM documents WHERE key = ?', (getCacheKey(url),)).fetchone()
+        return row[0] if row else None
+
+    def listDocuments(self) -> List[Tuple[str, bytes]]:
+        with self._lock:
+            return self.connection.execute('SELECT url, content FROM documents').fetchall()
+
+    def put(self, url: str, content: bytes) -> None:
+        with self._lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO documents (key, url, content, fetched) VALUES (?, ?, ?, ?)',
+                                    (getCacheKey(url), url, content, time.time()))
+
+
+_documentCache: Optional[DocumentCache] = None
+
+
+def getDocumentCache() -> DocumentCache:
+    """Returns the shared document cache (created on first use)."""
+    global _documentCache
+    with _coverageCacheLock:
+        if _documentCache is None:
+            _documentCache = DocumentCache()
+        return _documentCache
+
+
+def getOfflineFootprint(covId: str, destCrs: QgsCoordinateReferenceSystem) -> Optional[QgsGeometry]:
+    """
+    Returns the union of the extents (in destCrs) of all cached responses of a coverage, None if nothing is cached.
+    The extents are read from the index of the cache.
+    """
+    footprints = []
+    for extent, crsWkt in getCoverageCache().listFootprints(covId):
+        sourceCrs = QgsCoordinateReferenceSystem.fromWkt(crsWkt)
+        if sourceCrs.isValid() and sourceCrs != destCrs:
+            try:
+                extent = getCoordinateTransform(sourceCrs, destCrs).transformBoundingBox(extent)
+            except Exception:
+                continue
+        footprints.append(QgsGeometry.fromRect(extent))
+    if not footprints:
+        return None
+    return QgsGeometry.unaryUnion(footprints)
@@ -1,6 +1,85 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 import re
-from qgis.core import Qgis, QgsCoordinateReferenceSystem
+import threading
+from qgis.core import (Qgis,
+                       QgsCoordinateReferenceSystem,
+                       QgsCoordinateTransform,
+                       QgsPointXY,
+                       QgsProject,
+                       QgsRectangle)
+
+from .coverage import GridAxis
+from .helpers import logInfoMessage, logWarnMessage
+
+
+# Transforms are created once per pair of crs and transform context of the project, setting up
+# transforms with datum grids (e.g. ETRS89 / DHDN) is expensive
+_crsCache: Dict[str, QgsCoordinateReferenceSystem] = {}
+_transformCache: Dict[Tuple[str, str], QgsCoordinateTransform] = {}
+_transformCacheLock = threading.Lock()
+
+# Points per edge of an extent transformed to the subset crs, edges are curved after most reprojections
+SUBSET_EDGE_POINTS = 21
+
+
+def getCrsFromUri(crsUri: str) -> QgsCoordinateReferenceSystem:
+    """Returns the crs of an OGC URI (or other definition known to fromOgcWmsCrs), created once per URI."""
+    with _transformCacheLock:
+        crs = _crsCache.get(crsUri)
+        if crs is None:
+            crs = _crsCache[crsUri] = QgsCoordinateReferenceSystem.fromOgcWmsCrs(crsUri)
+    return QgsCoordinateReferenceSystem(crs)
+
+
+def getCrsKey(crs: QgsCoordinateReferenceSystem) -> str:
+    return crs.authid() or crs.toWkt(Qgis.CrsWktVariant.Preferred)
+
+
+def getCoordinateTransform(sourceCrs: QgsCoordinateReferenceSystem,
+                           destCrs: QgsCoordinateReferenceSystem) -> QgsCoordinateTransform:
+    """
+    Returns a transform with the transform context of the project, from the shared cache.
+    The cache is cleared by invalidateTransformCache when the project crs or its transform context changes.
+    """
+    key = (getCrsKey(sourceCrs), getCrsKey(destCrs))
+    with _transformCacheLock:
+        transform = _transformCache.get(key)
+        if transform is None:
+            transform = _transformCache[key] = QgsCoordinateTransform(sourceCrs, destCrs, QgsProject.instance())
+    # copies share the transform data (implicit sharing) and can be used in other threads
+    return QgsCoordinateTransform(transform)
+
+
+def invalidateTransformCache() -> None:
+    with _transformCacheLock:
+        _transformCache.clear()
+
+
+def transformPoints(points: Iterable[QgsPointXY],
+                    sourceCrs: QgsCoordinateReferenceSystem,
+                    destCrs: QgsCoordinateReferenceSystem) -> List[QgsPointXY]:
+    """Transforms several points with one cached transform."""
+    transform = getCoordinateTransform(sourceCrs, destCrs)
+    return [transform.transform(point) for point in points]
+
+
+def densifyRectangle(rectangle: QgsRectangle, pointsPerEdge: int = SUBSET_EDGE_POINTS) -> List[QgsPointXY]:
+    """Returns points along the edges of a rectangle, pointsPerEdge per edge including the corners."""
+    steps = max(pointsPerEdge - 1, 1)
+    points = []
+    for step in range(steps):
+        x = rectangle.xMinimum() + rectangle.width() * step / steps
+        y = rectangle.yMinimum() + rectangle.height() * step / steps
+        points += [QgsPointXY(x, rectangle.yMinimum()),
+                   QgsPointXY(rectangle.xMaximum(), y),
+                   QgsPointXY(rectangle.xMaximum() - rectangle.width() * step / steps, rectangle.yMaximum()),
+                   QgsPointXY(rectangle.xMinimum(), rectangle.yMaximum() - rectangle.height() * step / steps)]
+    return points
+
+
+def formatCoordinate(value: float) -> str:
+    """Formats a subset coordinate without floating point noise (e.g. 390000.00000000006)."""
+    return f'{value:.15g}'
 
 
 def getAxisLabels(crsUri: str) -> List[str]:
@@ -8,7 +87,7 @@ def getAxisLabels(crsUri: str) -> List[str]:
     Returns axis labels of the crs in the right order.
     Information is retrieved from proj.db (by calculating a WKT-String).
     """
-    crsQgis = QgsCoordinateReferenceSystem.fromOgcWmsCrs(crsUri)
+    crsQgis = getCrsFromUri(crsUri)
     try:
         crsWktString = crsQgis.toWkt(4)
         return readAxisLabelsAndOrderFromWktString(crsWktString)
@@ -116,3 +195,87 @@ def switchCrsUriToOpenGis(crsUri: str) -> str:
         return crsUri
 
     return f"http://www.opengis.net/def/crs/{crs}"
+
+
+def buildSubsets(extent: QgsRectangle,
+                 extentCrs: QgsCoordinateReferenceSystem,
+                 subsetCrsUri: str,
+                 nativeCrsUri: str,
+                 nativeAxisLabels: List[str],
+                 ignoreAxisInversion: bool = False,
+                 gridAxes: Optional[Dict[str, GridAxis]] = None) -> Tuple[str, str]:
+    """
+    Creates the two horizontal subset strings of a get coverage request for an extent (in extentCrs).
+
+    Retrieval of axislabels:
+    - If the native crs of the coverage (from descrive coverage) is the subset crs chosen by the user
+    axis labels come from describe coverage response
+    - If the subset crs and the native crs differ axis labels are retreived using proj4:
+        - If more than 2 or no labels are found, native crs labels are used instead
+
+    Subset coordinates are defined in the extent crs (e.g. map crs of qgis project) and must be transformed to subset crs
+
+    The edges of the extent are densified before the transformation, so that the subset covers the whole extent.
+
+    If subset crs has inverted axis, axis labels order must be switched, unless ignoreAxisInversion is set.
+
+    If the subset crs is the native crs, the subset is enlarged to the cell edges of the native grid (gridAxes),
+    so that the service can cut whole cells without resampling and the same area results in the same request.
+
+    Raises:
+        ValueError: If a OGC URI string could not be created for the extent CRS
+    """
+    if nativeCrsUri == subsetCrsUri:
+        axisLabel0, axisLabel1 = nativeAxisLabels
+    else:
+        axisList = getAxisLabels(subsetCrsUri)
+        if not axisList:
+            logInfoMessage("Axis labels of subset crs could not be found. Native crs is used as subset crs instead.")
+            axisLabel0, axisLabel1 = nativeAxisLabels
+            subsetCrsUri = nativeCrsUri
+        elif len(axisList) > 2:
+            logWarnMessage(f"More than two axes are not supported (yet): {axisList}")
+            axisLabel0, axisLabel1 = nativeAxisLabels
+            subsetCrsUri = nativeCrsUri
+        else:
+            axisLabel0, axisLabel1 = axisList
+
+    extentCrsUri = crsAsOgcUri(extentCrs)
+
+    subsetCrs = getCrsFromUri(switchCrsUriToOpenGis(subsetCrsUri))
+
+    if extentCrsUri != subsetCrsUri:
+
+        logInfoMessage(f"Transforming extent coordinates from {extentCrsUri} to {subsetCrsUri}")
+
+        points = transformPoints(densifyRectangle(extent), extentCrs, subsetCrs)
+
+        xValues = [pt.x() for pt in points]
+        xMin = min(xValues)
+        xMax = max(xValues)
+
+        yValues = [pt.y() for pt in points]
+        yMin = min(yValues)
+        yMax = max(yValues)
+
+    else:
+        xMin = extent.xMinimum()
+        xMax = extent.xMaximum()
+        yMin = extent.yMinimum()
+        yMax = extent.yMaximum()
+
+    # we need to check if QGIS considers the CRS axes "inverted"
+    if not ignoreAxisInversion and subsetCrs.hasAxisInverted():
+        # e.g. WGS84 or Gauß-Krüger where "north" (y/lat) comes before "east" (x/lon)
+        intervals = [(axisLabel0, yMin, yMax), (axisLabel1, xMin, xMax)]
+    else:
+        # any standard x/y, e/n crs, e. g. UTM
+        intervals = [(axisLabel0, xMin, xMax), (axisLabel1, yMin, yMax)]
+
+    if gridAxes and subsetCrsUri == nativeCrsUri:
+        intervals = [(label, *gridAxes[label].snapInterval(lower, upper)) if label in gridAxes else (label, lower, upper)
+                     for label, lower, upper in intervals]
+
+    subset0, subset1 = [f"{label}({formatCoordinate(lower)},{formatCoordinate(upper)})"
+                        for label, lower, upper in intervals]
+    return subset0, subset1
@@ -2,4 +2,20 @@ class CapabilitiesException(Exception):
     pass
 
 class DescribeCoverageException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class RequestCanceledException(Exception):
+    pass
+
+class OfflineException(Exception):
+    pass
+
+class OwsException(Exception):
+    """Exception report of a service, category is one of the OWS_EXCEPTION_* constants of network.py"""
+
+    def __init__(self, exceptionCode: str, text: str, locator: str = '', category: str = '') -> None:
+        super().__init__(f'{exceptionCode}: {text}' if text else exceptionCode)
+        self.exceptionCode = exceptionCode
+        self.text = text
+        self.locator = locator
+        self.category = category
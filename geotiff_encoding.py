@@ -0,0 +1,102 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from osgeo import gdal
+
+
+# Conformance class of the WCS GeoTIFF encoding extension (OGC 12-100r1), listed as ows:Profile
+GEOTIFF_EXTENSION_PROFILE = 'geotiff-coverage'
+
+SETTINGS_GEOTIFF_COMPRESSION = 'plugins/simplewcs2/geotiff_compression'
+SETTINGS_GEOTIFF_PREDICTOR = 'plugins/simplewcs2/geotiff_predictor'
+SETTINGS_GEOTIFF_TILING = 'plugins/simplewcs2/geotiff_tiling'
+
+# Automatic policy: lossless compression and internal tiling, the predictor depends on the data type
+COMPRESSION_AUTOMATIC = 'Automatic'
+COMPRESSIONS = ['None', 'Deflate', 'LZW', 'JPEG', 'PackBits']
+PREDICTORS = ['None', 'Horizontal', 'FloatingPoint']
+DEFAULT_TILE_SIZE = 256
+DEFAULT_JPEG_QUALITY = 75
+
+
+@dataclass
+class GeoTiffEncoding:
+    """Encoding parameters of the GeoTIFF extension for GetCoverage requests."""
+    compression: str
+    predictor: str = 'None'
+    tiling: bool = True
+    tileSize: int = DEFAULT_TILE_SIZE
+    jpegQuality: int = DEFAULT_JPEG_QUALITY
+
+    def toParams(self) -> List[Tuple[str, str]]:
+        params = [('GEOTIFF:COMPRESSION', self.compression)]
+        if self.compression == 'JPEG':
+            params.append(('GEOTIFF:JPEG_QUALITY', str(self.jpegQuality)))
+        elif self.compression in ('Deflate', 'LZW') and self.predictor != 'None':
+            params.append(('GEOTIFF:PREDICTOR', self.predictor))
+        params.append(('GEOTIFF:TILING', 'true' if self.tiling else 'false'))
+        if self.tiling:
+            # tile sizes must be multiples of 16
+            params += [('GEOTIFF:TILEWIDTH', str(self.tileSize)), ('GEOTIFF:TILEHEIGHT', str(self.tileSize))]
+        return params
+
+
+def supportsGeoTiffExtension(profiles: List[str]) -> bool:
+    return any(GEOTIFF_EXTENSION_PROFILE in profile.lower() for profile in profiles)
+
+
+def chooseEncoding(compression: str, predictor: str, tiling: bool) -> Optional[GeoTiffEncoding]:
+    """
+    Returns the encoding of the chosen parameters, None if the service should use its defaults (compression 'None'
+    without tiling). The automatic policy requests Deflate with internal tiles; the horizontal predictor is only
+    added on request, as it does not fit floating point data.
+    """
+    if compression == COMPRESSION_AUTOMATIC:
+        return GeoTiffEncoding(compression='Deflate', predictor=predictor, tiling=True)
+    if compression == 'None' and not tiling:
+        return None
+    return GeoTiffEncoding(compression=compression, predictor=predictor, tiling=tiling)
+
+
+def getEncodingParams(profiles: List[str], outputFormat: str, compression: str, predictor: str,
+                      tiling: bool) -> List[Tuple[str, str]]:
+    """
+    Returns the encoding parameters of the chosen encoding for GeoTIFF requests, none if the service does not
+    support the GeoTIFF extension (the service uses its default encoding then).
+    """
+    if not supportsGeoTiffExtension(profiles) or 'tiff' not in outputFormat:
+        return []
+    encoding = chooseEncoding(compression, predictor, tiling)
+    return encoding.toParams() if encoding else []
+
+
+def getEncodingSavings(path: str) -> Optional[Tuple[int, int]]:
+    """Returns the file size and the uncompressed size of the pixels of a compressed GeoTIFF, None for other files."""
+    dataset = gdal.Open(path)
+    if dataset is None or dataset.GetDriver().ShortName != 'GTiff':
+        return None
+    compression = dataset.GetMetadataItem('COMPRESSION', 'IMAGE_STRUCTURE')
+    if not compression or dataset.RasterCount == 0:
+        return None
+    bytesPerPixel = sum(gdal.GetDataTypeSize(dataset.GetRasterBand(bandIndex).DataType) // 8
+                        for bandIndex in range(1, dataset.RasterCount + 1))
+    uncompressedBytes = dataset.RasterXSize * dataset.RasterYSize * bytesPerPixel
+    dataset = None
+    return os.path.getsize(path), uncompressedBytes
+
+
+def formatEncodingSavings(fileBytes: int, uncompressedBytes: int) -> str:
+    saved = 1 - fileBytes / uncompressedBytes if uncompressedBytes else 0
+    return (f'{fileBytes / 1024 / 1024:.1f} MB received instead of {uncompressedBytes / 1024 / 1024:.1f} MB '
+            f'uncompressed ({saved:.0%} saved)')
@@ -1,10 +1,16 @@
+import os
+
 from qgis.utils import iface
-from qgis.core import Qgis, QgsMessageLog
+from qgis.core import Qgis, QgsApplication, QgsMessageLog
 from qgis.PyQt.QtWidgets import QDockWidget
 
+from .custom_exceptions import RequestCanceledException
+
 
 
 LOGHEADER = 'Simple WCS 2'
+# Exception QgsTask.fromFunction passes to on_finished when a task is canceled before its function raised
+TASK_CANCELED_MESSAGE = 'Task canceled'
 
 
 def logInfoMessage(msg):
@@ -19,3 +25,15 @@ def openLog():
     iface.mainWindow().findChild(QDockWidget, 'MessageLog').show()
 
 
+def isTaskCanceled(exception) -> bool:
+    """Returns whether the exception passed to on_finished of a task means that the task was canceled."""
+    return isinstance(exception, RequestCanceledException) or str(exception) == TASK_CANCELED_MESSAGE
+
+
+def getPluginDataDir() -> str:
+    """Returns the directory for local plugin data (catalogs, caches) inside the QGIS profile."""
+    dataDir = os.path.join(QgsApplication.qgisSettingsDirPath(), 'simplewcs2')
+    os.makedirs(dataDir, exist_ok=True)
+    return dataDir
+
+
@@ -0,0 +1,199 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import io
+import os
+import shutil
+import threading
+from typing import Optional
+
+from qgis.PyQt.QtCore import QObject, QSettings, pyqtSignal
+from qgis.core import QgsProcessingUtils
+
+
+SETTINGS_MEMORY_BUDGET_MB = 'plugins/simplewcs2/memory_budget_mb'
+SETTINGS_SPILL_THRESHOLD_MB = 'plugins/simplewcs2/spill_threshold_mb'
+DEFAULT_MEMORY_BUDGET_MB = 256
+DEFAULT_SPILL_THRESHOLD_MB = 32
+
+
+class MemoryBudget(QObject):
+    """
+    Plugin-wide limit for the memory held by responses.
+    Buffers reserve memory before they grow, a buffer that does not get its reservation spills to disk.
+    """
+
+    # bytes in memory, limit in bytes, number of responses spilled to disk
+    usageChanged = pyqtSignal(int, int, int)
+
+    def __init__(self, limitBytes: int, spillThresholdBytes: int) -> None:
+        super().__init__()
+        self.limitBytes = limitBytes
+        self.spillThresholdBytes = spillThresholdBytes
+        self.usedBytes = 0
+        self.spilledCount = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> bool:
+        """Reserves memory, returns False if the budget is exhausted."""
+        with self._lock:
+            if self.usedBytes + size > self.limitBytes:
+                return False
+            self.usedBytes += size
+        self.emitUsage()
+        return True
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self.usedBytes = max(0, self.usedBytes - size)
+        self.emitUsage()
+
+    def addSpilled(self, count: int) -> None:
+        with self._lock:
+            self.spilledCount += count
+        self.emitUsage()
+
+    def emitUsage(self) -> None:
+        self.usageChanged.emit(self.usedBytes, self.limitBytes, self.spilledCount)
+
+
+_memoryBudget: Optional[MemoryBudget] = None
+_memoryBudgetLock = threading.Lock()
+
+
+def getMemoryBudget() -> MemoryBudget:
+    """Returns the memory budget shared by all requests of the plugin (created on first use from the settings)."""
+    global _memoryBudget
+    with _memoryBudgetLock:
+        if _memoryBudget is None:
+            settings = QSettings()
+            limitMb = settings.value(SETTINGS_MEMORY_BUDGET_MB, DEFAULT_MEMORY_BUDGET_MB, type=int)
+            spillThresholdMb = settings.value(SETTINGS_SPILL_THRESHOLD_MB, DEFAULT_SPILL_THRESHOLD_MB, type=int)
+            _memoryBudget = MemoryBudget(limitMb * 1024 * 1024, spillThresholdMb * 1024 * 1024)
+        return _memoryBudget
+
+
+class ResponseBuffer:
+    """
+    Receives the content of a response.
+
+    The content stays in memory while it is smaller than the spill threshold and the memory budget
+    allows it, otherwise it is moved to a temporary file transparently.
+    A buffer may be shared by several callers (see RequestCoordinator), so
+    toFile and release can be called more than once.
+    """
+
+    def __init__(self, budget: Optional[MemoryBudget] = None) -> None:
+        self.budget = budget or getMemoryBudget()
+        self.memory: Optional[io.BytesIO] = io.BytesIO()
+        self.reservedBytes = 0
+        self.path: Optional[str] = None
+        self.file = None
+        self.size = 0
+        # set by the download, if the transfer failed
+        self.errorString: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def isSpilled(self) -> bool:
+        return self.path is not None
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            if self.memory is not None:
+                fitsThreshold = self.size + len(data) <= self.budget.spillThresholdBytes
+                if fitsThreshold and self.budget.reserve(len(data)):
+                    self.reservedBytes += len(data)
+                    self.memory.write(data)
+                    self.size += len(data)
+                    return
+                self._spill(countAsSpilled=True)
+            self.file.write(data)
+            self.size += len(data)
+
+    def _spill(self, countAsSpilled: bool = False) -> None:
+        """Moves the content from memory to a temporary file (lock must be held)."""
+        self.path = QgsProcessingUtils.generateTempFilename('wcs_response')
+        self.file = open(self.path, 'wb')
+        self.file.write(self.memory.getbuffer())
+        self.memory = None
+        self._releaseReservation()
+        if countAsSpilled:
+            self.budget.addSpilled(1)
+
+    def finish(self) -> None:
+        """Closes the temporary file after the last write."""
+        with self._lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def peek(self, size: int) -> bytes:
+        """Returns the first bytes of the content (e.g. to detect xml exception reports)."""
+        with self._lock:
+            if self.memory is not None:
+                return bytes(self.memory.getbuffer()[:size])
+            if self.file is not None:
+                self.file.flush()
+        with open(self.path, 'rb') as spilledFile:
+            return spilledFile.read(size)
+
+    def getBytes(self) -> bytes:
+        """Returns the whole content, reads the temporary file if the content was spilled."""
+        with self._lock:
+            if self.memory is not None:
+                return self.memory.getvalue()
+        with open(self.path, 'rb') as spilledFile:
+            return spilledFile.read()
+
+    def copyTo(self, path: str) -> None:
+        """Writes a copy of the content to path, the buffer is not changed."""
+        with self._lock:
+            if self.memory is not None:
+                with open(path, 'wb') as copyFile:
+                    copyFile.write(self.memory.getbuffer())
+                return
+            if self.file is not None:
+                self.file.flush()
+        shutil.copyfile(self.path, path)
+
+    def toFile(self) -> str:
+        """Returns the path of a file with the content, content held in memory is written to a temporary file."""
+        with self._lock:
+            if self.memory is not None:
+                self._spill()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            return self.path
+
+    def release(self) -> None:
+        """Gives the memory of the content back to the budget, the buffer must not be used afterwards."""
+        with self._lock:
+            self.memory = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self._releaseReservation()
+
+    def _releaseReservation(self) -> None:
+        if self.reservedBytes:
+            self.budget.release(self.reservedBytes)
+            self.reservedBytes = 0
+
+
+def discardBuffer(buffer: ResponseBuffer) -> None:
+    """Releases the memory of a buffer and removes its temporary file."""
+    buffer.release()
+    if buffer.isSpilled:
+        try:
+            os.remove(buffer.path)
+        except OSError:
+            pass
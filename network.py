@@ -0,0 +1,634 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import functools
+import os
+import re
+import time
+import urllib
+import xml.etree.ElementTree as ET # nosec
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from qgis.PyQt.QtCore import QSettings
+from osgeo import gdal
+from qgis.core import QgsCoordinateReferenceSystem, QgsGeometry, QgsProcessingUtils, QgsRectangle
+
+from .adaptive_concurrency import MAX_CONCURRENCY, AdaptiveController
+from .geotiff_encoding import formatEncodingSavings, getEncodingSavings
+from .helpers import logWarnMessage, logInfoMessage
+from .custom_exceptions import (CapabilitiesException,
+                                DescribeCoverageException,
+                                OfflineException,
+                                OwsException,
+                                RequestCanceledException)
+from .crs_utils import getCrsFromUri
+from .coverage_cache import (TRIM_SUBSET_PATTERN,
+                             CoverageCache,
+                             getCoverageCache,
+                             getDocumentCache,
+                             getMatchingParams,
+                             splitTrimSubsets)
+from .memory_budget import ResponseBuffer, discardBuffer
+from .profiling import profiled
+from .progress import getTransferProgress
+from .rate_limiter import backgroundRequests, getRateLimiter, isBackgroundRequest
+from .request_coordinator import requestCoordinator
+from .transport import getTransport, waitForDelay
+
+
+wcs_ns = '{http://www.opengis.net/wcs/2.0}'
+
+# In offline mode all responses are served from the local caches, no request is sent
+SETTINGS_OFFLINE_MODE = 'plugins/simplewcs2/offline_mode'
+
+# Responses starting with '<' within these bytes are checked for xml exception reports
+XML_DETECTION_BYTES = 1024
+# Number of GetCoverage requests of one task (slices, tiles) running at the same time
+CONCURRENT_COVERAGE_REQUESTS = 4
+
+# Categories of exception reports
+OWS_EXCEPTION_SIZE_LIMIT = 'size_limit'
+OWS_EXCEPTION_INVALID_REQUEST = 'invalid_request'
+OWS_EXCEPTION_SERVER = 'server'
+
+INVALID_REQUEST_EXCEPTION_CODES = {'MissingParameterValue', 'InvalidParameterValue', 'OperationNotSupported',
+                                   'NoSuchCoverage', 'InvalidAxisLabel', 'InvalidSubsetting', 'InvalidEncodingSyntax',
+                                   'NoSuchField', 'VersionNegotiationFailed'}
+SIZE_LIMIT_EXCEPTION_CODES = {'ResponseSizeExceeded', 'ResponseTooLarge', 'RequestTooLarge'}
+# Size limits are mostly reported as NoApplicableCode, they are recognized by their text
+# (only for that code, as texts of invalid requests mention ranges and bounds as well)
+SIZE_LIMIT_TEXT_PATTERN = re.compile(r'too (much|large|big)|size limit|exceeds? (the )?(max|maximum|size|limit)'
+                                     r'|maximum (output|response|image|raster)|max(imum)?[ _]?(size|width|height|pixels)'
+                                     r'|limit is',
+                                     re.IGNORECASE)
+
+# Requests exceeding a size limit are split into quadrants up to this depth (4^depth pieces)
+MAX_SPLIT_DEPTH = 4
+# Cached responses leaving less than this share of a requested subset uncovered (rounding) cover it offline
+UNCOVERED_AREA_TOLERANCE = 1e-6
+
+
+def isOfflineMode() -> bool:
+    return QSettings().value(SETTINGS_OFFLINE_MODE, False, type=bool)
+
+
+def setOfflineMode(enabled: bool) -> None:
+    QSettings().setValue(SETTINGS_OFFLINE_MODE, enabled)
+
+
+def checkUrlSyntax(url: str) -> str:
+    if '?' in url:
+        if url.endswith('?'):
+            newUrl = url
+        elif url.endswith('&'):
+            newUrl = url
+        else:
+            newUrl = url + '&'
+    else:
+        newUrl = url + '?'
+
+    return newUrl
+
+
+def buildCapabilitiesRequest(version: str, baseUrl: str) -> str:
+    """ Creates a string to request the capabilities of a a service"""
+    params = {"REQUEST": "GetCapabilities",
+              "SERVICE": "WCS",
+              "Version": version}
+    queryString = urllib.parse.urlencode(params)
+    baseUrl = checkUrlSyntax(baseUrl)
+    capabilitiesRequest = baseUrl + queryString
+
+    return capabilitiesRequest
+
+
+def requestCapabilities(version: str, baseUrl: str, feedback=None) -> ET.ElementTree:
+    """
+    Requests capabilities of the service.
+    feedback (QgsFeedback or QgsTask) cancels the request.
+    Raises:
+        CapabilitiesException, if any error occurs and the response is not a capabilities document
+        OfflineException, if the capabilities are not cached in offline mode
+        RequestCanceledException
+    """
+
+    capabilitiesRequest = buildCapabilitiesRequest(version=version, baseUrl=baseUrl)
+    try:
+        root = requestXml(capabilitiesRequest, feedback)
+        capabilitiesXmlMainTag = root.tag
+        if capabilitiesXmlMainTag != f'{wcs_ns}Capabilities':
+            raise CapabilitiesException('Error: Could not read capabilities for this service')
+        capabilitiesXml = ET.ElementTree(root)
+    except (RequestCanceledException, OfflineException):
+        raise
+    except:
+        raise CapabilitiesException('Error: Could not read capabilities for this service')
+
+    return capabilitiesXml
+
+
+def buildDescribeCoverageRequest(describeCoverageUrl: str, covIds: List[str], version: str) -> str:
+    """Creates a string to request describeCoverage of the given coverages of the service"""
+    covIdsString = ','.join(covIds)
+    params = {"REQUEST": "DescribeCoverage",
+              "SERVICE": "WCS",
+              "VERSION": version,
+              "COVERAGEID": covIdsString}
+    queryString = urllib.parse.urlencode(params)
+    url = checkUrlSyntax(describeCoverageUrl)
+
+    return url + queryString
+
+
+def requestDescribeCoverage(describeCoverageUrl: str, covIds: List[str], version: str, feedback=None) -> ET.ElementTree:
+    """
+    Requests describe coverage information of the given coverages of the service.
+    feedback (QgsFeedback or QgsTask) cancels the request.
+    Raises:
+        DescribeCoverageException, if any error occurs and the response is not a descrive coverage document
+        OfflineException, if the coverage descriptions are not cached in offline mode
+        RequestCanceledException
+    """
+    coverageRequest = buildDescribeCoverageRequest(describeCoverageUrl, covIds, version)
+    try:
+        root = requestXml(coverageRequest, feedback)
+        coverageXmlMainTag = root.tag
+        if coverageXmlMainTag != f'{wcs_ns}CoverageDescriptions':
+            raise DescribeCoverageException('Error: Could not read describeCoverage for this service')
+        describeCoverageXml = ET.ElementTree(root)
+    except (RequestCanceledException, OfflineException):
+        raise
+    except:
+        raise DescribeCoverageException('Error: Could not read describeCoverage for this service')
+
+    return describeCoverageXml
+
+
+def downloadToBuffer(url: str, feedback=None) -> ResponseBuffer:
+    """
+    Downloads the response of a request chunk by chunk into a ResponseBuffer,
+    so that large responses spill to disk instead of being held in memory.
+    Network errors are logged, the buffer then contains whatever the server sent.
+    feedback (QgsFeedback or QgsTask) is checked while the transfer is running,
+    a canceled transfer is aborted and its partial response is removed.
+    Raises:
+        OfflineException, in offline mode (no request is sent)
+        RequestCanceledException
+    """
+    if isOfflineMode():
+        raise OfflineException(f'Not available offline: {url}')
+    if feedback is not None and feedback.isCanceled():
+        raise RequestCanceledException('Request canceled')
+
+    waitForDelay(getRateLimiter().getRequestDelay(url), feedback)
+
+    buffer = ResponseBuffer()
+    getTransport().transfer(url, buffer, feedback)
+    return buffer
+
+
+def parseXmlBuffer(buffer: ResponseBuffer) -> ET.Element:
+    """
+    Parses a response, spilled responses are parsed from their file.
+    Raises:
+        ET.ParseError
+    """
+    if buffer.isSpilled:
+        return ET.parse(buffer.toFile()).getroot() # nosec
+    return ET.fromstring(buffer.getBytes()) # nosec
+
+
+def requestXml(request: str, feedback=None) -> ET.Element:
+    """
+    Requests a xml document (capabilities, describe coverage) and returns its root element.
+    Identical requests running at the same time share one transfer and the parsed document.
+    Documents are stored in the document cache, in offline mode they are served from it.
+    Raises:
+        ET.ParseError
+        OfflineException
+        RequestCanceledException
+    """
+    if isOfflineMode():
+        content = getDocumentCache().get(request)
+        if content is None:
+            raise OfflineException(f'Not available offline: {request}')
+        return ET.fromstring(content) # nosec
+    return requestCoordinator.fetch(request, lambda url: fetchXml(url, feedback), feedback)
+
+
+def fetchXml(request: str, feedback=None) -> ET.Element:
+    buffer = downloadToBuffer(request, feedback)
+    try:
+        root = parseXmlBuffer(buffer)
+        if 'ExceptionReport' not in root.tag:
+            getDocumentCache().put(request, buffer.getBytes())
+        return root
+    finally:
+        discardBuffer(buffer)
+
+
+def getCoverage(task, urlGetCoverage: str, covId: str, prefetch: bool = False) -> dict:
+    """
+    Requests get coverage using QgsNetworkAccessManager and returns the path of the received file.
+    Responses are stored in the coverage cache, requests whose subset is covered by cached responses are served from them.
+    Identical requests running at the same time share one transfer.
+    prefetch marks speculative requests: they are not counted as cache use.
+    Canceling the task aborts the transfer.
+    In offline mode, the request is served from cached responses of the same coverage covering the subset.
+    Raises:
+        OfflineException, if no cached response intersects the subset in offline mode
+        RequestCanceledException
+    """
+    coverageCache = getCoverageCache()
+    if isOfflineMode():
+        return None if prefetch else getOfflineCoverage(coverageCache, urlGetCoverage, covId)
+    # e.g. the prefetched neighbouring extent together with the current one cover a panned subset
+    cachedUrls, partial = findCachedUrls(coverageCache, urlGetCoverage, covId)
+    if cachedUrls and not partial:
+        if prefetch:
+            return None
+        result = readCachedCoverage(coverageCache, cachedUrls, urlGetCoverage, covId, requireCrop=True)
+        if result is not None:
+            logInfoMessage(f'Served from {len(cachedUrls)} cached response(s): {urlGetCoverage}')
+            return result
+
+    def fetchAndCacheCoverage(url: str) -> dict:
+        result = fetchCoverage(url, covId, task)
+        if result:
+            coverageCache.put(url, covId, result['path'], prefetched=prefetch)
+        return result
+
+    return requestCoordinator.fetch(urlGetCoverage, fetchAndCacheCoverage, task)
+
+
+def findCachedUrls(coverageCache: CoverageCache, urlGetCoverage: str, covId: str) -> Tuple[List[str], bool]:
+    """
+    Returns the urls of cached responses of the same coverage and settings (crs, format, slices) that serve a request:
+    the request itself or one response covering the whole subset, otherwise all responses intersecting the subset
+    (e.g. seeded or prefetched tiles). The flag is set if the responses do not cover the whole subset.
+    """
+    if coverageCache.contains(urlGetCoverage):
+        return [urlGetCoverage], False
+
+    _, trims = splitTrimSubsets(urlGetCoverage)
+    intersectingUrls = []
+    intersectingTrims = []
+    for cachedUrl, _ in coverageCache.listEntries(covId, getMatchingParams(urlGetCoverage)):
+        _, cachedTrims = splitTrimSubsets(cachedUrl)
+        if cachedTrims.keys() != trims.keys():
+            continue
+        if all(cachedTrims[label][0] <= lower and upper <= cachedTrims[label][1] for label, (lower, upper) in trims.items()):
+            return [cachedUrl], False
+        if all(cachedTrims[label][0] < upper and lower < cachedTrims[label][1] for label, (lower, upper) in trims.items()):
+            intersectingUrls.append(cachedUrl)
+            intersectingTrims.append(cachedTrims)
+    return intersectingUrls, not isCoveredByTrims(trims, intersectingTrims)
+
+
+def readCachedCoverage(coverageCache: CoverageCache,
+                       urls: List[str],
+                       urlGetCoverage: str,
+                       covId: str,
+                       requireCrop: bool = False) -> Optional[dict]:
+    """
+    Returns the cached responses of the urls serving a request, combined into a mosaic if there are several
+    and cropped to the trim subsets of the request, unless they are the response of the request itself.
+    Returns None if no response could be read, or if requireCrop is set and the responses could not be cropped.
+    """
+    paths = [path for path in (coverageCache.get(url) for url in urls) if path is not None]
+    if not paths:
+        return None
+    path = paths[0] if len(paths) == 1 else buildMosaic(paths)
+    if urls == [urlGetCoverage]:
+        return {'path': path, 'coverage': covId, 'cached': True}
+
+    croppedPath = cropToTrims(path, urlGetCoverage)
+    if croppedPath is not None:
+        return {'path': croppedPath, 'coverage': covId, 'cached': True}
+    if requireCrop:
+        logInfoMessage(f'Cached responses can not be cropped to the subset, requesting it: {urlGetCoverage}')
+        removeCoverageFiles(path)
+        return None
+    return {'path': path, 'coverage': covId, 'cached': True}
+
+
+def getOfflineCoverage(coverageCache: CoverageCache, urlGetCoverage: str, covId: str) -> dict:
+    """
+    Serves a request from cached responses, see findCachedUrls, 'partial' is set if they leave gaps.
+    Raises:
+        OfflineException
+    """
+    urls, partial = findCachedUrls(coverageCache, urlGetCoverage, covId)
+    result = readCachedCoverage(coverageCache, urls, urlGetCoverage, covId)
+    if result is None:
+        raise OfflineException(f'The requested area of {covId} is not available offline')
+    logInfoMessage(f'Served from {len(urls)} cached response(s) (offline): {urlGetCoverage}')
+    result['partial'] = partial
+    return result
+
+
+def isCoveredByTrims(trims: Dict[str, Tuple[float, float]], coveringTrims: List[Dict[str, Tuple[float, float]]]) -> bool:
+    """Returns whether the union of the horizontal trim subsets of cached responses covers the trim subsets of a request."""
+    if len(trims) != 2 or not coveringTrims:
+        return False
+    xLabel, yLabel = sorted(trims)
+
+    def toGeometry(axisTrims: Dict[str, Tuple[float, float]]) -> QgsGeometry:
+        return QgsGeometry.fromRect(QgsRectangle(axisTrims[xLabel][0], axisTrims[yLabel][0],
+                                                 axisTrims[xLabel][1], axisTrims[yLabel][1]))
+
+    requested = toGeometry(trims)
+    uncovered = requested.difference(QgsGeometry.unaryUnion([toGeometry(axisTrims) for axisTrims in coveringTrims]))
+    return uncovered.isEmpty() or uncovered.area() <= UNCOVERED_AREA_TOLERANCE * requested.area()
+
+
+def getCoverages(task,
+                 urls: List[str],
+                 covId: str,
+                 controller: Optional[AdaptiveController] = None,
+                 splitDepth: int = 0) -> Dict[str, str]:
+    """
+    Requests several coverages (e.g. slices or tiles) concurrently and returns the paths of the received files by url.
+    Requests exceeding a size limit of the service are split (see getCoverageWithSplit).
+    Requests that fail are logged and left out, the progress of the task is set.
+    The controller of the service, if given, limits and adjusts the number of parallel requests.
+    Raises:
+        RequestCanceledException
+    """
+    maxWorkers = CONCURRENT_COVERAGE_REQUESTS if controller is None else MAX_CONCURRENCY
+    progress = getTransferProgress(task) if splitDepth == 0 else None
+    if progress is not None:
+        progress.setPlannedRequests(len(urls))
+    requestFunction = functools.partial(getCoverageWithSplit, controller=controller, splitDepth=splitDepth)
+    if isBackgroundRequest():
+        # the worker threads do not inherit the background marker of the calling thread
+        requestFunction = functools.partial(runAsBackgroundRequest, requestFunction)
+
+    paths = {}
+    with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+        futures = {executor.submit(requestFunction, task, url, covId): url for url in urls}
+        for finishedCount, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            if splitDepth == 0:
+                task.setProgress(100 * finishedCount / len(futures))
+            if progress is not None:
+                progress.finishRequest()
+            try:
+                result = future.result()
+            except RequestCanceledException:
+                for pendingFuture in futures:
+                    pendingFuture.cancel()
+                raise
+            except Exception as e:
+                logWarnMessage(f'Coverage could not be loaded: {url}: {e}')
+                continue
+            if result:
+                paths[url] = result['path']
+            else:
+                logWarnMessage(f'Coverage could not be loaded: {url}')
+
+    if task.isCanceled():
+        raise RequestCanceledException('Request canceled')
+    if controller is not None and splitDepth == 0:
+        controller.adjustTileSize()
+    return paths
+
+
+def runAsBackgroundRequest(function, *args, **kwargs):
+    with backgroundRequests():
+        return function(*args, **kwargs)
+
+
+def getCoverageWithSplit(task,
+                         urlGetCoverage: str,
+                         covId: str,
+                         controller: Optional[AdaptiveController] = None,
+                         splitDepth: int = 0) -> dict:
+    """
+    Requests get coverage. If the service reports that the response would exceed its size limit,
+    the request is split into quadrants (recursively, up to MAX_SPLIT_DEPTH), the quadrants are requested
+    concurrently and combined into one mosaic.
+    Raises:
+        OwsException, if the request could not be split or a quadrant failed
+        RequestCanceledException
+    """
+    try:
+        if controller is None:
+            return getCoverage(task, urlGetCoverage, covId)
+        return getControlledCoverage(task, urlGetCoverage, covId, controller)
+    except OwsException as e:
+        if e.category != OWS_EXCEPTION_SIZE_LIMIT or splitDepth >= MAX_SPLIT_DEPTH:
+            raise
+        quadrantUrls = splitRequestIntoQuadrants(urlGetCoverage)
+        if not quadrantUrls:
+            raise
+        logInfoMessage(f'Size limit of the service exceeded, requesting quadrants (depth {splitDepth + 1}): {e}')
+        paths = getCoverages(task, quadrantUrls, covId, controller, splitDepth + 1)
+        if len(paths) != len(quadrantUrls):
+            raise OwsException(e.exceptionCode, 'Not all quadrants of the request could be loaded',
+                               e.locator, e.category)
+        return {'path': buildMosaic([paths[url] for url in quadrantUrls]), 'coverage': covId}
+
+
+def splitRequestIntoQuadrants(urlGetCoverage: str) -> List[str]:
+    """
+    Returns four requests covering the quadrants of the horizontal trim subsets of a request,
+    an empty list if the request has no two numeric trim subsets.
+    """
+    splitUrl = urllib.parse.urlsplit(urlGetCoverage)
+    params = urllib.parse.parse_qsl(splitUrl.query, keep_blank_values=True)
+    trimIndices = [index for index, (key, value) in enumerate(params)
+                   if key.upper() == 'SUBSET' and TRIM_SUBSET_PATTERN.match(value)]
+    if len(trimIndices) != 2:
+        return []
+
+    halves = []
+    for index in trimIndices:
+        label, lower, upper = TRIM_SUBSET_PATTERN.match(params[index][1]).groups()
+        lower, upper = float(lower), float(upper)
+        middle = (lower + upper) / 2
+        halves.append([f'{label}({lower!r},{middle!r})', f'{label}({middle!r},{upper!r})'])
+
+    quadrantUrls = []
+    for subset0 in halves[0]:
+        for subset1 in halves[1]:
+            quadrantParams = list(params)
+            quadrantParams[trimIndices[0]] = (params[trimIndices[0]][0], subset0)
+            quadrantParams[trimIndices[1]] = (params[trimIndices[1]][0], subset1)
+            quadrantUrls.append(urllib.parse.urlunsplit(splitUrl._replace(query=urllib.parse.urlencode(quadrantParams))))
+    return quadrantUrls
+
+
+def buildMosaic(paths: List[str]) -> str:
+    """
+    Combines adjacent coverages (tiles, quadrants) into one VRT and returns its path.
+    Raises:
+        RuntimeError, if GDAL could not combine the coverages
+    """
+    mosaicPath = QgsProcessingUtils.generateTempFilename('wcs_mosaic.vrt')
+    mosaic = gdal.BuildVRT(mosaicPath, paths)
+    if mosaic is None:
+        raise RuntimeError(f'Coverages could not be combined: {gdal.GetLastErrorMsg()}')
+    mosaic = None
+    return mosaicPath
+
+
+def cropToTrims(path: str, urlGetCoverage: str) -> Optional[str]:
+    """
+    Returns the path of a VRT showing the part of a raster within the horizontal trim subsets of a request.
+    Returns None if the trims can not be applied to the raster: the subsetting crs differs from the crs of the raster
+    (subsets in the native crs of a response in another output crs are not known), the window does not lie
+    within the raster or GDAL could not crop it.
+    """
+    params = {key.upper(): value for key, value in urllib.parse.parse_qsl(urllib.parse.urlsplit(urlGetCoverage).query)}
+    _, trims = splitTrimSubsets(urlGetCoverage)
+    if len(trims) != 2:
+        return None
+    source = gdal.Open(path)
+    if source is None:
+        return None
+    rasterCrs = QgsCoordinateReferenceSystem.fromWkt(source.GetProjection())
+    if 'SUBSETTINGCRS' in params:
+        subsetCrs = getCrsFromUri(params['SUBSETTINGCRS'])
+        if not subsetCrs.isValid() or subsetCrs != rasterCrs:
+            return None
+    elif 'OUTPUTCRS' in params:
+        return None
+    else:
+        subsetCrs = rasterCrs
+
+    # Trims follow the axis order of the crs (unless the axis inversion was ignored), the raster is in x/y order:
+    # the order whose window lies within the raster is used
+    originX, pixelWidth, _, originY, _, pixelHeight = source.GetGeoTransform()
+    rasterExtent = QgsRectangle(originX, originY + pixelHeight * source.RasterYSize,
+                                originX + pixelWidth * source.RasterXSize, originY)
+    rasterExtent.grow(max(abs(pixelWidth), abs(pixelHeight)))
+    firstTrim, secondTrim = trims.values()
+    orders = [(firstTrim, secondTrim), (secondTrim, firstTrim)]
+    if subsetCrs.hasAxisInverted():
+        orders.reverse()
+    window = next((QgsRectangle(xMin, yMin, xMax, yMax) for (xMin, xMax), (yMin, yMax) in orders
+                   if rasterExtent.contains(QgsRectangle(xMin, yMin, xMax, yMax))), None)
+    if window is None:
+        return None
+    croppedPath = QgsProcessingUtils.generateTempFilename('wcs_cropped.vrt')
+    projWin = [window.xMinimum(), window.yMaximum(), window.xMaximum(), window.yMinimum()]
+    cropped = gdal.Translate(croppedPath, source, options=gdal.TranslateOptions(format='VRT', projWin=projWin))
+    source = None
+    if cropped is None:
+        logWarnMessage(f'Cached coverage could not be cropped: {gdal.GetLastErrorMsg()}')
+        return None
+    cropped = None
+    return croppedPath
+
+
+def removeCoverageFiles(path: str) -> None:
+    """Removes a received coverage file, for mosaics (VRT) also the files combined in it."""
+    if path.lower().endswith('.vrt'):
+        mosaic = gdal.Open(path)
+        fileList = (mosaic.GetFileList() or []) if mosaic is not None else []
+        mosaic = None
+        for sourcePath in fileList:
+            if os.path.normpath(sourcePath) != os.path.normpath(path):
+                removeCoverageFiles(sourcePath)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def readOwsException(root: ET.Element) -> OwsException:
+    """Reads the first exception of an exception report and classifies it."""
+    exceptionElement = next((element for element in root.iter() if element.tag.endswith('}Exception')
+                             or element.tag == 'Exception'), None)
+    if exceptionElement is None:
+        return OwsException('NoApplicableCode', ET.tostring(root, encoding='unicode'), category=OWS_EXCEPTION_SERVER)
+
+    exceptionCode = exceptionElement.attrib.get('exceptionCode', 'NoApplicableCode')
+    texts = [(element.text or '').strip() for element in exceptionElement.iter() if element.tag.endswith('ExceptionText')]
+    text = ' '.join(text for text in texts if text)
+    locator = exceptionElement.attrib.get('locator', '')
+
+    if exceptionCode in SIZE_LIMIT_EXCEPTION_CODES:
+        category = OWS_EXCEPTION_SIZE_LIMIT
+    elif exceptionCode in INVALID_REQUEST_EXCEPTION_CODES:
+        category = OWS_EXCEPTION_INVALID_REQUEST
+    elif exceptionCode == 'NoApplicableCode' and SIZE_LIMIT_TEXT_PATTERN.search(text):
+        category = OWS_EXCEPTION_SIZE_LIMIT
+    else:
+        category = OWS_EXCEPTION_SERVER
+    return OwsException(exceptionCode, text, locator, category)
+
+
+def getControlledCoverage(task, urlGetCoverage: str, covId: str, controller: AdaptiveController) -> dict:
+    """
+    Requests get coverage as soon as the controller allows another parallel request
+    and reports size and duration of the transfer to the controller.
+    Raises:
+        RequestCanceledException
+    """
+    controller.acquireSlot(task)
+    start = time.monotonic()
+    try:
+        result = getCoverage(task, urlGetCoverage, covId)
+    except RequestCanceledException:
+        controller.releaseSlotUnmeasured()
+        raise
+    except Exception:
+        controller.releaseSlot(0, time.monotonic() - start, failed=True)
+        raise
+
+    if result is None:
+        controller.releaseSlot(0, time.monotonic() - start, failed=True)
+    elif result.get('cached'):
+        controller.releaseSlotUnmeasured()
+    else:
+        controller.releaseSlot(os.path.getsize(result['path']), time.monotonic() - start)
+    return result
+
+
+@profiled('download')
+def fetchCoverage(urlGetCoverage: str, covId: str, feedback=None) -> dict:
+    """
+    Downloads a coverage, returns None if the service responds with another xml document.
+    The response is kept in memory during the transfer while it fits into the memory budget,
+    the result is always a file, as it is used as layer source.
+    Raises:
+        OwsException, if the service responds with an exception report
+        RequestCanceledException
+    """
+    logInfoMessage('Requested URL: ' + urlGetCoverage)
+    buffer = downloadToBuffer(urlGetCoverage, feedback)
+    if buffer.size == 0:
+        discardBuffer(buffer)
+        return None
+
+    if buffer.peek(XML_DETECTION_BYTES).lstrip().startswith(b'<'):
+        try:
+            root = parseXmlBuffer(buffer)
+        except ET.ParseError:
+            pass
+        else:
+            discardBuffer(buffer)
+            if 'ExceptionReport' in root.tag:
+                raise readOwsException(root)
+            return None
+
+    path = buffer.toFile()
+    buffer.release()
+    result = {'path': path, 'coverage': covId}
+    if 'GEOTIFF%3ACOMPRESSION' in urlGetCoverage.upper():
+        savings = getEncodingSavings(path)
+        if savings:
+            logInfoMessage(f'{covId}: {formatEncodingSavings(*savings)}')
+            # file size and uncompressed size of the response as received, see getEncodingSavings
+            result['encodingSavings'] = savings
+    return result
@@ -0,0 +1,166 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+from typing import Callable, Optional, Tuple
+
+from qgis.PyQt.QtCore import QObject, QSettings, QTimer
+from qgis.core import QgsApplication, QgsRectangle, QgsTask
+from qgis.utils import iface
+
+from .coverage_cache import getCoverageCache
+from .helpers import isTaskCanceled, logInfoMessage, logWarnMessage
+from .network import findCachedUrls, getCoverage
+from .rate_limiter import backgroundRequests
+from .request_coordinator import requestCoordinator
+
+
+SETTINGS_PREFETCH_ENABLED = 'plugins/simplewcs2/prefetch_enabled'
+SETTINGS_PREFETCH_BUDGET_MB = 'plugins/simplewcs2/prefetch_budget_mb'
+DEFAULT_PREFETCH_BUDGET_MB = 200
+
+# The canvas must rest this long before the neighbouring extent is requested
+PREFETCH_IDLE_MS = 1000
+# Below the priority of interactive tasks (0), so that they are started first
+PREFETCH_TASK_PRIORITY = -10
+# Pans shorter than this fraction of the extent do not define a direction of travel
+MIN_PAN_FRACTION = 0.05
+# Extents whose size changed more than this fraction are zooms, not pans
+MAX_ZOOM_FRACTION = 0.05
+
+
+def getTravelDirection(previousExtent: QgsRectangle, currentExtent: QgsRectangle) -> Optional[Tuple[int, int]]:
+    """
+    Returns the direction of a pan between two extents as steps (-1, 0 or 1) in x and y,
+    None if the extents do not differ by a pan.
+    """
+    if previousExtent.isEmpty() or currentExtent.isEmpty():
+        return None
+    if (abs(currentExtent.width() / previousExtent.width() - 1) > MAX_ZOOM_FRACTION
+            or abs(currentExtent.height() / previousExtent.height() - 1) > MAX_ZOOM_FRACTION):
+        return None
+
+    dx = (currentExtent.center().x() - previousExtent.center().x()) / currentExtent.width()
+    dy = (currentExtent.center().y() - previousExtent.center().y()) / currentExtent.height()
+    largestStep = max(abs(dx), abs(dy))
+    if largestStep < MIN_PAN_FRACTION:
+        return None
+
+    # Mainly horizontal or vertical pans only continue along their main axis
+    stepX = (1 if dx > 0 else -1) if abs(dx) >= largestStep / 2 else 0
+    stepY = (1 if dy > 0 else -1) if abs(dy) >= largestStep / 2 else 0
+    return stepX, stepY
+
+
+def prefetchCoverage(task, url: str, covId: str) -> dict:
+    """Task function of a prefetch, its requests count as background work for the rate limiter."""
+    with backgroundRequests():
+        return getCoverage(task, url, covId, prefetch=True)
+
+
+class CoveragePrefetcher(QObject):
+    """
+    Optional prefetcher of the neighbouring extent in the direction of travel of the map canvas.
+
+    When the canvas rests after a pan and no other request is in flight, the GetCoverage request
+    for the adjacent extent is sent in a low priority task, its response is stored in the coverage cache.
+    Unused prefetched responses must not exceed the byte budget.
+    A running prefetch is cancelled as soon as the user starts an interactive request.
+    """
+
+    def __init__(self, buildRequest: Callable[[QgsRectangle], Optional[Tuple[str, str]]], parent: QObject = None) -> None:
+        """buildRequest returns the GetCoverage url and coverage id for an extent (in map crs), or None."""
+        super().__init__(parent)
+        self.buildRequest = buildRequest
+        self.enabled = False
+        self.previousExtent: Optional[QgsRectangle] = None
+        self.task: Optional[QgsTask] = None
+
+        self.byteBudget = QSettings().value(SETTINGS_PREFETCH_BUDGET_MB, DEFAULT_PREFETCH_BUDGET_MB, type=int) * 1024 * 1024
+
+        self.idleTimer = QTimer(self)
+        self.idleTimer.setSingleShot(True)
+        self.idleTimer.setInterval(PREFETCH_IDLE_MS)
+        self.idleTimer.timeout.connect(self.prefetchInTravelDirection)
+
+        iface.mapCanvas().extentsChanged.connect(self.onExtentChanged)
+
+    def setEnabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.previousExtent = QgsRectangle(iface.mapCanvas().extent()) if enabled else None
+        if not enabled:
+            self.idleTimer.stop()
+            self.cancel()
+
+    def onExtentChanged(self) -> None:
+        if self.enabled:
+            self.idleTimer.start()
+
+    def isRunning(self) -> bool:
+        try:
+            return self.task is not None and self.task.status() in (QgsTask.TaskStatus.Queued,
+                                                                    QgsTask.TaskStatus.OnHold,
+                                                                    QgsTask.TaskStatus.Running)
+        except RuntimeError:
+            # the task manager deleted the finished task
+            return False
+
+    def cancel(self) -> None:
+        """Cancels a running prefetch, e.g. because the user starts an interactive request."""
+        if self.isRunning():
+            self.task.cancel()
+        self.task = None
+
+    def prefetchInTravelDirection(self) -> None:
+        currentExtent = QgsRectangle(iface.mapCanvas().extent())
+        previousExtent = self.previousExtent
+        self.previousExtent = currentExtent
+        if not self.enabled or previousExtent is None:
+            return
+
+        direction = getTravelDirection(previousExtent, currentExtent)
+        if direction is None:
+            return
+
+        if self.isRunning() or requestCoordinator.hasInFlightRequests():
+            # The network is busy, only the next resting canvas will be prefetched
+            return
+
+        coverageCache = getCoverageCache()
+        if coverageCache.unusedPrefetchedBytes() >= self.byteBudget:
+            logInfoMessage('Prefetch budget is used up by prefetched coverages that were not requested yet')
+            return
+
+        stepX, stepY = direction
+        neighbourExtent = QgsRectangle(currentExtent)
+        neighbourExtent.setXMinimum(currentExtent.xMinimum() + stepX * currentExtent.width())
+        neighbourExtent.setXMaximum(currentExtent.xMaximum() + stepX * currentExtent.width())
+        neighbourExtent.setYMinimum(currentExtent.yMinimum() + stepY * currentExtent.height())
+        neighbourExtent.setYMaximum(currentExtent.yMaximum() + stepY * currentExtent.height())
+
+        request = self.buildRequest(neighbourExtent)
+        if request is None:
+            return
+        url, covId = request
+        cachedUrls, partial = findCachedUrls(coverageCache, url, covId)
+        if cachedUrls and not partial:
+            return
+
+        logInfoMessage('Prefetching neighbouring extent: ' + url)
+        self.task = QgsTask.fromFunction('Simple WCS 2: Prefetch',
+                                         prefetchCoverage,
+                                         url,
+                                         covId,
+                                         on_finished=self.onPrefetchFinished,
+                                         flags=QgsTask.Flag.CanCancel | QgsTask.Flag.Silent)
+        QgsApplication.taskManager().addTask(self.task, PREFETCH_TASK_PRIORITY)
+
+    def onPrefetchFinished(self, exception, result=None) -> None:
+        if exception and not isTaskCanceled(exception):
+            logWarnMessage(f'Prefetch failed: {exception}')
@@ -0,0 +1,141 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import cProfile
+import functools
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from qgis.PyQt.QtCore import QSettings
+
+from .helpers import getPluginDataDir, logInfoMessage, logWarnMessage
+
+
+# Developer setting, the environment variable enables profiling as well (e.g. SIMPLEWCS2_PROFILING=1)
+SETTINGS_PROFILING = 'plugins/simplewcs2/profiling'
+PROFILING_ENVIRONMENT_VARIABLE = 'SIMPLEWCS2_PROFILING'
+# Directory of the profile and memory snapshot files, default: profiles in the plugin data directory
+SETTINGS_PROFILING_DIR = 'plugins/simplewcs2/profiling_dir'
+PROFILES_DIRNAME = 'profiles'
+
+# Number of frames stored per allocation in the memory snapshots
+TRACEMALLOC_FRAMES = 10
+
+# Only one cProfile profiler can be active at a time, operations running meanwhile are traced for memory only
+_cpuProfilerLock = threading.Lock()
+_tracingLock = threading.Lock()
+_tracingOperations = 0
+# tracemalloc is only stopped if this module started it (e.g. not if python runs with -X tracemalloc)
+_tracingStarted = False
+_context = threading.local()
+
+
+def isProfilingEnabled() -> bool:
+    if os.environ.get(PROFILING_ENVIRONMENT_VARIABLE, '').lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    return QSettings().value(SETTINGS_PROFILING, False, type=bool)
+
+
+def getProfilesDir() -> str:
+    profilesDir = QSettings().value(SETTINGS_PROFILING_DIR, '', type=str) or os.path.join(getPluginDataDir(),
+                                                                                          PROFILES_DIRNAME)
+    os.makedirs(profilesDir, exist_ok=True)
+    return profilesDir
+
+
+def startTracing() -> None:
+    global _tracingOperations, _tracingStarted
+    with _tracingLock:
+        if _tracingOperations == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracingStarted = True
+        _tracingOperations += 1
+
+
+def stopTracing() -> None:
+    global _tracingOperations, _tracingStarted
+    with _tracingLock:
+        _tracingOperations -= 1
+        if _tracingOperations == 0 and _tracingStarted:
+            tracemalloc.stop()
+            _tracingStarted = False
+
+
+@contextmanager
+def profiledOperation(name: str):
+    """
+    Profiles an operation with cProfile and tracemalloc if profiling is enabled, otherwise does nothing.
+    Writes <time>_<thread>_<name>.prof (cProfile stats, e.g. for snakeviz) and <time>_<thread>_<name>.tracemalloc
+    (memory snapshot at the end of the operation) and logs duration and memory use.
+    Operations nested in a profiled operation of the same thread are part of its profile.
+    """
+    if getattr(_context, 'active', False) or not isProfilingEnabled():
+        yield
+        return
+
+    _context.active = True
+    profiler = cProfile.Profile() if _cpuProfilerLock.acquire(blocking=False) else None
+    startTracing()
+    startMemory, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiling tool (e.g. a debugger) is active
+            _cpuProfilerLock.release()
+            profiler = None
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _cpuProfilerLock.release()
+        seconds = time.perf_counter() - start
+        endMemory, peakMemory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        stopTracing()
+        _context.active = False
+        writeProfile(name, profiler, snapshot, seconds, endMemory - startMemory, peakMemory)
+
+
+def writeProfile(name: str,
+                 profiler,
+                 snapshot: tracemalloc.Snapshot,
+                 seconds: float,
+                 memoryDelta: int,
+                 peakMemory: int) -> None:
+    now = time.time()
+    timestamp = f'{time.strftime("%Y%m%d-%H%M%S", time.localtime(now))}.{int(now * 1000) % 1000:03d}'
+    basePath = os.path.join(getProfilesDir(), f'{timestamp}_{threading.get_ident()}_{name}')
+    try:
+        if profiler is not None:
+            profiler.dump_stats(f'{basePath}.prof')
+        snapshot.dump(f'{basePath}.tracemalloc')
+    except OSError as e:
+        logWarnMessage(f'Profile of {name} could not be written: {e}')
+        return
+    logInfoMessage(f'Profile of {name}: {seconds:.3f} s, memory {memoryDelta / 1024 / 1024:+.1f} MB '
+                   f'(peak of all traced operations {peakMemory / 1024 / 1024:.1f} MB)'
+                   f'{"" if profiler is not None else ", no cpu profile (another operation was profiled)"}: {basePath}')
+
+
+def profiled(name: str):
+    """Decorator profiling every call of a function as operation name (see profiledOperation)."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with profiledOperation(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
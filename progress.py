@@ -0,0 +1,127 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+# Interval of the progress display, independent of how often transfers report bytes
+PROGRESS_UPDATE_INTERVAL_MS = 250
+# Throughput is averaged over the bytes received within this time
+THROUGHPUT_WINDOW_SECONDS = 5
+
+
+@dataclass
+class ProgressSnapshot:
+    # share of the task done (0 to 1), None if it is unknown (no Content-Length)
+    fraction: Optional[float]
+    receivedBytes: int
+    bytesPerSecond: float
+    etaSeconds: Optional[float]
+
+    def format(self) -> str:
+        text = f'{self.receivedBytes / 1024 / 1024:.1f} MB, {self.bytesPerSecond / 1024 / 1024:.1f} MB/s'
+        if self.etaSeconds is not None:
+            minutes, seconds = divmod(int(self.etaSeconds + 0.5), 60)
+            text += f', {minutes}:{seconds:02d} left'
+        return text
+
+
+@dataclass
+class TransferState:
+    received: int = 0
+    # Content-Length of the response, 0 if it is unknown
+    total: int = 0
+    finished: bool = False
+
+
+class TransferProgress:
+    """
+    Progress of a get coverage task: bytes received against Content-Length of its transfers,
+    or finished requests against the planned requests (tiles, slices) of tiled jobs.
+    Transfers report from their threads, the dialog reads snapshots at a fixed rate,
+    so fast downloads do not flood the main thread with progress signals.
+    """
+
+    def __init__(self) -> None:
+        self.plannedRequests = 1
+        self.finishedRequests = 0
+        self.receivedBytes = 0
+        self.start = time.monotonic()
+        self.transfers: Dict[int, TransferState] = {}
+        self._samples = deque()
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def setPlannedRequests(self, count: int) -> None:
+        with self._lock:
+            self.plannedRequests = max(1, count)
+            self.finishedRequests = 0
+
+    def finishRequest(self) -> None:
+        with self._lock:
+            self.finishedRequests += 1
+
+    def startTransfer(self) -> int:
+        with self._lock:
+            token = next(self._tokens)
+            self.transfers[token] = TransferState()
+            return token
+
+    def updateTransfer(self, token: int, received: int, total: int) -> None:
+        """Reports the bytes received by a transfer so far, total is the Content-Length (-1 or 0 if unknown)."""
+        now = time.monotonic()
+        with self._lock:
+            state = self.transfers[token]
+            self.receivedBytes += max(received - state.received, 0)
+            state.received = received
+            state.total = max(total, 0)
+            self._samples.append((now, self.receivedBytes))
+            while len(self._samples) > 2 and self._samples[0][0] < now - THROUGHPUT_WINDOW_SECONDS:
+                self._samples.popleft()
+
+    def finishTransfer(self, token: int) -> None:
+        with self._lock:
+            self.transfers[token].finished = True
+
+    def snapshot(self) -> ProgressSnapshot:
+        now = time.monotonic()
+        with self._lock:
+            bytesPerSecond = 0.0
+            if len(self._samples) > 1 and now - self._samples[-1][0] < THROUGHPUT_WINDOW_SECONDS:
+                (firstTime, firstBytes), (lastTime, lastBytes) = self._samples[0], self._samples[-1]
+                if lastTime > firstTime:
+                    bytesPerSecond = (lastBytes - firstBytes) / (lastTime - firstTime)
+
+            knownTransfers: List[TransferState] = [state for state in self.transfers.values() if state.total > 0]
+            fraction = None
+            etaSeconds = None
+            if self.plannedRequests > 1:
+                running = sum(min(state.received / state.total, 1.0) for state in knownTransfers if not state.finished)
+                fraction = min((self.finishedRequests + running) / self.plannedRequests, 1.0)
+                if fraction > 0:
+                    elapsed = now - self.start
+                    etaSeconds = elapsed * (1 - fraction) / fraction
+            elif knownTransfers:
+                totalBytes = sum(state.total for state in knownTransfers)
+                receivedBytes = sum(min(state.received, state.total) for state in knownTransfers)
+                fraction = receivedBytes / totalBytes
+                if bytesPerSecond > 0:
+                    etaSeconds = (totalBytes - receivedBytes) / bytesPerSecond
+            return ProgressSnapshot(fraction, self.receivedBytes, bytesPerSecond, etaSeconds)
+
+
+def getTransferProgress(feedback) -> Optional[TransferProgress]:
+    """Returns the progress of the task (set as attribute transferProgress by the dialog), None for other callers."""
+    return getattr(feedback, 'transferProgress', None)
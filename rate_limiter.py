@@ -0,0 +1,135 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from qgis.PyQt.QtCore import QSettings
+
+
+# Limits apply to all hosts, unless a host has its own limits in the group SETTINGS_RATE_LIMITS/<host>/
+# (e.g. plugins/simplewcs2/rate_limits/isk.geobasis-bb.de/requests_per_second). 0 means unlimited.
+SETTINGS_RATE_LIMITS = 'plugins/simplewcs2/rate_limits'
+REQUESTS_PER_SECOND_KEY = 'requests_per_second'
+KBYTES_PER_SECOND_KEY = 'kbytes_per_second'
+# Bandwidth of all background requests (prefetch, catalog) together
+SETTINGS_BACKGROUND_KBYTES_PER_SECOND = f'{SETTINGS_RATE_LIMITS}/background_kbytes_per_second'
+
+
+class TokenBucket:
+    """
+    Token bucket allowing rate tokens per second with bursts up to capacity.
+
+    Consumption always succeeds and may leave the bucket in debt,
+    the returned delay is the time the caller has to wait before it continues.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float) -> float:
+        """Takes amount tokens and returns the delay in seconds until the bucket is out of debt."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+
+_context = threading.local()
+
+
+@contextmanager
+def backgroundRequests():
+    """Marks the requests of the current thread as background work (limited by the background bandwidth)."""
+    previous = getattr(_context, 'background', False)
+    _context.background = True
+    try:
+        yield
+    finally:
+        _context.background = previous
+
+
+def isBackgroundRequest() -> bool:
+    return getattr(_context, 'background', False)
+
+
+class RateLimiter:
+    """
+    Token bucket scheduler of all requests of the plugin:
+    requests per second and bytes per second per host and a bandwidth cap for all background requests.
+    Limits are read from the settings when a host is used for the first time (see reload).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hostBuckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._backgroundBucket: Optional[TokenBucket] = None
+
+    def reload(self) -> None:
+        """Discards all buckets, changed settings apply to the following requests."""
+        with self._lock:
+            self._hostBuckets = {}
+            self._backgroundBucket = None
+
+    def _getHostBuckets(self, url: str) -> Tuple[TokenBucket, TokenBucket]:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hostBuckets:
+                settings = QSettings()
+
+                def readLimit(key: str) -> float:
+                    default = settings.value(f'{SETTINGS_RATE_LIMITS}/{key}', 0, type=float)
+                    return settings.value(f'{SETTINGS_RATE_LIMITS}/{host}/{key}', default, type=float)
+
+                bytesPerSecond = readLimit(KBYTES_PER_SECOND_KEY) * 1024
+                self._hostBuckets[host] = (TokenBucket(readLimit(REQUESTS_PER_SECOND_KEY)), TokenBucket(bytesPerSecond))
+            return self._hostBuckets[host]
+
+    def _getBackgroundBucket(self) -> TokenBucket:
+        with self._lock:
+            if self._backgroundBucket is None:
+                kbytesPerSecond = QSettings().value(SETTINGS_BACKGROUND_KBYTES_PER_SECOND, 0, type=float)
+                self._backgroundBucket = TokenBucket(kbytesPerSecond * 1024)
+            return self._backgroundBucket
+
+    def getRequestDelay(self, url: str) -> float:
+        """Counts a request to the host of url, returns the seconds to wait before it is sent."""
+        requestBucket, _ = self._getHostBuckets(url)
+        return requestBucket.consume(1)
+
+    def isLimitingBytes(self, url: str) -> bool:
+        _, byteBucket = self._getHostBuckets(url)
+        return byteBucket.rate > 0 or (isBackgroundRequest() and self._getBackgroundBucket().rate > 0)
+
+    def getByteDelay(self, url: str, size: int, background: bool) -> float:
+        """Counts received bytes, returns the seconds to wait before more bytes are read."""
+        _, byteBucket = self._getHostBuckets(url)
+        delay = byteBucket.consume(size)
+        if background:
+            delay = max(delay, self._getBackgroundBucket().consume(size))
+        return delay
+
+
+_rateLimiter = RateLimiter()
+
+
+def getRateLimiter() -> RateLimiter:
+    return _rateLimiter
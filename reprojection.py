@@ -0,0 +1,85 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+from typing import Callable, Optional
+
+from osgeo import gdal
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import QgsProcessingUtils
+
+from .custom_exceptions import RequestCanceledException
+from .helpers import logInfoMessage
+
+
+SETTINGS_LOCAL_REPROJECTION = 'plugins/simplewcs2/local_reprojection'
+# GDAL resampling algorithm of the local reprojection, e.g. near, bilinear, cubic
+SETTINGS_WARP_RESAMPLING = 'plugins/simplewcs2/warp_resampling'
+DEFAULT_WARP_RESAMPLING = 'near'
+
+
+def warpToCrs(sourcePath: str, targetCrsWkt: str, feedback=None) -> str:
+    """
+    Reprojects a raster to the target crs (wkt) with a multithreaded GDAL warp and returns the path of a GeoTIFF.
+    Band descriptions (e.g. positions of stack slices) are kept.
+    Raises:
+        RequestCanceledException
+        RuntimeError, if GDAL could not reproject the raster
+    """
+    def onProgress(complete, message, data):
+        return 0 if feedback is not None and feedback.isCanceled() else 1
+
+    resampling = QSettings().value(SETTINGS_WARP_RESAMPLING, DEFAULT_WARP_RESAMPLING, type=str)
+    targetPath = QgsProcessingUtils.generateTempFilename('wcs_warped.tif')
+    options = gdal.WarpOptions(format='GTiff',
+                               dstSRS=targetCrsWkt,
+                               resampleAlg=resampling,
+                               multithread=True,
+                               warpOptions=['NUM_THREADS=ALL_CPUS'],
+                               creationOptions=['COMPRESS=DEFLATE', 'TILED=YES', 'BIGTIFF=IF_SAFER',
+                                                'NUM_THREADS=ALL_CPUS'],
+                               callback=onProgress)
+    source = gdal.Open(sourcePath)
+    if source is None:
+        raise RuntimeError(f'Coverage could not be reprojected: {gdal.GetLastErrorMsg()}')
+    target = gdal.Warp(targetPath, source, options=options)
+    if feedback is not None and feedback.isCanceled():
+        raise RequestCanceledException('Request canceled')
+    if target is None:
+        raise RuntimeError(f'Coverage could not be reprojected: {gdal.GetLastErrorMsg()}')
+
+    for bandIndex in range(1, source.RasterCount + 1):
+        description = source.GetRasterBand(bandIndex).GetDescription()
+        if description:
+            target.GetRasterBand(bandIndex).SetDescription(description)
+    target = None
+    source = None
+    return targetPath
+
+
+def getLocallyReprojectedCoverage(task, requestFunction: Callable, targetCrsWkt: str, *args, **kwargs) -> Optional[dict]:
+    """
+    Task function requesting a coverage in its native crs with requestFunction (called with the task, args and kwargs)
+    and reprojecting the result (single file or stack slices) to the target crs (wkt) locally.
+    Raises:
+        RequestCanceledException
+        RuntimeError
+    """
+    result = requestFunction(task, *args, **kwargs)
+    if not result:
+        return result
+
+    # the savings of the encoding requested from the service do not apply to the reprojected file
+    result.pop('encodingSavings', None)
+    if 'path' in result:
+        result['path'] = warpToCrs(result['path'], targetCrsWkt, task)
+    if 'slices' in result:
+        result['slices'] = [(position, warpToCrs(path, targetCrsWkt, task)) for position, path in result['slices']]
+    logInfoMessage(f"Reprojected {result['coverage']} locally")
+    return result
@@ -0,0 +1,131 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, Optional
+
+from .custom_exceptions import RequestCanceledException
+
+
+# Interval in seconds in which waiting callers check whether they were canceled
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def normalizeRequestUrl(url: str) -> str:
+    """
+    Returns a canonical form of a KVP request url, so that identical requests
+    can be recognized although parameters are ordered or cased differently:
+    - scheme and host are lowercased
+    - parameter names are uppercased (KVP parameter names are case insensitive in OGC services)
+    - parameters are sorted by name, repeated parameters (e.g. SUBSET) keep their values sorted too
+    """
+    splitUrl = urllib.parse.urlsplit(url.strip())
+    params = urllib.parse.parse_qsl(splitUrl.query, keep_blank_values=True)
+    normalizedParams = sorted((key.upper(), value) for key, value in params)
+    query = urllib.parse.urlencode(normalizedParams)
+
+    return urllib.parse.urlunsplit((splitUrl.scheme.lower(),
+                                    splitUrl.netloc.lower(),
+                                    splitUrl.path,
+                                    query,
+                                    ''))
+
+
+class _InFlightRequest:
+    """Result holder of a request that is currently being transferred."""
+
+    def __init__(self) -> None:
+        self.ownerThread = threading.get_ident()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class RequestCoordinator:
+    """
+    Single-flight coordinator for network requests.
+
+    Identical requests (after normalization of the url) that are issued while the first one
+    is still in flight do not start another transfer: they wait for the running one
+    and receive the same result (or the same exception).
+    A transfer canceled by its owner is not shared: waiting callers start their own transfer.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inFlight: Dict[str, _InFlightRequest] = {}
+
+    def isInFlight(self, url: str) -> bool:
+        """Returns True, if an identical request is currently being transferred."""
+        with self._lock:
+            return normalizeRequestUrl(url) in self._inFlight
+
+    def hasInFlightRequests(self) -> bool:
+        """Returns True, if any request is currently being transferred."""
+        with self._lock:
+            return bool(self._inFlight)
+
+    def fetch(self, url: str, fetchFunction: Callable[[str], Any], feedback=None) -> Any:
+        """
+        Calls fetchFunction(url) unless an identical request is already in flight,
+        in which case the result of the running request is returned.
+
+        A re-entrant call from the thread that owns the running request
+        (e.g. from a nested event loop of a blocking request in the main thread)
+        cannot wait for itself and therefore runs its own transfer.
+        feedback (QgsFeedback or QgsTask) lets a waiting caller stop waiting when it is canceled.
+        Raises:
+            RequestCanceledException
+        """
+        key = normalizeRequestUrl(url)
+
+        while True:
+            with self._lock:
+                inFlightRequest = self._inFlight.get(key)
+                if inFlightRequest is not None and inFlightRequest.ownerThread != threading.get_ident():
+                    inFlightRequest.waiters += 1
+                    isOwner = False
+                else:
+                    inFlightRequest = _InFlightRequest()
+                    self._inFlight.setdefault(key, inFlightRequest)
+                    isOwner = True
+
+            if isOwner:
+                break
+
+            while not inFlightRequest.done.wait(CANCEL_POLL_INTERVAL):
+                if feedback is not None and feedback.isCanceled():
+                    with self._lock:
+                        inFlightRequest.waiters -= 1
+                    raise RequestCanceledException('Request canceled')
+            if isinstance(inFlightRequest.exception, RequestCanceledException):
+                # The owner gave up, this caller still wants the response
+                continue
+            if inFlightRequest.exception is not None:
+                raise inFlightRequest.exception
+            return inFlightRequest.result
+
+        try:
+            inFlightRequest.result = fetchFunction(url)
+            return inFlightRequest.result
+        except BaseException as e:
+            inFlightRequest.exception = e
+            raise
+        finally:
+            with self._lock:
+                if self._inFlight.get(key) is inFlightRequest:
+                    del self._inFlight[key]
+            inFlightRequest.done.set()
+
+
+# Shared by the dialog, its background tasks and scripts using the plugin's request functions
+requestCoordinator = RequestCoordinator()
@@ -0,0 +1,206 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import json
+import math
+import os
+import shutil
+import urllib.parse
+import zipfile
+from typing import List, Optional
+
+from qgis.core import QgsGeometry, QgsProcessingUtils, QgsRectangle
+
+from .adaptive_concurrency import AdaptiveController
+from .coverage_cache import getCacheKey, getCoverageCache, getDocumentCache
+from .custom_exceptions import RequestCanceledException
+from .helpers import logInfoMessage, logWarnMessage
+from .network import findCachedUrls, getCoverages, removeCoverageFiles
+from .rate_limiter import backgroundRequests
+
+
+# Seeding jobs with more requests are refused, a larger tile size must be chosen
+MAX_SEED_REQUESTS = 5000
+MAX_SEED_GRID_CELLS = 100 * MAX_SEED_REQUESTS
+# A cache filled beyond this share of its size limit has probably evicted seeded responses
+CACHE_FULL_RATIO = 0.9
+
+BUNDLE_MANIFEST_FILENAME = 'manifest.json'
+BUNDLE_FORMAT_VERSION = 1
+
+
+def buildSeedTiles(area: QgsGeometry, tileSize: float) -> List[QgsRectangle]:
+    """
+    Returns the tiles of a grid with cells of tileSize (map units) intersecting the area.
+    The grid is aligned to multiples of tileSize, so that repeated or overlapping seeds request identical tiles.
+    Raises:
+        ValueError, if the bounding box of the area has too many grid cells
+    """
+    boundingBox = area.boundingBox()
+    firstColumn = math.floor(boundingBox.xMinimum() / tileSize)
+    lastColumn = max(firstColumn, math.ceil(boundingBox.xMaximum() / tileSize) - 1)
+    firstRow = math.floor(boundingBox.yMinimum() / tileSize)
+    lastRow = max(firstRow, math.ceil(boundingBox.yMaximum() / tileSize) - 1)
+    if (lastColumn - firstColumn + 1) * (lastRow - firstRow + 1) > MAX_SEED_GRID_CELLS:
+        raise ValueError(f'The tile size {tileSize:g} is too small for the area')
+
+    engine = QgsGeometry.createGeometryEngine(area.constGet())
+    engine.prepareGeometry()
+
+    tiles = []
+    for row in range(firstRow, lastRow + 1):
+        for column in range(firstColumn, lastColumn + 1):
+            tile = QgsRectangle(column * tileSize, row * tileSize, (column + 1) * tileSize, (row + 1) * tileSize)
+            if engine.intersects(QgsGeometry.fromRect(tile).constGet()):
+                tiles.append(tile)
+    return tiles
+
+
+def checkSeedRequestCount(requestCount: int) -> None:
+    """
+    Raises:
+        ValueError, if a seeding job has more than MAX_SEED_REQUESTS requests
+    """
+    if requestCount > MAX_SEED_REQUESTS:
+        raise ValueError(f'{requestCount} requests exceed the limit of {MAX_SEED_REQUESTS}, '
+                         'please choose a larger tile size')
+
+
+def setScaleFactor(urlGetCoverage: str, scaleFactor: float) -> str:
+    """Returns the request with a SCALEFACTOR parameter (WCS 2 scaling extension), unchanged for a factor of 1."""
+    if scaleFactor == 1:
+        return urlGetCoverage
+    return f'{urlGetCoverage}&{urllib.parse.urlencode([("SCALEFACTOR", f"{scaleFactor:g}")])}'
+
+
+def parseScaleFactors(text: str) -> List[float]:
+    """
+    Parses a comma separated list of scale factors, e.g. "1, 0.5".
+    Raises:
+        ValueError
+    """
+    scaleFactors = [float(value) for value in text.replace(';', ',').split(',') if value.strip()]
+    if not scaleFactors or any(scaleFactor <= 0 for scaleFactor in scaleFactors):
+        raise ValueError(f'Invalid scale factors: {text}')
+    return sorted(set(scaleFactors), reverse=True)
+
+
+def seedCoverageCache(task,
+                      urls: List[str],
+                      covId: str,
+                      controller: Optional[AdaptiveController] = None) -> dict:
+    """
+    Fills the coverage cache with the responses of the requests, requests covered by cached responses are skipped.
+    The tiles are requested in parallel like polygon subsets as background requests (limited by the background
+    bandwidth), the copies of the responses are removed again.
+    Returns the numbers of requests, of skipped and failed requests and of responses still cached at the end
+    and whether the cache reached its size limit (seeded responses may have been evicted).
+    Raises:
+        RequestCanceledException
+    """
+    coverageCache = getCoverageCache()
+
+    def isCached(url: str) -> bool:
+        # tiles split into quadrants by the service limits are cached as quadrants
+        cachedUrls, partial = findCachedUrls(coverageCache, url, covId)
+        return bool(cachedUrls) and not partial
+
+    missingUrls = [url for url in urls if not isCached(url)]
+    logInfoMessage(f'Seeding {len(missingUrls)} of {len(urls)} requests of {covId}')
+
+    with backgroundRequests():
+        paths = getCoverages(task, missingUrls, covId, controller) if missingUrls else {}
+    for path in paths.values():
+        removeCoverageFiles(path)
+
+    return {'coverage': covId,
+            'requests': len(urls),
+            'skipped': len(urls) - len(missingUrls),
+            'failed': len(missingUrls) - len(paths),
+            'cached': sum(isCached(url) for url in urls),
+            'cacheFull': coverageCache.totalBytes() >= CACHE_FULL_RATIO * coverageCache.maxBytes}
+
+
+def exportCacheBundle(task, bundlePath: str, covId: str) -> dict:
+    """
+    Writes all cached responses of a coverage and the cached capabilities and describe coverage documents
+    of its service into one zip file, which can be imported into the caches of another installation.
+    Raises:
+        OSError
+        RequestCanceledException
+    """
+    entries = getCoverageCache().listEntries(covId)
+    hosts = {urllib.parse.urlsplit(url).netloc.lower() for url, _ in entries}
+    documents = [(url, content) for url, content in getDocumentCache().listDocuments()
+                 if urllib.parse.urlsplit(url).netloc.lower() in hosts]
+
+    manifest = {'version': BUNDLE_FORMAT_VERSION, 'coverages': [], 'documents': []}
+    # Coverages are compressed by their format already
+    with zipfile.ZipFile(bundlePath, 'w', zipfile.ZIP_STORED, allowZip64=True) as bundle:
+        for index, (url, path) in enumerate(entries):
+            if task.isCanceled():
+                raise RequestCanceledException('Export canceled')
+            fileName = f'coverages/{getCacheKey(url)}.bin'
+            try:
+                bundle.write(path, fileName)
+            except OSError as e:
+                # evicted while exporting
+                logWarnMessage(f'Cached coverage could not be exported: {url}: {e}')
+                continue
+            manifest['coverages'].append({'url': url, 'coverage_id': covId, 'file': fileName})
+            task.setProgress(100 * (index + 1) / len(entries))
+        for url, content in documents:
+            fileName = f'documents/{getCacheKey(url)}.xml'
+            bundle.writestr(fileName, content, zipfile.ZIP_DEFLATED)
+            manifest['documents'].append({'url': url, 'file': fileName})
+        bundle.writestr(BUNDLE_MANIFEST_FILENAME, json.dumps(manifest, indent=2))
+
+    logInfoMessage(f'Exported {len(manifest["coverages"])} cached coverages of {covId} to {bundlePath}')
+    return {'path': bundlePath, 'coverages': len(manifest['coverages']), 'documents': len(manifest['documents'])}
+
+
+def importCacheBundle(task, bundlePath: str) -> dict:
+    """
+    Imports the responses and documents of a bundle written by exportCacheBundle into the local caches.
+    Entries of the bundle replace cached responses of the same requests.
+    Raises:
+        ValueError, if the file is not a cache bundle
+        OSError
+        RequestCanceledException
+    """
+    coverageCache = getCoverageCache()
+    documentCache = getDocumentCache()
+    try:
+        with zipfile.ZipFile(bundlePath) as bundle:
+            manifest = json.loads(bundle.read(BUNDLE_MANIFEST_FILENAME))
+            if manifest.get('version') != BUNDLE_FORMAT_VERSION:
+                raise ValueError(f'Unsupported cache bundle version: {manifest.get("version")}')
+
+            for document in manifest['documents']:
+                documentCache.put(document['url'], bundle.read(document['file']))
+
+            coverages = manifest['coverages']
+            for index, entry in enumerate(coverages):
+                if task.isCanceled():
+                    raise RequestCanceledException('Import canceled')
+                temporaryPath = QgsProcessingUtils.generateTempFilename('wcs_bundle')
+                with bundle.open(entry['file']) as source, open(temporaryPath, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                coverageCache.put(entry['url'], entry['coverage_id'], temporaryPath)
+                os.remove(temporaryPath)
+                task.setProgress(100 * (index + 1) / len(coverages))
+    except (zipfile.BadZipFile, KeyError, json.JSONDecodeError) as e:
+        raise ValueError(f'Not a cache bundle: {bundlePath}: {e}')
+
+    logInfoMessage(f'Imported {len(coverages)} coverages from {bundlePath}')
+    return {'path': bundlePath,
+            'coverages': len(coverages),
+            'documents': len(manifest['documents']),
+            'cached': sum(coverageCache.contains(entry['url']) for entry in coverages)}
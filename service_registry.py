@@ -0,0 +1,196 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import json
+import os
+import sqlite3
+from typing import Iterable, List, Optional
+
+from qgis.PyQt.QtCore import QSettings
+
+from .capabilities import ACCEPTED_WCS_VERSIONS
+from .helpers import getPluginDataDir, logWarnMessage
+
+
+REGISTRY_FILENAME = 'saved_services.sqlite'
+LAST_SERVICE_KEY = 'last_service_id'
+
+# Saved services of plugin versions <= 1.0, migrated to the service registry
+SETTINGS_SAVED_SERVICES = 'plugins/simplewcs2/saved_services'
+SETTINGS_LAST_SERVICE = 'plugins/simplewcs2/last_saved_service'
+
+
+def getRegistryPath() -> str:
+    return os.path.join(getPluginDataDir(), REGISTRY_FILENAME)
+
+
+def formatServiceLabel(service: dict) -> str:
+    serviceName = service.get('name', '').strip()
+    if serviceName:
+        return serviceName
+    return f"{service['url']} [{service['version']}]"
+
+
+def normalizeService(service: dict) -> Optional[dict]:
+    """Returns name, url and version of a saved or imported service, None if it is invalid."""
+    if not isinstance(service, dict):
+        return None
+
+    name = str(service.get('name', '')).strip()
+    url = str(service.get('url', '')).strip()
+    version = str(service.get('version', '')).strip()
+
+    if not url or version not in ACCEPTED_WCS_VERSIONS:
+        return None
+
+    return {'name': name, 'url': url, 'version': version}
+
+
+class ServiceRegistry:
+    """
+    Transactional store of the saved services.
+
+    Services are identified by url and version (unique index), so lookups of duplicates
+    do not scan the list. Every change writes only the affected rows.
+    Service dicts have the keys 'id', 'name', 'url' and 'version'.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or getRegistryPath()
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS services (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL DEFAULT '',
+                    url TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    UNIQUE (url, version));
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT);
+                CREATE TABLE IF NOT EXISTS tuning (
+                    service_id INTEGER PRIMARY KEY,
+                    concurrency INTEGER NOT NULL,
+                    tiles_per_side INTEGER NOT NULL);
+                """)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def isEmpty(self) -> bool:
+        return self.connection.execute('SELECT 1 FROM services LIMIT 1').fetchone() is None
+
+    def listServices(self) -> List[dict]:
+        """Returns all services in the order they were saved."""
+        return [dict(row) for row in self.connection.execute('SELECT id, name, url, version FROM services ORDER BY id')]
+
+    def findService(self, url: str, version: str) -> Optional[int]:
+        """Returns the id of the service with this identity, None if it is not saved."""
+        row = self.connection.execute('SELECT id FROM services WHERE url = ? AND version = ?', (url, version)).fetchone()
+        return row['id'] if row else None
+
+    def saveService(self, service: dict, serviceId: Optional[int] = None) -> int:
+        """
+        Stores a service and returns its id:
+        - a service with the same url and version is updated
+        - otherwise the service with serviceId is updated (if given)
+        - otherwise the service is appended
+        """
+        with self.connection:
+            duplicateId = self.findService(service['url'], service['version'])
+            if duplicateId is not None:
+                serviceId = duplicateId
+            if serviceId is None:
+                cursor = self.connection.execute('INSERT INTO services (name, url, version) VALUES (?, ?, ?)',
+                                                 (service['name'], service['url'], service['version']))
+                return cursor.lastrowid
+            self.connection.execute('UPDATE services SET name = ?, url = ?, version = ? WHERE id = ?',
+                                    (service['name'], service['url'], service['version'], serviceId))
+        return serviceId
+
+    def deleteService(self, serviceId: int) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM services WHERE id = ?', (serviceId,))
+            self.connection.execute('DELETE FROM tuning WHERE service_id = ?', (serviceId,))
+            self.connection.execute('DELETE FROM state WHERE key = ? AND value = ?', (LAST_SERVICE_KEY, str(serviceId)))
+
+    def importServices(self, services: Iterable[dict]) -> Optional[int]:
+        """
+        Inserts or updates (identified by url and version) all services in one transaction
+        and returns the id of the last one.
+        """
+        services = list(services)
+        if not services:
+            return None
+        with self.connection:
+            self.connection.executemany("""
+                INSERT INTO services (name, url, version) VALUES (:name, :url, :version)
+                ON CONFLICT (url, version) DO UPDATE SET name = excluded.name""",
+                services)
+        return self.findService(services[-1]['url'], services[-1]['version'])
+
+    def exportServices(self) -> List[dict]:
+        """Returns all services without their ids (format of the export files)."""
+        return [{key: service[key] for key in ('name', 'url', 'version')} for service in self.listServices()]
+
+    def getLastServiceId(self) -> Optional[int]:
+        row = self.connection.execute('SELECT value FROM state WHERE key = ?', (LAST_SERVICE_KEY,)).fetchone()
+        return int(row['value']) if row and row['value'] is not None else None
+
+    def setLastServiceId(self, serviceId: Optional[int]) -> None:
+        with self.connection:
+            if serviceId is None:
+                self.connection.execute('DELETE FROM state WHERE key = ?', (LAST_SERVICE_KEY,))
+            else:
+                self.connection.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)',
+                                        (LAST_SERVICE_KEY, str(serviceId)))
+
+    def getTuning(self, serviceId: int) -> Optional[dict]:
+        """Returns the request tuning (keys 'concurrency', 'tiles_per_side') learned for a service, None if there is none."""
+        row = self.connection.execute('SELECT concurrency, tiles_per_side FROM tuning WHERE service_id = ?',
+                                      (serviceId,)).fetchone()
+        return dict(row) if row else None
+
+    def setTuning(self, serviceId: int, concurrency: int, tilesPerSide: int) -> None:
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO tuning (service_id, concurrency, tiles_per_side) VALUES (?, ?, ?)',
+                                    (serviceId, concurrency, tilesPerSide))
+
+
+def migrateServicesFromSettings(registry: ServiceRegistry, settings: QSettings) -> None:
+    """Moves the JSON service list of QSettings (plugin versions <= 1.0) into an empty service registry."""
+    if not registry.isEmpty() or not settings.contains(SETTINGS_SAVED_SERVICES):
+        return
+
+    savedServicesRaw = settings.value(SETTINGS_SAVED_SERVICES, '[]')
+    lastServiceLabel = settings.value(SETTINGS_LAST_SERVICE, '', type=str)
+
+    try:
+        if isinstance(savedServicesRaw, str):
+            parsedServices = json.loads(savedServicesRaw)
+        else:
+            parsedServices = savedServicesRaw
+    except (TypeError, json.JSONDecodeError):
+        logWarnMessage('Could not load saved WCS services from settings')
+        parsedServices = []
+
+    if isinstance(parsedServices, list):
+        normalizedServices = [normalizedService for normalizedService in map(normalizeService, parsedServices)
+                              if normalizedService]
+        registry.importServices(normalizedServices)
+        lastService = next((service for service in normalizedServices
+                            if formatServiceLabel(service) == lastServiceLabel), None)
+        if lastService:
+            registry.setLastServiceId(registry.findService(lastService['url'], lastService['version']))
+
+    settings.remove(SETTINGS_SAVED_SERVICES)
+    settings.remove(SETTINGS_LAST_SERVICE)
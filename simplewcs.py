@@ -11,7 +11,8 @@
 """
 
 import os.path
-from typing import Optional
+import time
+from typing import Optional, TYPE_CHECKING
 
 from qgis.PyQt.QtCore import (QCoreApplication,
                               QSettings,
@@ -22,8 +23,10 @@ from qgis.PyQt.QtGui import (QAction,
 from qgis.gui import QgisInterface
 from qgis.utils import iface
 
+from .helpers import logInfoMessage
 
-from .simplewcs_dialog import SimpleWCSDialog
+if TYPE_CHECKING:
+    from .simplewcs_dialog import SimpleWCSDialog
 
 
 class SimpleWCS:
@@ -44,7 +47,7 @@ class SimpleWCS:
             self.translator.load(locale_path)
             QCoreApplication.installTranslator(self.translator)
 
-        self.dlg: Optional[SimpleWCSDialog] = None
+        self.dlg: Optional['SimpleWCSDialog'] = None
 
     def tr(self, message) -> str:
         """ Returns a translated string. """
@@ -70,8 +73,17 @@ class SimpleWCS:
             self.dlg.closeGui()
 
     def startWcsPlugin(self) -> None:
-        """ Creates and shows plugin dialog. """
+        """
+        Creates and shows plugin dialog.
+
+        The dialog module (and the compilation of its .ui file) is imported on the first click,
+        so that QGIS startup only pays for the toolbar action.
+        """
 
         if not self.dlg:
+            startTime = time.perf_counter()
+            from .simplewcs_dialog import SimpleWCSDialog
             self.dlg = SimpleWCSDialog()
+            logInfoMessage(f'Dialog created in {(time.perf_counter() - startTime) * 1000:.0f} ms '
+                           '(deferred from QGIS startup to the first use of the plugin)')
         self.dlg.show()
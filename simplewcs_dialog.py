@@ -8,56 +8,114 @@
 """
 import os
 import json
+import sqlite3
 import urllib
 import xml.etree.ElementTree as ET # nosec
-from typing import List, Optional, Tuple
-from urllib.error import HTTPError, URLError
+from typing import Callable, Dict, List, Optional, Tuple
 
 from qgis.PyQt.QtCore import (Qt,
+                              QDateTime,
                               QSettings,
-                              QUrl,)
+                              QTimer,)
 from qgis.PyQt.QtGui import (QAction,
                              QKeySequence,)
 from qgis.PyQt.QtWidgets import QShortcut
 
 from qgis.core import (QgsApplication,
                        QgsCoordinateReferenceSystem,
-                       QgsCoordinateTransform,
+                       QgsCsException,
+                       QgsDateTimeRange,
+                       QgsFeedback,
                        QgsGeometry,
-                       QgsNetworkAccessManager,
-                       QgsPoint,
                        QgsProject,
-                       QgsProcessingUtils,
                        Qgis,
                        QgsTask,
                        QgsRasterLayer,
+                       QgsRasterLayerTemporalProperties,
                        QgsRectangle,
-                       QgsRasterLayer,)
+                       QgsRasterLayer,
+                       QgsVectorLayer,)
 from qgis.gui import QgsMessageBar
 from qgis.utils import iface
 
 from qgis.PyQt import uic
-from qgis.PyQt.QtNetwork import QNetworkRequest
 from qgis.PyQt.QtWidgets import (QDialog,
                                  QFileDialog,
+                                 QLabel,
+                                 QListWidgetItem,
                                  QProgressBar,)
 
-from .capabilities import Capabilities
-from .coverage import DescribeCoverage
+from .adaptive_concurrency import INITIAL_CONCURRENCY, AdaptiveController, ServiceTuning, getAdaptiveController
+from .capabilities import ACCEPTED_WCS_VERSIONS, Capabilities, compareCoverageSummaries
+from .catalog import CatalogEntry, CatalogHarvestTask, CoverageCatalog, getCatalogPath
+from .coverage import AxisInformation, DescribeCoverage, getRangeSubsetParams
+from .coverage_cache import getOfflineFootprint
 from .bounding_box import BoundingBox
 from .draw_polygon import DrawPolygon
-from .crs_utils import crsAsOgcUri, getAxisLabels, switchCrsUriToOpenGis
-from .helpers import openLog, logWarnMessage, logInfoMessage
-from .custom_exceptions import CapabilitiesException, DescribeCoverageException
+from .crs_utils import (buildSubsets,
+                        getCoordinateTransform,
+                        getCrsFromUri,
+                        invalidateTransformCache,
+                        switchCrsUriToOpenGis)
+from .geotiff_encoding import (COMPRESSION_AUTOMATIC,
+                               COMPRESSIONS,
+                               PREDICTORS,
+                               SETTINGS_GEOTIFF_COMPRESSION,
+                               SETTINGS_GEOTIFF_PREDICTOR,
+                               SETTINGS_GEOTIFF_TILING,
+                               formatEncodingSavings,
+                               getEncodingParams,
+                               supportsGeoTiffExtension)
+from .helpers import isTaskCanceled, openLog, logWarnMessage, logInfoMessage
+from .custom_exceptions import (CapabilitiesException,
+                                DescribeCoverageException,
+                                OfflineException,
+                                OwsException,
+                                RequestCanceledException)
+from .memory_budget import getMemoryBudget
+from .prefetch import CoveragePrefetcher, SETTINGS_PREFETCH_ENABLED
+from .profiling import profiled, profiledOperation
+from .progress import PROGRESS_UPDATE_INTERVAL_MS, TransferProgress
+from .seeding import (buildSeedTiles,
+                      checkSeedRequestCount,
+                      exportCacheBundle,
+                      importCacheBundle,
+                      parseScaleFactors,
+                      seedCoverageCache,
+                      setScaleFactor)
+from .reprojection import SETTINGS_LOCAL_REPROJECTION, getLocallyReprojectedCoverage
+from .service_registry import ServiceRegistry, formatServiceLabel, migrateServicesFromSettings, normalizeService
+from .tiling import (DEFAULT_POLYGON_TILES_PER_SIDE,
+                     SETTINGS_POLYGON_TILES_PER_SIDE,
+                     buildPolygonTiles,
+                     getPolygonCoverage)
+from .stack import (STACK_MODE_LAYERS,
+                    STACK_MODE_SINGLE,
+                    STACK_MODE_VRT,
+                    StackSlice,
+                    buildSliceSubset,
+                    getCoverageStack,
+                    selectAxisPositions)
+from .network import (OWS_EXCEPTION_SIZE_LIMIT,
+                      buildCapabilitiesRequest,
+                      buildDescribeCoverageRequest,
+                      checkUrlSyntax,
+                      getCoverageWithSplit,
+                      isOfflineMode,
+                      requestCapabilities,
+                      requestDescribeCoverage,
+                      setOfflineMode)
 
 
 # GENERATED_CLASS contains the setupUi method and sets up all elements defined in the .ui file
 # BASE is the used base widget (here QDialog)
 GENERATED_CLASS, BASE = uic.loadUiType(os.path.join(os.path.dirname(__file__), 'simplewcs_dialog_base.ui'))
 
-wcs_ns = '{http://www.opengis.net/wcs/2.0}'
-SETTINGS_SAVED_SERVICES = 'plugins/simplewcs2/saved_services'
-SETTINGS_LAST_SERVICE = 'plugins/simplewcs2/last_saved_service'
+# Canvas and project signals arriving within this interval are applied to the dialog at once
+UPDATE_DEBOUNCE_MS = 150
+
+# Segments per quarter circle of the buffer around the area of a cache seed
+SEED_BUFFER_SEGMENTS = 8
 
 
 class SimpleWCSDialog(BASE, GENERATED_CLASS):
@@ -75,6 +133,9 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.requestYMinPolygon: Optional[float] = None
         self.requestXMaxPolygon: Optional[float] = None
         self.requestYMaxPolygon: Optional[float] = None
+        # Drawn polygon (map crs), tiles outside of it are not requested and the result is clipped to it
+        self.subsetPolygon: Optional[QgsGeometry] = None
+        self.subsetPolygonCrs: Optional[QgsCoordinateReferenceSystem] = None
 
         # Subset coordinates (canvas mode)
         self.requestXMinCanvas: Optional[float] = None
@@ -83,18 +144,55 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.requestYMaxCanvas: Optional[float] = None
 
         self.coverageBoundingBox: Optional[BoundingBox] = None
+        # Outline of the cached areas of the coverage in offline mode
+        self.offlineAreaBoundingBox: Optional[BoundingBox] = None
         self.subsetBoundingBox: Optional[BoundingBox] = None
 
         self.capabilities: Optional[Capabilities] = None
         self.describeCov: Optional[DescribeCoverage] = None
+        # url and version of the service shown in the "Get Coverage" tab
+        self.loadedServiceKey: Optional[Tuple[str, str]] = None
+
+        # Service and controller of the running tiled or stacked request, its tuning is saved when it finishes
+        self.tunedService: Optional[Tuple[Tuple[str, str], AdaptiveController]] = None
+
+        # Running cache seed and bundle export or import
+        self.seedTask: Optional[QgsTask] = None
+        self.bundleTask: Optional[QgsTask] = None
+
+        self.catalog: Optional[CoverageCatalog] = None
+        self.harvestTask: Optional[CatalogHarvestTask] = None
 
         self.sketchingToolAction: Optional[QAction] = None
 
+        # Cancels the capabilities and describe coverage requests of a running refresh (ESC key)
+        self.requestFeedback: Optional[QgsFeedback] = None
+        # The requests of a load run an event loop, so that user input must not start a second load meanwhile
+        self.serviceLoading = False
+
         self.mapCrs: str = self.getMapCrs()
 
-        self.acceptedWcsVersions = ['2.1.0', '2.0.1', '2.0.0']
+        self.acceptedWcsVersions = ACCEPTED_WCS_VERSIONS
         self.settings = QSettings()
+        self.serviceRegistry: Optional[ServiceRegistry] = None
         self.savedServices: List[dict] = []
+        self.savedServiceIndexById: Dict[int, int] = {}
+
+        # Dirty flags for updates triggered by canvas and project signals,
+        # they are applied debounced and only while the dialog is visible
+        self.canvasExtentDirty: bool = True
+        self.projectCrsDirty: bool = False
+        self.pendingUpdateTimer = QTimer(self)
+        self.pendingUpdateTimer.setSingleShot(True)
+        self.pendingUpdateTimer.setInterval(UPDATE_DEBOUNCE_MS)
+
+        # Progress of the get coverage task, shown at a fixed rate
+        self.transferProgress: Optional[TransferProgress] = None
+        self.progressTimer = QTimer(self)
+        self.progressTimer.setInterval(PROGRESS_UPDATE_INTERVAL_MS)
+        self.progressTimer.timeout.connect(self.updateCovProgressBar)
+
+        self.prefetcher = CoveragePrefetcher(self.buildPrefetchRequest, parent=self)
 
         self.setupUi(self)
 
@@ -104,11 +202,15 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
 
     def showEvent(self, event) -> None:
         """
-        Adjusts the "Get Coverage" tab (crs dropdown, etc.)
-        and the extent bounding box to the current coverage (if set),
-        when the gui is shown.
+        Applies updates collected while the dialog was hidden and adjusts
+        the "Get Coverage" tab (crs dropdown, etc.) and the extent bounding box
+        to the current coverage (if set), when the gui is shown.
         """
-        self.adjustCovTabToCovIdAndCreateBB()
+        projectCrsChanged = self.projectCrsDirty
+        self.applyPendingUpdates()
+        self.prefetcher.setEnabled(self.cbPrefetch.isChecked() and not isOfflineMode())
+        if not projectCrsChanged:
+            self.adjustCovTabToCovIdAndCreateBB()
 
     def setupUi(self, widget: QDialog) -> None:
         """
@@ -126,6 +228,10 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
 
         self.setupGetCoverageTab()
 
+        self.setupCatalogTab()
+
+        self.showMemoryUsage(0, getMemoryBudget().limitBytes, 0)
+
     def setupUrlTab(self) -> None:
         """
         Sets up "URL" tab:
@@ -135,6 +241,7 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.cbVersion.setCurrentIndex(1)
         self.loadSavedServices()
         self.updateUrlManagerButtons()
+        self.cbOfflineMode.setChecked(isOfflineMode())
 
     def setupGetCoverageTab(self) -> None:
         """
@@ -155,6 +262,35 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
 
         self.btnGetCoverage.setEnabled(False)
 
+        self.cbStackMode.addItem('One slice (From)', STACK_MODE_SINGLE)
+        self.cbStackMode.addItem('Stack as multi-band VRT', STACK_MODE_VRT)
+        self.cbStackMode.addItem('Stack as separate layers', STACK_MODE_LAYERS)
+        self.gbStack.hide()
+
+        self.cbGeoTiffCompression.addItems([COMPRESSION_AUTOMATIC] + COMPRESSIONS)
+        self.cbGeoTiffCompression.setCurrentText(self.settings.value(SETTINGS_GEOTIFF_COMPRESSION, COMPRESSION_AUTOMATIC))
+        self.cbGeoTiffPredictor.addItems(PREDICTORS)
+        self.cbGeoTiffPredictor.setCurrentText(self.settings.value(SETTINGS_GEOTIFF_PREDICTOR, 'None'))
+        self.cbGeoTiffTiling.setChecked(self.settings.value(SETTINGS_GEOTIFF_TILING, True, type=bool))
+        self.adjustGeoTiffPredictor()
+        self.wgGeoTiffEncoding.hide()
+        self.gbBands.hide()
+
+        self.cbLocalReprojection.setChecked(self.settings.value(SETTINGS_LOCAL_REPROJECTION, False, type=bool))
+
+        prefetchEnabled = self.settings.value(SETTINGS_PREFETCH_ENABLED, False, type=bool)
+        self.cbPrefetch.setChecked(prefetchEnabled)
+        self.prefetcher.setEnabled(prefetchEnabled and not isOfflineMode())
+
+    def setupCatalogTab(self) -> None:
+        """
+        Sets up "Catalog" tab:
+        Shows the content of the local coverage catalog, if it has been harvested before.
+        """
+        self.btnOpenCatalogEntry.setEnabled(False)
+        if os.path.exists(getCatalogPath()):
+            self.searchCatalog()
+
     def connectSignals(self) -> None:
         self.leBaseUrl.textChanged.connect(self.enableBtnGetCapabilities)
         self.leBaseUrl.textChanged.connect(self.updateUrlManagerButtons)
@@ -166,102 +302,88 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.btnDeleteService.clicked.connect(self.deleteCurrentService)
         self.btnImportServices.clicked.connect(self.importSavedServices)
         self.btnExportServices.clicked.connect(self.exportSavedServices)
+        self.cbOfflineMode.toggled.connect(self.setOfflineModeEnabled)
+        self.btnImportBundle.clicked.connect(self.importBundle)
 
-        self.cbCoverage.currentIndexChanged.connect(self.adjustCovTabToCovIdAndCreateBB)
+        self.cbCoverage.currentIndexChanged.connect(self.onCoverageSelected)
         self.cbUseSubset.stateChanged.connect(self.showAndHideSubsetExtentWidget)
         self.cbSetExtentMode.currentIndexChanged.connect(self.adjustCovTabToSubsetExtentMode)
         self.sketchingToolAction.triggered.connect(self.startSketchingTool)
-
-        iface.mapCanvas().extentsChanged.connect(self.setSubsetExtentLabelFromMapCanvas)
-        QgsProject.instance().crsChanged.connect(self.adjustBoundingBoxesToCrsIfVisible)
-        QgsProject.instance().crsChanged.connect(self.adjustMapCrsAndLabelForSubsetExtent)
+        self.cbPrefetch.toggled.connect(self.setPrefetchEnabled)
+        self.cbLocalReprojection.toggled.connect(self.setLocalReprojectionEnabled)
+        self.cbGeoTiffCompression.currentIndexChanged.connect(self.saveGeoTiffEncoding)
+        self.cbGeoTiffPredictor.currentIndexChanged.connect(self.saveGeoTiffEncoding)
+        self.cbGeoTiffTiling.toggled.connect(self.saveGeoTiffEncoding)
+        self.cbStackAxis.currentIndexChanged.connect(self.fillStackPositions)
+        self.btnSeedCache.clicked.connect(self.seedCache)
+        self.btnExportBundle.clicked.connect(self.exportBundle)
+
+        iface.mapCanvas().extentsChanged.connect(self.markCanvasExtentDirty)
+        QgsProject.instance().crsChanged.connect(self.markProjectCrsDirty)
+        QgsProject.instance().crsChanged.connect(invalidateTransformCache)
+        QgsProject.instance().transformContextChanged.connect(invalidateTransformCache)
+        self.pendingUpdateTimer.timeout.connect(self.applyPendingUpdates)
 
         self.btnGetCoverage.clicked.connect(self.getCovTask)
 
+        self.leCatalogSearch.textChanged.connect(self.searchCatalog)
+        self.cbCatalogMapExtent.stateChanged.connect(self.searchCatalog)
+        self.lwCatalogResults.currentItemChanged.connect(self.updateCatalogButtons)
+        self.lwCatalogResults.itemDoubleClicked.connect(self.openCatalogEntry)
+        self.btnOpenCatalogEntry.clicked.connect(self.openCatalogEntry)
+        self.btnHarvestCatalog.clicked.connect(self.harvestCatalog)
+
+        getMemoryBudget().usageChanged.connect(self.showMemoryUsage)
+
     def formatSavedServiceLabel(self, service: dict) -> str:
-        serviceName = service.get('name', '').strip()
-        if serviceName:
-            return serviceName
-        return f"{service['url']} [{service['version']}]"
+        return formatServiceLabel(service)
 
     def getSelectedSavedServiceIndex(self) -> Optional[int]:
         return self.cbSavedServices.currentData()
 
-    def normalizeSavedService(self, service: dict) -> Optional[dict]:
-        if not isinstance(service, dict):
-            return None
-
-        name = str(service.get('name', '')).strip()
-        url = str(service.get('url', '')).strip()
-        version = str(service.get('version', '')).strip()
-
-        if not url or version not in self.acceptedWcsVersions:
+    def getSelectedSavedServiceId(self) -> Optional[int]:
+        selectedIndex = self.getSelectedSavedServiceIndex()
+        if selectedIndex is None:
             return None
+        return self.savedServices[selectedIndex]['id']
 
-        return {'name': name, 'url': url, 'version': version}
+    def normalizeSavedService(self, service: dict) -> Optional[dict]:
+        return normalizeService(service)
 
     def getSavedServiceIdentity(self, service: dict) -> Tuple[str, str]:
         return service['url'], service['version']
 
     def loadSavedServices(self) -> None:
-        savedServicesRaw = self.settings.value(SETTINGS_SAVED_SERVICES, '[]')
-        self.savedServices = []
-
-        try:
-            if isinstance(savedServicesRaw, str):
-                parsedServices = json.loads(savedServicesRaw)
-            else:
-                parsedServices = savedServicesRaw
-        except (TypeError, json.JSONDecodeError):
-            logWarnMessage('Could not load saved WCS services from settings')
-            parsedServices = []
-
-        if isinstance(parsedServices, list):
-            for service in parsedServices:
-                normalizedService = self.normalizeSavedService(service)
-                if normalizedService:
-                    self.savedServices.append(normalizedService)
-
-        self.refreshSavedServicesCombo(selectLastService=True)
-
-    def persistSavedServices(self, selectedIndex: Optional[int] = None) -> None:
-        self.settings.setValue(SETTINGS_SAVED_SERVICES, json.dumps(self.savedServices))
+        """Opens the service registry, services saved by older versions in QSettings are migrated once."""
+        self.serviceRegistry = ServiceRegistry()
+        migrateServicesFromSettings(self.serviceRegistry, self.settings)
 
-        if selectedIndex is None:
-            self.settings.remove(SETTINGS_LAST_SERVICE)
-        elif 0 <= selectedIndex < len(self.savedServices):
-            self.settings.setValue(SETTINGS_LAST_SERVICE, self.formatSavedServiceLabel(self.savedServices[selectedIndex]))
-        else:
-            self.settings.remove(SETTINGS_LAST_SERVICE)
+        self.reloadSavedServices()
+        self.refreshSavedServicesCombo(selectedIndex=self.savedServiceIndexById.get(self.serviceRegistry.getLastServiceId()))
 
-    def refreshSavedServicesCombo(self,
-                                  selectedIndex: Optional[int] = None,
-                                  selectLastService: bool = False) -> None:
-        currentLabel = None
-        if selectLastService:
-            currentLabel = self.settings.value(SETTINGS_LAST_SERVICE, '', type=str)
+    def reloadSavedServices(self) -> None:
+        """Reads the saved services from the registry (to fill the dropdown menu)."""
+        self.savedServices = self.serviceRegistry.listServices()
+        self.savedServiceIndexById = {service['id']: index for index, service in enumerate(self.savedServices)}
 
+    def refreshSavedServicesCombo(self, selectedIndex: Optional[int] = None) -> None:
         self.cbSavedServices.blockSignals(True)
         self.cbSavedServices.clear()
         self.cbSavedServices.addItem('Saved services', None)
 
-        resolvedIndex = selectedIndex
         for index, service in enumerate(self.savedServices):
-            label = self.formatSavedServiceLabel(service)
-            self.cbSavedServices.addItem(label, index)
-            if currentLabel and label == currentLabel:
-                resolvedIndex = index
+            self.cbSavedServices.addItem(self.formatSavedServiceLabel(service), index)
 
-        if resolvedIndex is not None and 0 <= resolvedIndex < len(self.savedServices):
-            self.cbSavedServices.setCurrentIndex(resolvedIndex + 1)
+        if selectedIndex is not None and 0 <= selectedIndex < len(self.savedServices):
+            self.cbSavedServices.setCurrentIndex(selectedIndex + 1)
         else:
             self.cbSavedServices.setCurrentIndex(0)
 
         self.cbSavedServices.blockSignals(False)
         self.updateUrlManagerButtons()
 
-        if resolvedIndex is not None and 0 <= resolvedIndex < len(self.savedServices):
-            self.applySavedService(resolvedIndex)
+        if selectedIndex is not None and 0 <= selectedIndex < len(self.savedServices):
+            self.applySavedService(selectedIndex)
 
     def applySavedService(self, index: int) -> None:
         if not 0 <= index < len(self.savedServices):
@@ -273,13 +395,14 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         versionIndex = self.cbVersion.findText(service['version'])
         if versionIndex >= 0:
             self.cbVersion.setCurrentIndex(versionIndex)
-        self.persistSavedServices(selectedIndex=index)
+        # Only the selection is written, the services themselves are unchanged
+        self.serviceRegistry.setLastServiceId(service['id'])
         self.updateUrlManagerButtons()
 
     def onSavedServiceSelected(self) -> None:
         selectedIndex = self.getSelectedSavedServiceIndex()
         if selectedIndex is None:
-            self.persistSavedServices(selectedIndex=None)
+            self.serviceRegistry.setLastServiceId(None)
             self.updateUrlManagerButtons()
             return
 
@@ -289,7 +412,7 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.cbSavedServices.blockSignals(True)
         self.cbSavedServices.setCurrentIndex(0)
         self.cbSavedServices.blockSignals(False)
-        self.persistSavedServices(selectedIndex=None)
+        self.serviceRegistry.setLastServiceId(None)
         self.leServiceName.clear()
         self.leBaseUrl.clear()
         self.cbVersion.setCurrentIndex(1)
@@ -310,40 +433,32 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             'url': baseUrl,
             'version': self.cbVersion.currentText()
         }
-        selectedIndex = self.getSelectedSavedServiceIndex()
-        serviceIdentity = self.getSavedServiceIdentity(service)
-
-        duplicateIndex = next((index for index, savedService in enumerate(self.savedServices)
-                               if self.getSavedServiceIdentity(savedService) == serviceIdentity
-                               and index != selectedIndex), None)
-        if duplicateIndex is not None:
-            self.savedServices[duplicateIndex] = service
-            selectedIndex = duplicateIndex
-            infoMessage = 'WCS service updated.'
-        elif selectedIndex is None:
-            self.savedServices.append(service)
-            selectedIndex = len(self.savedServices) - 1
+        selectedId = self.getSelectedSavedServiceId()
+        if selectedId is None and self.serviceRegistry.findService(*self.getSavedServiceIdentity(service)) is None:
             infoMessage = 'WCS service saved.'
         else:
-            self.savedServices[selectedIndex] = service
             infoMessage = 'WCS service updated.'
 
-        self.persistSavedServices(selectedIndex=selectedIndex)
-        self.refreshSavedServicesCombo(selectedIndex=selectedIndex)
+        # An existing service with the same url and version is updated instead of the selected one
+        serviceId = self.serviceRegistry.saveService(service, serviceId=selectedId)
+        self.serviceRegistry.setLastServiceId(serviceId)
+
+        self.reloadSavedServices()
+        self.refreshSavedServicesCombo(selectedIndex=self.savedServiceIndexById.get(serviceId))
         self.writeToPluginMessageBar(infoMessage,
                                      level=Qgis.Info,
                                      duration=4)
 
     def deleteCurrentService(self) -> None:
-        selectedIndex = self.getSelectedSavedServiceIndex()
-        if selectedIndex is None:
+        selectedId = self.getSelectedSavedServiceId()
+        if selectedId is None:
             self.writeToPluginMessageBar('Select a saved WCS service to delete it.',
                                          level=Qgis.Warning,
                                          duration=4)
             return
 
-        del self.savedServices[selectedIndex]
-        self.persistSavedServices(selectedIndex=None)
+        self.serviceRegistry.deleteService(selectedId)
+        self.reloadSavedServices()
         self.refreshSavedServicesCombo()
         self.leServiceName.clear()
         self.leBaseUrl.clear()
@@ -368,7 +483,7 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
 
         try:
             with open(filePath, 'w', encoding='utf-8') as exportFile:
-                json.dump(self.savedServices, exportFile, indent=2)
+                json.dump(self.serviceRegistry.exportServices(), exportFile, indent=2)
         except OSError as e:
             self.writeToPluginMessageBar(f'Export failed: {e}',
                                          level=Qgis.Warning,
@@ -404,27 +519,10 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                                          duration=6)
             return
 
-        selectedIndex = None
-        importedCount = 0
-        skippedCount = 0
-
-        for importedService in importedServices:
-            normalizedService = self.normalizeSavedService(importedService)
-            if not normalizedService:
-                skippedCount += 1
-                continue
-
-            importedCount += 1
-            serviceIdentity = self.getSavedServiceIdentity(normalizedService)
-            existingIndex = next((index for index, savedService in enumerate(self.savedServices)
-                                  if self.getSavedServiceIdentity(savedService) == serviceIdentity), None)
-
-            if existingIndex is None:
-                self.savedServices.append(normalizedService)
-                selectedIndex = len(self.savedServices) - 1
-            else:
-                self.savedServices[existingIndex] = normalizedService
-                selectedIndex = existingIndex
+        normalizedServices = [normalizedService for normalizedService in map(self.normalizeSavedService, importedServices)
+                              if normalizedService]
+        importedCount = len(normalizedServices)
+        skippedCount = len(importedServices) - importedCount
 
         if importedCount == 0:
             self.writeToPluginMessageBar('Import contained no valid saved WCS services.',
@@ -432,8 +530,11 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                                          duration=6)
             return
 
-        self.persistSavedServices(selectedIndex=selectedIndex)
-        self.refreshSavedServicesCombo(selectedIndex=selectedIndex)
+        # One transaction for the whole file, duplicates are resolved by the unique url/version index
+        selectedId = self.serviceRegistry.importServices(normalizedServices)
+        self.serviceRegistry.setLastServiceId(selectedId)
+        self.reloadSavedServices()
+        self.refreshSavedServicesCombo(selectedIndex=self.savedServiceIndexById.get(selectedId))
 
         infoMessage = f'Imported {importedCount} saved WCS service'
         if importedCount != 1:
@@ -450,28 +551,69 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
 
     def updateUrlManagerButtons(self) -> None:
         hasBaseUrl = len(self.leBaseUrl.text().strip()) > 0
-        self.btnGetCapabilities.setEnabled(hasBaseUrl)
+        self.btnGetCapabilities.setEnabled(hasBaseUrl and not self.serviceLoading)
         self.btnSaveService.setEnabled(hasBaseUrl)
         self.btnDeleteService.setEnabled(self.getSelectedSavedServiceIndex() is not None)
         self.btnExportServices.setEnabled(len(self.savedServices) > 0)
 
-    def adjustBoundingBoxesToCrsIfVisible(self) -> None:
+    def markCanvasExtentDirty(self) -> None:
+        """
+        Slot called on every pan or zoom of the map canvas:
+        only flags the subset extent as outdated, the label is updated debounced.
+        """
+        self.canvasExtentDirty = True
+        self.schedulePendingUpdates()
+
+    def markProjectCrsDirty(self) -> None:
         """
         Slot called when the crs of the project has changed:
-        if the plugin dialog is open, the coverage bounding box is relaoded
-        and the subset bounding box is cleared.
+        only flags map crs, bounding boxes and crs dropdowns as outdated, they are rebuilt debounced.
         """
+        self.projectCrsDirty = True
+        self.canvasExtentDirty = True
+        self.schedulePendingUpdates()
+
+    def schedulePendingUpdates(self) -> None:
+        """(Re)starts the debounce timer. Nothing is scheduled while the dialog is hidden, showEvent applies the updates."""
         if self.isVisible():
+            self.pendingUpdateTimer.start()
+
+    def applyPendingUpdates(self) -> None:
+        """
+        Applies all flagged updates at once:
+        - project crs: the map crs is stored, the coverage bounding box is reloaded,
+        a drawn polygon is transformed to the new crs and other subset bounding boxes are cleared
+        - canvas extent: the subset extent is retrieved from the map canvas
+        """
+        self.pendingUpdateTimer.stop()
+        if not self.isVisible():
+            return
+
+        if self.projectCrsDirty:
+            self.projectCrsDirty = False
+            subsetPolygon, subsetPolygonCrs = self.subsetPolygon, self.subsetPolygonCrs
+            self.mapCrs = self.getMapCrs()
             self.clearBoundingBoxes()
             self.adjustCovTabToCovIdAndCreateBB()
+            if subsetPolygon is not None:
+                self.restoreSubsetPolygon(subsetPolygon, subsetPolygonCrs)
+
+        if self.canvasExtentDirty:
+            self.setSubsetExtentLabelFromMapCanvas()
 
     def setupKey(self) -> None:
-        """ Modifies ESC key so that the plugin is reset. """
+        """ Modifies ESC key so that running service requests are canceled or else the plugin is reset. """
         escKey = QShortcut(QKeySequence("ESC"), self)
         escKey.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
-        escKey.activated.connect(self.closeGui)
+        escKey.activated.connect(self.onEscKey)
         escKey.setEnabled(True)
 
+    def onEscKey(self) -> None:
+        if self.requestFeedback is not None:
+            self.requestFeedback.cancel()
+        else:
+            self.closeGui()
+
     def showAndHideSubsetExtentWidget(self) -> None:
         """Shows and hides widget for subset functionality. """
         subsetModeIsActivated = self.cbUseSubset.isChecked()
@@ -500,13 +642,9 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             self.lblExtentMapCanvas.hide()
             self.lblExtentPolygon.show()
 
-    def adjustMapCrsAndLabelForSubsetExtent(self) -> None:
-        """Stores current map crs. Retrieves current extent from map canvas and shows it in GUI"""
-        self.mapCrs = self.getMapCrs()
-        self.setSubsetExtentLabelFromMapCanvas()
-
     def setSubsetExtentLabelFromMapCanvas(self) -> None:
         """Retrieves current map extent, stores coordinates and sets the subset label"""
+        self.canvasExtentDirty = False
         mapExtent = iface.mapCanvas().extent()
         self.requestXMinCanvas = mapExtent.xMinimum()
         self.requestYMinCanvas = mapExtent.yMinimum()
@@ -542,11 +680,28 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             self.writeToPluginMessageBar(errorMessage,
                                          level=Qgis.MessageLevel.Warning)
             return
+        self.setSubsetPolygon(geom)
+
+    def setSubsetPolygon(self, geom: QgsGeometry) -> None:
+        """Shows a polygon (map crs) as subset bounding box and stores it as polygon subset."""
         if not self.subsetBoundingBox:
             self.subsetBoundingBox = BoundingBox('request_extent')
-        rectBB = self.subsetBoundingBox.setBoundingBoxFromPolygon(geom)
+        rectBB = self.subsetBoundingBox.setBoundingBoxFromPolygon(QgsGeometry(geom))
+        self.subsetBoundingBox.setToGeometry(geom)
+        self.subsetPolygon = QgsGeometry(geom)
+        self.subsetPolygonCrs = QgsProject.instance().crs()
         self.setPolygonSubset(rectBB)
 
+    def restoreSubsetPolygon(self, geom: QgsGeometry, sourceCrs: QgsCoordinateReferenceSystem) -> None:
+        """Keeps a drawn polygon after the project crs changed, transformed to the new crs."""
+        geom = QgsGeometry(geom)
+        try:
+            geom.transform(getCoordinateTransform(sourceCrs, QgsProject.instance().crs()))
+        except QgsCsException as e:
+            logWarnMessage(f'Drawn polygon could not be transformed to the project crs: {e}')
+            return
+        self.setSubsetPolygon(geom)
+
     def setPolygonSubset(self, rectBB: QgsRectangle) -> None:
         """Stores subset coordinates and adjusts label showing the extent."""
         self.setPolygonSubsetCoordinates(rectBB)
@@ -568,6 +723,7 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             f"{round(self.requestYMaxPolygon, 5)}"
             f"\n(Map crs: {self.mapCrs})")
 
+    @profiled('load_capabilities')
     def requestAndReadCapabilities(self) -> bool:
         """
         Returns False, if capabilities of a wcs service could not be read.
@@ -580,6 +736,15 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             capabilitiesXmlResponse = self.requestCapabilities(version=wcsVersion, baseUrl=baseUrl)
             self.capabilities = Capabilities(capabilitiesXmlResponse)
             return True
+        except RequestCanceledException:
+            self.writeToPluginMessageBar('Request canceled', level=Qgis.MessageLevel.Info)
+            self.capabilities = None
+            return False
+        except OfflineException:
+            self.writeToPluginMessageBar('The capabilities of this service are not available offline',
+                                         level=Qgis.MessageLevel.Warning)
+            self.capabilities = None
+            return False
         except CapabilitiesException as e:
             errorMessage = e.args[0]
             self.writeToPluginMessageBar(errorMessage,
@@ -618,10 +783,48 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         describeCoverage is requested for all available coverage.
         The tab 'Get Coverage' is enabled and adjusted to the service and the coverages provided by the service.
         """
-        self.cleanCoverageAndInformationTab()
+        if self.serviceLoading:
+            return
+        self.serviceLoading = True
+        self.setServiceWidgetsEnabled(False)
+        self.requestFeedback = QgsFeedback()
+        try:
+            self.refreshGetCoverageAndInformationTabs()
+        finally:
+            self.requestFeedback = None
+            self.serviceLoading = False
+            self.setServiceWidgetsEnabled(True)
+
+    def setServiceWidgetsEnabled(self, enabled: bool) -> None:
+        """Enables or disables the widgets that select or load a service, e.g. while a service is loaded."""
+        self.cbSavedServices.setEnabled(enabled)
+        self.leBaseUrl.setEnabled(enabled)
+        self.cbVersion.setEnabled(enabled)
+        self.lwCatalogResults.setEnabled(enabled)
+        self.updateUrlManagerButtons()
+        self.updateCatalogButtons()
+
+    def refreshGetCoverageAndInformationTabs(self) -> None:
+        """
+        Requests capabilities and describe coverage and adjusts both tabs to the service.
+
+        If the loaded service is refreshed, the new capabilities are compared with the previous ones:
+        describe coverage is only requested for added coverages and coverages with a changed bounding box,
+        the information of unchanged coverages and the selections in the "Get Coverage" tab are kept.
+        """
+        previousCapabilities = self.capabilities
+        serviceKey = (self.leBaseUrl.text().strip(), self.cbVersion.currentText())
+        isRefresh = (serviceKey == self.loadedServiceKey
+                     and previousCapabilities is not None
+                     and self.describeCov is not None)
+        if not isRefresh:
+            self.loadedServiceKey = None
+            self.describeCov = None
+            self.cleanCoverageAndInformationTab()
 
         capabilitiesRead = self.requestAndReadCapabilities()
         if not capabilitiesRead:
+            self.resetLoadedService()
             return
 
         wcsVersion = self.getWcsVersion()
@@ -630,26 +833,112 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                                          level=Qgis.MessageLevel.Warning)
             logWarnMessage(
                 f'Service does not support one of the following Versions: {", ".join(self.acceptedWcsVersions)}')
+            self.resetLoadedService()
+            return
+
+        if isRefresh and wcsVersion == self.lblVersion.text():
+            self.refreshChangedCoverages(previousCapabilities, wcsVersion)
             return
+        if isRefresh:
+            # Descriptions of another version must not be merged with the previous ones: the service is loaded anew
+            self.loadedServiceKey = None
+            self.describeCov = None
+            self.cleanCoverageAndInformationTab()
 
         describeCoverageRead = self.requestAndReadDescribeCoverage(wcsVersion)
         if not describeCoverageRead:
+            self.resetLoadedService()
+            return
+
+        self.loadedServiceKey = serviceKey
+        self.setCoverageAndInformationTab(wcsVersion)
+
+    def refreshChangedCoverages(self, previousCapabilities: Capabilities, wcsVersion: str) -> None:
+        """Updates describe coverage information and both tabs for the coverages that changed since the previous capabilities."""
+        diff = compareCoverageSummaries(previousCapabilities.coverageSummary, self.capabilities.coverageSummary)
+
+        # Changed coverages that can not be read anymore must not keep their outdated information
+        self.describeCov.removeCoverages(diff.removed | diff.changed)
+
+        changedCovIds = diff.added | diff.changed
+        if changedCovIds:
+            logInfoMessage(f'Capabilities changed: requesting describe coverage for {len(changedCovIds)} coverage(s)')
+            describeCoverageRead = self.requestAndReadDescribeCoverage(wcsVersion, covIds=sorted(changedCovIds))
+            if not describeCoverageRead:
+                self.resetLoadedService()
+                return
+
+        serviceMetadataChanged = (previousCapabilities.formats != self.capabilities.formats
+                                  or previousCapabilities.crsx != self.capabilities.crsx
+                                  or previousCapabilities.title != self.capabilities.title
+                                  or previousCapabilities.getCoverageUrl != self.capabilities.getCoverageUrl)
+        if diff.isEmpty() and not serviceMetadataChanged:
+            logInfoMessage('Capabilities unchanged: coverage information and selections are kept')
+            self.setInformationTab()
             return
 
+        coverageTabState = self.getCoverageTabState()
+        currentTabIndex = self.tabWidget.currentIndex()
+        self.cleanCoverageAndInformationTab()
         self.setCoverageAndInformationTab(wcsVersion)
+        self.restoreCoverageTabState(coverageTabState)
+        self.tabWidget.setCurrentIndex(currentTabIndex)
+
+    def getCoverageTabState(self) -> dict:
+        """Returns the selections of the "Get Coverage" tab."""
+        return {'covId': self.cbCoverage.currentText(),
+                'format': self.cbFormat.currentText(),
+                'outputCrs': self.cbCrs.currentData(),
+                'subsetCrs': self.cbSubsetCrs.currentData()}
+
+    def restoreCoverageTabState(self, coverageTabState: dict) -> None:
+        """Restores selections of the "Get Coverage" tab, if the entries are still available."""
+        covIdIndex = self.cbCoverage.findText(coverageTabState['covId'])
+        if covIdIndex >= 0:
+            # Refills the crs dropdown menus for this coverage
+            self.cbCoverage.setCurrentIndex(covIdIndex)
+        for comboBox, value in ((self.cbCrs, coverageTabState['outputCrs']),
+                                (self.cbSubsetCrs, coverageTabState['subsetCrs'])):
+            index = comboBox.findData(value)
+            if index >= 0:
+                comboBox.setCurrentIndex(index)
+        formatIndex = self.cbFormat.findText(coverageTabState['format'])
+        if formatIndex >= 0:
+            self.cbFormat.setCurrentIndex(formatIndex)
+
+    def resetLoadedService(self) -> None:
+        """Forgets the loaded service after a failed request, so that both tabs show no stale information."""
+        self.loadedServiceKey = None
+        self.capabilities = None
+        self.describeCov = None
+        self.cleanCoverageAndInformationTab()
 
-    def requestAndReadDescribeCoverage(self, wcsVersion: str) -> bool:
+    def requestAndReadDescribeCoverage(self, wcsVersion: str, covIds: Optional[List[str]] = None) -> bool:
         """
-        Requests DescribeCoverage of the service.
+        Requests DescribeCoverage of the service for all coverages or, if given, only for covIds.
+        The information of these coverages is added to the existing describe coverage information.
         Raises:
         - DescribeCoverageException
         - NotImplementedError
         """
-        covIds = self.capabilities.coverageSummary.keys()
+        if covIds is None:
+            covIds = self.capabilities.coverageSummary.keys()
         try:
             describeCoverageXmlResponse = self.requestDescribeCoverage(covIds, wcsVersion)
-            self.describeCov = DescribeCoverage(describeCoverageXmlResponse)
+            if self.describeCov is None:
+                self.describeCov = DescribeCoverage(describeCoverageXmlResponse)
+            else:
+                self.describeCov.updateFromDescribeCoverage(describeCoverageXmlResponse)
             return True
+        except (RequestCanceledException, OfflineException) as e:
+            if isinstance(e, OfflineException):
+                self.writeToPluginMessageBar('The coverage descriptions of this service are not available offline',
+                                             level=Qgis.MessageLevel.Warning)
+            else:
+                self.writeToPluginMessageBar('Request canceled', level=Qgis.MessageLevel.Info)
+            self.capabilities = None
+            self.describeCov = None
+            return False
         except (DescribeCoverageException, NotImplementedError) as e:
             errorMessage = e.args[0]
             self.writeToPluginMessageBar(errorMessage,
@@ -690,6 +979,14 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             self.cbFormat.addItem('no tiff available')
             self.cbFormat.setEnabled(False)
 
+        self.wgGeoTiffEncoding.setVisible(self.isGeoTiffExtensionSupported())
+
+        # Other resolutions than the native one can only be seeded with the scaling extension
+        scalingSupported = self.capabilities.supportsScaling()
+        if not scalingSupported:
+            self.leSeedScaleFactors.setText('1')
+        self.leSeedScaleFactors.setEnabled(scalingSupported)
+
         self.cbCoverage.clear()
         for covId, _ in self.capabilities.coverageSummary.items():
             if covId in self.describeCov.coverageInformation.keys():
@@ -716,63 +1013,26 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         Requests capabilities of the service.
         Raises:
             CapabilitiesException, if any error occurs and the response is not a capabilities document
+            RequestCanceledException
         """
-
-        capabilitiesRequest = self.buildCapabilitiesRequest(version=version, baseUrl=baseUrl)
-        capabilitiesStr = sendRequest(request=capabilitiesRequest)
-        try:
-            root = ET.fromstring(capabilitiesStr) # nosec
-            capabilitiesXmlMainTag = root.tag
-            if capabilitiesXmlMainTag != f'{wcs_ns}Capabilities':
-                raise CapabilitiesException('Error: Could not read capabilities for this service')
-            capabilitiesXml = ET.ElementTree(ET.fromstring(capabilitiesStr)) # nosec
-        except:
-            raise CapabilitiesException('Error: Could not read capabilities for this service')
-
-        return capabilitiesXml
+        return requestCapabilities(version=version, baseUrl=baseUrl, feedback=self.requestFeedback)
 
     def buildDescribeCoverageRequest(self, covIds: List[str], version: str) -> str:
         """Creates a string to request describeCoverage of all available coverages of the service"""
-        covIdsString = ','.join(covIds)
-        params = {"REQUEST": "DescribeCoverage",
-                  "SERVICE": "WCS",
-                  "VERSION": version,
-                  "COVERAGEID": covIdsString}
-        queryString = urllib.parse.urlencode(params)
-        describeCoverageUrl = self.capabilities.describeCoverageUrl
-        url = self.checkUrlSyntax(describeCoverageUrl)
-
-        return url + queryString
-
-    def requestDescribeCoverage(self, covIds: List[str], version: str) -> DescribeCoverage:
+        return buildDescribeCoverageRequest(self.capabilities.describeCoverageUrl, covIds, version)
+
+    def requestDescribeCoverage(self, covIds: List[str], version: str) -> ET.ElementTree:
         """
         Requests describe coverage information of all coverages provided by the servce.
         Raises:
             DescribeCoverageException, if any error occurs and the response is not a descrive coverage document
+            RequestCanceledException
         """
-        coverageRequest = self.buildDescribeCoverageRequest(covIds, version)
-        coverageStr = sendRequest(request=coverageRequest)
-        try:
-            root = ET.fromstring(coverageStr) # nosec
-            coverageXmlMainTag = root.tag
-            if coverageXmlMainTag != f'{wcs_ns}CoverageDescriptions':
-                raise DescribeCoverageException('Error: Could not read describeCoverage for this service')
-            describeCoverageXml = ET.ElementTree(ET.fromstring(coverageStr)) # nosec
-        except:
-            raise DescribeCoverageException('Error: Could not read describeCoverage for this service')
-
-        return describeCoverageXml
+        return requestDescribeCoverage(self.capabilities.describeCoverageUrl, covIds, version, feedback=self.requestFeedback)
 
     def buildCapabilitiesRequest(self, version: str, baseUrl: str) -> str:
         """ Creates a string to request the capabilities of a a service"""
-        params = {"REQUEST": "GetCapabilities",
-                  "SERVICE": "WCS",
-                  "Version": version}
-        queryString = urllib.parse.urlencode(params)
-        baseUrl = self.checkUrlSyntax(baseUrl)
-        capabilitiesRequest = baseUrl + queryString
-
-        return capabilitiesRequest
+        return buildCapabilitiesRequest(version=version, baseUrl=baseUrl)
 
     def cleanGetCoverageTab(self) -> None:
         """ Clears all capabilities and describe coverage information from getCoverage tab"""
@@ -782,6 +1042,9 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.cbCoverage.clear()
         self.cbCrs.clear()
         self.cbFormat.clear()
+        self.wgGeoTiffEncoding.hide()
+        self.lwBands.clear()
+        self.gbBands.hide()
         self.btnGetCoverage.setEnabled(False)
         self.lblExtentMapCanvas.setText('<no service loaded>')
         self.lblExtentPolygon.setText('<no service loaded>')
@@ -793,6 +1056,10 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.lblFees.setText('<no service loaded>')
         self.lblConstraints.setText('<no service loaded>')
 
+    def onCoverageSelected(self) -> None:
+        with profiledOperation('select_coverage'):
+            self.adjustCovTabToCovIdAndCreateBB()
+
     def adjustCovTabToCovIdAndCreateBB(self) -> None:
         """
         Resets the "Get Coverage" tab if a coverage is chosen from the dropdown menu:
@@ -817,6 +1084,10 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                     self.cbCrs.addItem(crs, crs)
                     self.cbSubsetCrs.addItem(crs, crs)
 
+            self.adjustStackWidgets(coverageInformation.extraAxes)
+            self.adjustBandWidgets(coverageInformation.bands)
+            self.showOfflineAreas()
+
             # Create bounding box rubber band and set it to coverage extent
             if not self.coverageBoundingBox:
                 self.coverageBoundingBox = BoundingBox('coverage_extent')
@@ -845,9 +1116,70 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                 self.writeToPluginMessageBar(warningMessage)
                 logWarnMessage(warningMessage)
 
+    def adjustStackWidgets(self, extraAxes: List[AxisInformation]) -> None:
+        """Shows the widgets for time and elevation axes, if the coverage has further axes."""
+        self.cbStackAxis.clear()
+        for axis in extraAxes:
+            self.cbStackAxis.addItem(axis.label, axis)
+        self.gbStack.setVisible(bool(extraAxes))
+        self.fillStackPositions()
+
+    def adjustBandWidgets(self, bands: List[str]) -> None:
+        """Shows the bands of the coverage for a range subset, if the service supports range subsetting."""
+        self.lwBands.clear()
+        for band in bands:
+            item = QListWidgetItem(band)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.lwBands.addItem(item)
+        self.gbBands.setVisible(self.capabilities.supportsRangeSubsetting() and len(bands) > 1)
+
+    def getRangeSubsetParams(self) -> List[Tuple[str, str]]:
+        """
+        Returns the RANGESUBSET parameter of the chosen bands, none if all bands are chosen.
+        Raises:
+            ValueError: If no band is chosen
+        """
+        if self.lwBands.count() <= 1 or not self.capabilities.supportsRangeSubsetting():
+            return []
+        items = [self.lwBands.item(row) for row in range(self.lwBands.count())]
+        return getRangeSubsetParams([item.text() for item in items],
+                                    [item.text() for item in items if item.checkState() == Qt.CheckState.Checked])
+
+    def fillStackPositions(self) -> None:
+        """Offers the slice positions (or, if unknown, the bounds) of the chosen axis as range of the stack."""
+        self.cbStackFrom.clear()
+        self.cbStackTo.clear()
+        axis = self.cbStackAxis.currentData()
+        if axis is None:
+            return
+        positions = axis.positions or [axis.lowerBound, axis.upperBound]
+        self.cbStackFrom.addItems(positions)
+        self.cbStackTo.addItems(positions)
+        self.cbStackFrom.setCurrentIndex(0)
+        self.cbStackTo.setCurrentIndex(len(positions) - 1)
+
+    def getExtraAxisSubsets(self, stackPosition: Optional[str] = None) -> List[str]:
+        """
+        Returns slice subsets for the time and elevation axes of the current coverage:
+        the chosen axis is sliced at stackPosition (default: "From"), other axes at their upper bound.
+        """
+        covId = self.cbCoverage.currentText()
+        stackAxis = self.cbStackAxis.currentData()
+        subsets = []
+        for axis in self.describeCov.coverageInformation[covId].extraAxes:
+            if stackAxis is not None and axis.label == stackAxis.label:
+                position = stackPosition if stackPosition is not None else self.cbStackFrom.currentText().strip().strip('"')
+            else:
+                position = axis.positions[-1] if axis.positions else axis.upperBound
+            subsets.append(buildSliceSubset(axis, position))
+        return subsets
+
     def closeGui(self) -> None:
-        """ Clears the bounding boxes and closes the dialog."""
+        """ Clears the bounding boxes, stops the prefetch and closes the dialog."""
         self.clearBoundingBoxes()
+        # the prefetcher follows the map canvas, which keeps changing while the dialog is closed
+        self.prefetcher.setEnabled(False)
         self.close()
 
     def closeEvent(self, event) -> None:
@@ -858,6 +1190,25 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         """Clears the geometry of the bounding boxes and clears the subset coordinates."""
         self.clearCoverageBoundingBox()
         self.clearSubsetBoundingBox()
+        if self.offlineAreaBoundingBox:
+            self.offlineAreaBoundingBox.clearBoundingBox()
+
+    def showOfflineAreas(self) -> None:
+        """Outlines the areas of the current coverage that are available offline (offline mode only)."""
+        if self.offlineAreaBoundingBox:
+            self.offlineAreaBoundingBox.clearBoundingBox()
+        covId = self.cbCoverage.currentText()
+        if not isOfflineMode() or not covId:
+            return
+        footprint = getOfflineFootprint(covId, QgsProject.instance().crs())
+        if footprint is None:
+            self.writeToPluginMessageBar(f'No data of {covId} is available offline', level=Qgis.MessageLevel.Warning)
+            return
+        if not self.offlineAreaBoundingBox:
+            self.offlineAreaBoundingBox = BoundingBox('offline_extent')
+        self.offlineAreaBoundingBox.setToGeometry(footprint)
+        self.writeToPluginMessageBar(f'Areas of {covId} available offline are outlined in green',
+                                     level=Qgis.MessageLevel.Info, duration=5)
 
     def clearCoverageBoundingBox(self) -> None:
         """ Clears the coverage extent bounding box """
@@ -873,6 +1224,8 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             self.requestYMinPolygon = None
             self.requestXMaxPolygon = None
             self.requestYMaxPolygon = None
+            self.subsetPolygon = None
+            self.subsetPolygonCrs = None
 
     def getCovTask(self):
         """
@@ -881,124 +1234,384 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         - tasks runs function getCoverage
         - on finished self.addRLayer is called
         """
-        self.getCovProgressBar()
+        # Speculative downloads must not compete with the interactive request
+        self.prefetcher.cancel()
+
+        # The request must not use a subset extent that is still waiting for the debounce timer
+        self.applyPendingUpdates()
+
+        if self.gbStack.isVisible() and self.cbStackMode.currentData() != STACK_MODE_SINGLE:
+            self.getCovStackTask()
+            return
+
+        if (self.cbUseSubset.isChecked()
+                and self.cbSetExtentMode.currentData() == 'polygon'
+                and self.subsetPolygon is not None):
+            self.getCovPolygonTask()
+            return
 
         try:
             url, covId = self.getCovQueryStr()
         except ValueError as e:
-            self.logWarnMessage(str(e))
+            self.writeToPluginMessageBar(str(e), level=Qgis.MessageLevel.Warning)
+            logWarnMessage(str(e))
             return
+
+        # Disabled before the task is created, so that a double click cannot start a second task.
+        # Identical requests from other callers (e.g. scripts) share the transfer in getCoverage.
+        self.btnGetCoverage.setEnabled(False)
+
+        controller = self.getServiceController()
+        self.tunedService = (self.loadedServiceKey, controller)
+        self.getCovProgressBar()
         # task as instance variable so on_finished works
         # ref https://gis.stackexchange.com/a/435487/51035
         # ref https://gis-ops.com/qgis-3-plugin-tutorial-background-processing/
         self.task = QgsTask.fromFunction(
             'Get Coverage',
-            getCoverage,
-            url,
-            covId,
+            *self.getTaskFunctionAndArguments(getCoverageWithSplit, url, covId),
+            controller=controller,
             on_finished=self.addRLayer,
             flags=QgsTask.Flag.CanCancel
         )
-        QgsApplication.taskManager().addTask(self.task)
-
-        self.btnGetCoverage.setEnabled(False)
+        self.addCovTask()
 
-    def getSubsets(self,
-                   covId: str,
-                   mapCrs: QgsCoordinateReferenceSystem,
-                   subsetCrsUri: str) -> Tuple[str, str]:
+    def getCovStackTask(self) -> None:
         """
-        Creates the subset string for the get coverage request.
-
-        Retrieval of axislabels:
-        - If the native crs of the coverage (from descrive coverage) is the subset crs chosen by the user
-        axis labels come from describe coverage response
-        - If the subset crs and the native crs differ axis labels are retreived using proj4:
-            - If more than 2 or no labels are found, native crs labels are used instead
-
-        Subset coordinates are defined in map crs of qgis project and must be transformed to subset crs
-
-        If subset crs has inverted axis, axis labels order must be switched.
-        Optional: User can deactivate the inversion, as some services might not have implemented the inverted axis order.
+        Creates a QgsTask requesting one slice per position of the chosen axis between "From" and "To".
+        The slices are requested concurrently and added as multi-band VRT or as separate layers.
         """
-        nativeCrsUri = self.describeCov.coverageInformation[covId].nativeCrs
+        axis = self.cbStackAxis.currentData()
+        fromPosition = self.cbStackFrom.currentText().strip().strip('"')
+        toPosition = self.cbStackTo.currentText().strip().strip('"')
+        try:
+            positions = selectAxisPositions(axis, fromPosition, toPosition)
+            slices = [StackSlice(position, self.getCovQueryStr(stackPosition=position)[0]) for position in positions]
+        except ValueError as e:
+            self.writeToPluginMessageBar(str(e), level=Qgis.MessageLevel.Warning)
+            logWarnMessage(str(e))
+            return
+        if not slices:
+            message = f'No slices of {axis.label} known between {fromPosition} and {toPosition}'
+            self.writeToPluginMessageBar(message, level=Qgis.MessageLevel.Warning)
+            logWarnMessage(message)
+            return
 
-        if nativeCrsUri == subsetCrsUri:
-            axisLabel0, axisLabel1 = self.describeCov.coverageInformation[covId].axisLabels
-        else:
-            axisList = getAxisLabels(subsetCrsUri)
-            if not axisList:
-                logInfoMessage(f"Axis labels of subset crs could not be found. Native crs is used as subset crs instead.")
-                axisLabel0, axisLabel1 = self.describeCov.coverageInformation[covId].axisLabels
-                subsetCrsUri = nativeCrsUri
-            elif len(axisList) > 2:
-                logWarnMessage(f"More than two axes are not supported (yet): {axisList}")
-                axisLabel0, axisLabel1 = self.describeCov.coverageInformation[covId].axisLabels
-                subsetCrsUri = nativeCrsUri
-            else:
-                axisLabel0, axisLabel1 = axisList
+        controller = self.getServiceController()
+        self.tunedService = (self.loadedServiceKey, controller)
+        self.btnGetCoverage.setEnabled(False)
+        self.getCovProgressBar()
+        self.task = QgsTask.fromFunction(
+            f'Get Coverage ({len(slices)} slices)',
+            *self.getTaskFunctionAndArguments(getCoverageStack,
+                                              slices,
+                                              self.cbCoverage.currentText(),
+                                              axis.label,
+                                              self.cbStackMode.currentData(),
+                                              controller),
+            on_finished=self.addStackLayers,
+            flags=QgsTask.Flag.CanCancel
+        )
+        self.addCovTask()
 
+    def getCovPolygonTask(self) -> None:
+        """
+        Creates a QgsTask requesting the drawn polygon: the bounding box of the polygon is split into tiles,
+        only tiles intersecting the polygon are requested and the mosaic is clipped to the polygon.
+        """
+        controller = self.getServiceController()
         try:
-            mapCrsUri = crsAsOgcUri(mapCrs)
-        except:
-            raise  # re-raise exception
+            urls = [self.getCovQueryStr(extent=tile)[0]
+                    for tile in buildPolygonTiles(self.subsetPolygon, controller.getTuning().tilesPerSide)]
+        except ValueError as e:
+            self.writeToPluginMessageBar(str(e), level=Qgis.MessageLevel.Warning)
+            logWarnMessage(str(e))
+            return
 
-        subsetMode = self.cbSetExtentMode.currentData()
+        self.tunedService = (self.loadedServiceKey, controller)
+        self.btnGetCoverage.setEnabled(False)
+        self.getCovProgressBar()
+        self.task = QgsTask.fromFunction(
+            f'Get Coverage ({len(urls)} tiles)',
+            *self.getTaskFunctionAndArguments(getPolygonCoverage,
+                                              urls,
+                                              self.cbCoverage.currentText(),
+                                              self.subsetPolygon.asWkt(),
+                                              QgsProject.instance().crs().toWkt(Qgis.CrsWktVariant.Preferred),
+                                              controller),
+            on_finished=self.addRLayer,
+            flags=QgsTask.Flag.CanCancel
+        )
+        self.addCovTask()
 
-        subsetCrs = QgsCoordinateReferenceSystem.fromOgcWmsCrs(switchCrsUriToOpenGis(subsetCrsUri))
+    def getLocalReprojectionCrsWkt(self) -> Optional[str]:
+        """Returns the wkt of the output crs, if the coverage is requested in its native crs and reprojected locally."""
+        outputCrsUri = self.cbCrs.currentData()
+        if not self.cbLocalReprojection.isChecked() or outputCrsUri == self.cbCrs.itemData(0):
+            return None
+        outputCrs = getCrsFromUri(outputCrsUri)
+        if not outputCrs.isValid():
+            logWarnMessage(f'{outputCrsUri} is not known to QGIS, the service reprojects the coverage')
+            return None
+        return outputCrs.toWkt(Qgis.CrsWktVariant.Preferred)
 
-        if mapCrsUri != subsetCrsUri:
+    def getTaskFunctionAndArguments(self, requestFunction: Callable, *args) -> tuple:
+        """Returns the task function and its arguments, wrapped into the local reprojection if it is chosen."""
+        targetCrsWkt = self.getLocalReprojectionCrsWkt()
+        if targetCrsWkt is None:
+            return (requestFunction,) + args
+        return (getLocallyReprojectedCoverage, requestFunction, targetCrsWkt) + args
 
-            logInfoMessage(f"Transforming extent coordinates from {mapCrsUri} to {subsetCrsUri}")
+    def setLocalReprojectionEnabled(self, enabled: bool) -> None:
+        self.settings.setValue(SETTINGS_LOCAL_REPROJECTION, enabled)
 
-            points = []
-            if subsetMode == 'polygon':
-                points.append(QgsPoint(self.requestXMinPolygon, self.requestYMinPolygon))
-                points.append(QgsPoint(self.requestXMinPolygon, self.requestYMaxPolygon))
-                points.append(QgsPoint(self.requestXMaxPolygon, self.requestYMinPolygon))
-                points.append(QgsPoint(self.requestXMaxPolygon, self.requestYMaxPolygon))
+    def getSeedArea(self) -> Optional[QgsGeometry]:
+        """
+        Returns the area of a cache seed (map crs), buffered by the chosen distance: the selected features
+        of the active vector layer, otherwise the drawn polygon or the subset extent. None if there is no area.
+        """
+        layer = iface.activeLayer()
+        if isinstance(layer, QgsVectorLayer) and layer.selectedFeatureCount() > 0:
+            transform = getCoordinateTransform(layer.crs(), QgsProject.instance().crs())
+            geometries = []
+            for feature in layer.selectedFeatures():
+                geometry = QgsGeometry(feature.geometry())
+                geometry.transform(transform)
+                geometries.append(geometry)
+            area = QgsGeometry.unaryUnion(geometries)
+        elif self.cbSetExtentMode.currentData() == 'polygon':
+            if self.subsetPolygon is None:
+                return None
+            area = QgsGeometry(self.subsetPolygon)
+        elif self.requestXMinCanvas is None:
+            return None
+        else:
+            area = QgsGeometry.fromRect(self.getSubsetExtent())
 
-            elif subsetMode == 'canvas':
-                points.append(QgsPoint(self.requestXMinCanvas, self.requestYMinCanvas))
-                points.append(QgsPoint(self.requestXMinCanvas, self.requestYMaxCanvas))
-                points.append(QgsPoint(self.requestXMaxCanvas, self.requestYMinCanvas))
-                points.append(QgsPoint(self.requestXMaxCanvas, self.requestYMaxCanvas))
+        if self.sbSeedBuffer.value() > 0:
+            area = area.buffer(self.sbSeedBuffer.value(), SEED_BUFFER_SEGMENTS)
+        return area
 
-            transformation = QgsCoordinateTransform(mapCrs, subsetCrs, QgsProject.instance())
-            for pt in points:
-                pt.transform(transformation)
+    def seedCache(self) -> None:
+        """
+        Creates a QgsTask filling the coverage cache with the tiles of the seed area at every chosen scale factor,
+        with the current settings of the "Get Coverage" tab.
+        """
+        if isOfflineMode():
+            self.writeToPluginMessageBar('The cache cannot be seeded in offline mode', level=Qgis.MessageLevel.Warning)
+            return
+        if not self.cbUseSubset.isChecked():
+            self.writeToPluginMessageBar('Seeding requires a subset', level=Qgis.MessageLevel.Warning)
+            return
 
-            xValues = [pt.x() for pt in points]
-            xMin = min(xValues)
-            xMax = max(xValues)
+        self.applyPendingUpdates()
+        area = self.getSeedArea()
+        if area is None or area.isEmpty():
+            self.writeToPluginMessageBar('Select features or draw a polygon to seed', level=Qgis.MessageLevel.Warning)
+            return
+        try:
+            scaleFactors = parseScaleFactors(self.leSeedScaleFactors.text())
+            if scaleFactors != [1] and (self.capabilities is None or not self.capabilities.supportsScaling()):
+                raise ValueError('The service does not support the scaling extension, only scale factor 1 can be seeded')
+            tiles = buildSeedTiles(area, self.sbSeedTileSize.value())
+            checkSeedRequestCount(len(tiles) * len(scaleFactors))
+            urls = [setScaleFactor(self.getCovQueryStr(extent=tile)[0], scaleFactor)
+                    for scaleFactor in scaleFactors for tile in tiles]
+        except ValueError as e:
+            self.writeToPluginMessageBar(str(e), level=Qgis.MessageLevel.Warning)
+            logWarnMessage(str(e))
+            return
 
-            yValues = [pt.y() for pt in points]
-            yMin = min(yValues)
-            yMax = max(yValues)
+        # Speculative downloads must not compete with the seed
+        self.prefetcher.cancel()
+        self.btnSeedCache.setEnabled(False)
+        self.seedTask = QgsTask.fromFunction(
+            f'Seed coverage cache ({len(urls)} requests)',
+            seedCoverageCache,
+            urls,
+            self.cbCoverage.currentText(),
+            self.getServiceController(),
+            on_finished=self.onSeedFinished,
+            flags=QgsTask.Flag.CanCancel
+        )
+        QgsApplication.taskManager().addTask(self.seedTask)
 
+    def onSeedFinished(self, exception, result=None) -> None:
+        if isTaskCanceled(exception):
+            self.writeToPluginMessageBar('Seeding canceled', level=Qgis.MessageLevel.Info, duration=5)
+        elif exception:
+            openLog()
+            logWarnMessage(f'Error while seeding the coverage cache: {exception}')
+        elif result:
+            message = f"{result['cached']} of {result['requests']} tiles of {result['coverage']} are available offline"
+            if result['failed']:
+                message += f", {result['failed']} requests failed (see log)"
+            if result['cached'] < result['requests'] and result['cacheFull']:
+                message += ', the coverage cache is full (plugins/simplewcs2/coverage_cache_max_mb)'
+            level = Qgis.MessageLevel.Info if result['cached'] == result['requests'] else Qgis.MessageLevel.Warning
+            self.writeToPluginMessageBar(message, level=level)
+            logInfoMessage(message)
+        self.btnSeedCache.setEnabled(True)
+
+    def exportBundle(self) -> None:
+        """Creates a QgsTask writing the cached responses of the current coverage into a cache bundle."""
+        covId = self.cbCoverage.currentText()
+        filePath, _ = QFileDialog.getSaveFileName(self,
+                                                  'Export cache bundle',
+                                                  f'{covId}-cache.zip',
+                                                  'Cache bundles (*.zip);;All files (*)')
+        if not filePath:
+            return
+        self.btnExportBundle.setEnabled(False)
+        self.bundleTask = QgsTask.fromFunction(
+            f'Export cache bundle ({covId})',
+            exportCacheBundle,
+            filePath,
+            covId,
+            on_finished=self.onBundleExported,
+            flags=QgsTask.Flag.CanCancel
+        )
+        QgsApplication.taskManager().addTask(self.bundleTask)
+
+    def onBundleExported(self, exception, result=None) -> None:
+        if isTaskCanceled(exception):
+            logInfoMessage('Export of the cache bundle canceled')
+        elif exception:
+            self.writeToPluginMessageBar(f'Export failed: {exception}', level=Qgis.MessageLevel.Warning)
+            logWarnMessage(f'Export of the cache bundle failed: {exception}')
         else:
-            if subsetMode == 'polygon':
-                xMin = self.requestXMinPolygon
-                xMax = self.requestXMaxPolygon
-                yMin = self.requestYMinPolygon
-                yMax = self.requestYMaxPolygon
-            else:
-                xMin = self.requestXMinCanvas
-                xMax = self.requestXMaxCanvas
-                yMin = self.requestYMinCanvas
-                yMax = self.requestYMaxCanvas
-
-        # we need to check if QGIS considers the CRS axes "inverted"
-        if not self.cbAxisInversion.isChecked() and subsetCrs.hasAxisInverted():
-        #    # e.g. WGS84 or Gauß-Krüger where "north" (y/lat) comes before "east" (x/lon)
-            subset0 = f"{axisLabel0}({yMin},{yMax})"
-            subset1 = f"{axisLabel1}({xMin},{xMax})"
+            self.writeToPluginMessageBar(f"{result['coverages']} cached coverages exported to {result['path']}",
+                                         level=Qgis.MessageLevel.Info, duration=6)
+        self.btnExportBundle.setEnabled(True)
+
+    def importBundle(self) -> None:
+        """Creates a QgsTask importing a cache bundle into the local caches."""
+        filePath, _ = QFileDialog.getOpenFileName(self,
+                                                  'Import cache bundle',
+                                                  '',
+                                                  'Cache bundles (*.zip);;All files (*)')
+        if not filePath:
+            return
+        self.btnImportBundle.setEnabled(False)
+        self.bundleTask = QgsTask.fromFunction(
+            'Import cache bundle',
+            importCacheBundle,
+            filePath,
+            on_finished=self.onBundleImported,
+            flags=QgsTask.Flag.CanCancel
+        )
+        QgsApplication.taskManager().addTask(self.bundleTask)
+
+    def onBundleImported(self, exception, result=None) -> None:
+        if isTaskCanceled(exception):
+            logInfoMessage('Import of the cache bundle canceled')
+        elif exception:
+            self.writeToPluginMessageBar(f'Import failed: {exception}', level=Qgis.MessageLevel.Warning)
+            logWarnMessage(f'Import of the cache bundle failed: {exception}')
+        elif result['cached'] < result['coverages']:
+            self.writeToPluginMessageBar(f"Only {result['cached']} of {result['coverages']} coverages of the bundle fit "
+                                         'into the coverage cache (plugins/simplewcs2/coverage_cache_max_mb)',
+                                         level=Qgis.MessageLevel.Warning)
         else:
-        #    # any standard x/y, e/n crs, e. g. UTM
-            subset0 = f"{axisLabel0}({xMin},{xMax})"
-            subset1 = f"{axisLabel1}({yMin},{yMax})"
+            self.writeToPluginMessageBar(f"{result['coverages']} coverages and {result['documents']} service documents "
+                                         'imported', level=Qgis.MessageLevel.Info, duration=6)
+            self.showOfflineAreas()
+        self.btnImportBundle.setEnabled(True)
+
+    def getServiceController(self) -> AdaptiveController:
+        """Returns the controller of parallel requests and tile size of the loaded service, initialized from the saved tuning."""
+        tuning = ServiceTuning(concurrency=INITIAL_CONCURRENCY,
+                               tilesPerSide=self.settings.value(SETTINGS_POLYGON_TILES_PER_SIDE,
+                                                                DEFAULT_POLYGON_TILES_PER_SIDE, type=int))
+        serviceId = self.serviceRegistry.findService(*self.loadedServiceKey)
+        savedTuning = self.serviceRegistry.getTuning(serviceId) if serviceId is not None else None
+        if savedTuning:
+            tuning = ServiceTuning(concurrency=savedTuning['concurrency'], tilesPerSide=savedTuning['tiles_per_side'])
+        return getAdaptiveController('|'.join(self.loadedServiceKey), tuning)
+
+    def saveServiceTuning(self) -> None:
+        """Saves the tuning learned by the finished request, if its service is a saved service."""
+        if self.tunedService is None:
+            return
+        serviceKey, controller = self.tunedService
+        self.tunedService = None
+        serviceId = self.serviceRegistry.findService(*serviceKey)
+        if serviceId is not None:
+            tuning = controller.getTuning()
+            self.serviceRegistry.setTuning(serviceId, tuning.concurrency, tuning.tilesPerSide)
+
+    @profiled('compute_subset')
+    def getSubsets(self,
+                   covId: str,
+                   mapCrs: QgsCoordinateReferenceSystem,
+                   subsetCrsUri: str,
+                   extent: QgsRectangle) -> Tuple[str, str]:
+        """
+        Creates the subset string for the get coverage request of an extent (in map crs), see buildSubsets.
+        Optional: User can deactivate the inversion, as some services might not have implemented the inverted axis order.
+        """
+        coverageInformation = self.describeCov.coverageInformation[covId]
+        return buildSubsets(extent, mapCrs, subsetCrsUri, coverageInformation.nativeCrs, coverageInformation.axisLabels,
+                            ignoreAxisInversion=self.cbAxisInversion.isChecked(),
+                            gridAxes=coverageInformation.gridAxes)
+
+    def getSubsetExtent(self) -> QgsRectangle:
+        """Returns the subset extent (in map crs) of the current extent mode."""
+        if self.cbSetExtentMode.currentData() == 'polygon':
+            return QgsRectangle(self.requestXMinPolygon, self.requestYMinPolygon,
+                                self.requestXMaxPolygon, self.requestYMaxPolygon)
+        return QgsRectangle(self.requestXMinCanvas, self.requestYMinCanvas,
+                            self.requestXMaxCanvas, self.requestYMaxCanvas)
+
+    def setPrefetchEnabled(self, enabled: bool) -> None:
+        self.settings.setValue(SETTINGS_PREFETCH_ENABLED, enabled)
+        self.prefetcher.setEnabled(enabled and not isOfflineMode())
+
+    def setOfflineModeEnabled(self, enabled: bool) -> None:
+        """Switches between requests to the services and the local caches, the prefetch is paused while offline."""
+        setOfflineMode(enabled)
+        self.prefetcher.setEnabled(self.cbPrefetch.isChecked() and not enabled)
+        self.showOfflineAreas()
+
+    def buildPrefetchRequest(self, extent: QgsRectangle) -> Optional[Tuple[str, str]]:
+        """
+        Returns url and coverage id of the GetCoverage request that "Get Coverage" would send for the extent,
+        None if the current settings do not request a canvas extent.
+        """
+        if (self.capabilities is None or self.describeCov is None
+                or not self.cbCoverage.currentText()
+                or not self.cbUseSubset.isChecked()
+                or self.cbSetExtentMode.currentData() != 'canvas'):
+            return None
+        try:
+            return self.getCovQueryStr(extent=extent)
+        except (ValueError, KeyError) as e:
+            logInfoMessage(f'No prefetch request for this extent: {e}')
+            return None
 
-        return subset0, subset1
+    def isGeoTiffExtensionSupported(self) -> bool:
+        return self.capabilities is not None and supportsGeoTiffExtension(self.capabilities.profiles)
+
+    def adjustGeoTiffPredictor(self) -> None:
+        """A predictor can only be chosen for Deflate and LZW compression."""
+        self.cbGeoTiffPredictor.setEnabled(self.cbGeoTiffCompression.currentText() in (COMPRESSION_AUTOMATIC,
+                                                                                        'Deflate', 'LZW'))
+
+    def saveGeoTiffEncoding(self) -> None:
+        self.adjustGeoTiffPredictor()
+        self.settings.setValue(SETTINGS_GEOTIFF_COMPRESSION, self.cbGeoTiffCompression.currentText())
+        self.settings.setValue(SETTINGS_GEOTIFF_PREDICTOR, self.cbGeoTiffPredictor.currentText())
+        self.settings.setValue(SETTINGS_GEOTIFF_TILING, self.cbGeoTiffTiling.isChecked())
+
+    def getGeoTiffEncodingParams(self) -> List[Tuple[str, str]]:
+        """Returns the encoding parameters of the GeoTIFF extension, if the service supports it."""
+        if self.capabilities is None:
+            return []
+        return getEncodingParams(self.capabilities.profiles,
+                                 self.cbFormat.currentText(),
+                                 self.cbGeoTiffCompression.currentText(),
+                                 self.cbGeoTiffPredictor.currentText(),
+                                 self.cbGeoTiffTiling.isChecked())
 
     def getNativeCoverageCrsUri(self) -> str:
         """Retrieves a the native crs of a coverage from describe coverage response."""
@@ -1010,9 +1623,11 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
             coverageCrsUri = switchCrsUriToOpenGis(coverageCrsUri)
         return coverageCrsUri
 
-    def getCovQueryStr(self) -> None:
+    def getCovQueryStr(self, extent: Optional[QgsRectangle] = None, stackPosition: Optional[str] = None) -> Tuple[str, str]:
         """
         Returns a query string for an GetCoverage request with the current dialog settings.
+        extent (in map crs) replaces the subset extent of the dialog, if given.
+        stackPosition replaces the position of the chosen time or elevation axis, if given.
 
         Raises:
             ValueError: If a OGC URI string could not be created for the map CRS
@@ -1026,11 +1641,16 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         # Output and subset CRS must be one of the CRS offered by the service (as OGC URI), chosen by the user in the dialog
         outputCrsUri = self.cbCrs.currentData()
         subsetCrsUri = self.cbSubsetCrs.currentData()
+        if self.getLocalReprojectionCrsWkt() is not None:
+            # Native responses are reprojected by getLocallyReprojectedCoverage and cached for every output crs
+            outputCrsUri = self.cbCrs.itemData(0)
 
         format = self.cbFormat.currentText()
 
         if self.cbUseSubset.isChecked():
-            subset0, subset1 = self.getSubsets(covId=covId, mapCrs=mapCrs, subsetCrsUri=subsetCrsUri)
+            if extent is None:
+                extent = self.getSubsetExtent()
+            subset0, subset1 = self.getSubsets(covId=covId, mapCrs=mapCrs, subsetCrsUri=subsetCrsUri, extent=extent)
             params = [
                 ('REQUEST', 'GetCoverage'),
                 ('SERVICE', 'WCS'),
@@ -1051,6 +1671,9 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
                 ('OUTPUTCRS', outputCrsUri),
                 ('FORMAT', format)
             ]
+        params += [('SUBSET', subset) for subset in self.getExtraAxisSubsets(stackPosition)]
+        params += self.getRangeSubsetParams()
+        params += self.getGeoTiffEncodingParams()
 
         querystring = urllib.parse.urlencode(params)
 
@@ -1064,88 +1687,251 @@ class SimpleWCSDialog(BASE, GENERATED_CLASS):
         self.progress = QProgressBar()
         self.progress.setRange(0, 0)
         self.progress.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+        self.progressLabel = QLabel()
 
         progressMessageBar = iface.messageBar().createMessage("GetCoverage Request")
         progressMessageBar.layout().addWidget(self.progress)
+        progressMessageBar.layout().addWidget(self.progressLabel)
         iface.messageBar().pushWidget(progressMessageBar, Qgis.MessageLevel.Info)
 
-    def checkUrlSyntax(self, url: str) -> str:
-        if '?' in url:
-            if url.endswith('?'):
-                newUrl = url
-            elif url.endswith('&'):
-                newUrl = url
+        self.transferProgress = TransferProgress()
+        self.progressTimer.start()
+
+    def addCovTask(self) -> None:
+        """Starts the get coverage task, its transfers report their progress to the progress bar."""
+        self.task.transferProgress = self.transferProgress
+        QgsApplication.taskManager().addTask(self.task)
+
+    def updateCovProgressBar(self) -> None:
+        """Shows bytes received, throughput and ETA; a spinner while the size of the response is unknown."""
+        snapshot = self.transferProgress.snapshot()
+        try:
+            if snapshot.fraction is None:
+                self.progress.setRange(0, 0)
             else:
-                newUrl = url + '&'
-        else:
-            newUrl = url + '?'
+                self.progress.setRange(0, 1000)
+                self.progress.setValue(int(snapshot.fraction * 1000))
+            self.progressLabel.setText(snapshot.format() if snapshot.receivedBytes else '')
+        except RuntimeError:
+            # the message was closed by the user
+            self.progressTimer.stop()
+
+    def stopCovProgressBar(self) -> None:
+        self.progressTimer.stop()
+        self.transferProgress = None
+        iface.messageBar().clearWidgets()
 
-        return newUrl
+    def checkUrlSyntax(self, url: str) -> str:
+        return checkUrlSyntax(url)
 
     def enableBtnGetCapabilities(self) -> None:
         """Enables GetCapabilities button if a wcs service url is entered"""
-        self.btnGetCapabilities.setEnabled(len(self.leBaseUrl.text().strip()) > 0)
+        self.btnGetCapabilities.setEnabled(len(self.leBaseUrl.text().strip()) > 0 and not self.serviceLoading)
 
     def enableBtnGetCoverage(self) -> None:
         self.btnGetCoverage.setEnabled(True)
 
+    @profiled('add_layer')
     def addRLayer(self, exception, result=None) -> None:
         """
         Add the response layer to MapCanvas.
         Works only with QgsTask if this function is global...
-        :param exception: useless
+        A canceled or failed task releases the ui, the partial response is already removed.
         """
-        if exception:
-            raise exception
-        if result:
-            newFile = QgsProcessingUtils.generateTempFilename('wcs')
-            with open(newFile, 'wb') as fl:
-                fl.write(result['file'])
-            rlayer = QgsRasterLayer(newFile, result['coverage'], 'gdal')
+        if isTaskCanceled(exception):
+            logInfoMessage('Get Coverage canceled')
+        elif isinstance(exception, OwsException):
+            self.showOwsException(exception)
+        elif isinstance(exception, OfflineException):
+            self.writeToPluginMessageBar(str(exception), level=Qgis.MessageLevel.Warning)
+            self.showOfflineAreas()
+        elif exception:
+            openLog()
+            logWarnMessage(f'Error while loading Coverage: {exception}')
+        elif result:
+            rlayer = QgsRasterLayer(result['path'], result['coverage'], 'gdal')
             QgsProject.instance().addMapLayer(rlayer)
+            savings = result.get('encodingSavings')
+            if savings:
+                self.writeToPluginMessageBar(formatEncodingSavings(*savings), level=Qgis.MessageLevel.Info, duration=5)
+            if result.get('partial'):
+                self.writeToPluginMessageBar('Only parts of the requested area are available offline',
+                                             level=Qgis.MessageLevel.Warning)
+                self.showOfflineAreas()
 
         else:
             openLog()
             logWarnMessage('Error while loading Coverage!')
 
+        self.saveServiceTuning()
         self.enableBtnGetCoverage()
-        iface.messageBar().clearWidgets()
+        self.stopCovProgressBar()
 
-    def writeToPluginMessageBar(self, msg: str, level=Qgis.MessageLevel.Warning, duration=0) -> None:
-        self.messageBar.pushMessage(msg, level=level, duration=duration)
+    @profiled('add_layer')
+    def addStackLayers(self, exception, result=None) -> None:
+        """
+        Adds the result of a stack request: the VRT as one layer or every slice as a layer of a group.
+        Slices of a temporal axis are shown by the temporal controller.
+        """
+        if isTaskCanceled(exception):
+            logInfoMessage('Get Coverage canceled')
+        elif isinstance(exception, OwsException):
+            self.showOwsException(exception)
+        elif isinstance(exception, OfflineException):
+            self.writeToPluginMessageBar(str(exception), level=Qgis.MessageLevel.Warning)
+            self.showOfflineAreas()
+        elif exception:
+            openLog()
+            logWarnMessage(f'Error while loading Coverage: {exception}')
+        elif not result:
+            openLog()
+            logWarnMessage('Error while loading Coverage!')
+        elif 'path' in result:
+            QgsProject.instance().addMapLayer(QgsRasterLayer(result['path'], result['coverage'], 'gdal'))
+        else:
+            group = QgsProject.instance().layerTreeRoot().insertGroup(0, result['coverage'])
+            slices = result['slices']
+            for index, (position, path) in enumerate(slices):
+                rlayer = QgsRasterLayer(path, f"{result['coverage']} {result['axis']}={position}", 'gdal')
+                nextPosition = slices[index + 1][0] if index + 1 < len(slices) else position
+                self.setSliceTemporalRange(rlayer, position, nextPosition)
+                QgsProject.instance().addMapLayer(rlayer, False)
+                group.addLayer(rlayer)
+
+        self.saveServiceTuning()
+        self.enableBtnGetCoverage()
+        self.stopCovProgressBar()
 
+    def setSliceTemporalRange(self, rlayer: QgsRasterLayer, position: str, nextPosition: str) -> None:
+        """Activates the temporal properties of a slice layer, if its positions are dates."""
+        begin = QDateTime.fromString(position, Qt.DateFormat.ISODateWithMs)
+        end = QDateTime.fromString(nextPosition, Qt.DateFormat.ISODateWithMs)
+        if not begin.isValid():
+            return
+        temporalProperties = rlayer.temporalProperties()
+        temporalProperties.setMode(QgsRasterLayerTemporalProperties.TemporalMode.ModeFixedTemporalRange)
+        temporalProperties.setFixedTemporalRange(QgsDateTimeRange(begin, end if end.isValid() else begin,
+                                                                  True, end == begin or not end.isValid()))
+        temporalProperties.setIsActive(True)
+
+    def showOwsException(self, exception: OwsException) -> None:
+        """Shows the exception report of a failed GetCoverage request."""
+        message = f'Service error: {exception}'
+        if exception.category == OWS_EXCEPTION_SIZE_LIMIT:
+            message += ' (the request could not be split further, please choose a smaller extent)'
+        self.writeToPluginMessageBar(message, level=Qgis.MessageLevel.Warning)
+        logWarnMessage(message)
+
+    def showMemoryUsage(self, usedBytes: int, limitBytes: int, spilledCount: int) -> None:
+        """Shows the memory held by responses (signal of the memory budget, also emitted from tasks)."""
+        usedMb = usedBytes / (1024 * 1024)
+        limitMb = limitBytes / (1024 * 1024)
+        self.lblMemoryUsage.setText(f'Responses in memory: {usedMb:.1f} of {limitMb:.0f} MB, '
+                                    f'{spilledCount} spilled to disk')
+
+    def getCatalog(self) -> CoverageCatalog:
+        """Opens the local coverage catalog on first use."""
+        if not self.catalog:
+            self.catalog = CoverageCatalog()
+        return self.catalog
+
+    def searchCatalog(self) -> None:
+        """Lists the catalog entries matching the search text (and the map extent, if checked)."""
+        extent = None
+        if self.cbCatalogMapExtent.isChecked():
+            wgsTransform = getCoordinateTransform(QgsProject.instance().crs(), getCrsFromUri('EPSG:4326'))
+            try:
+                wgsExtent = wgsTransform.transformBoundingBox(iface.mapCanvas().extent())
+                extent = (wgsExtent.xMinimum(), wgsExtent.yMinimum(), wgsExtent.xMaximum(), wgsExtent.yMaximum())
+            except Exception as e:
+                logWarnMessage(f'Map extent could not be transformed to WGS84: {e}')
+
+        catalog = self.getCatalog()
+        try:
+            entries = catalog.search(self.leCatalogSearch.text(), extent)
+        except sqlite3.Error as e:
+            logWarnMessage(f'Catalog search failed: {e}')
+            self.lblCatalogStatus.setText(f'Search failed: {e}')
+            return
 
-def getCoverage(task, urlGetCoverage: str, covId: str) -> dict:
-    """Requests get coverage using QgsNetworkAccessManager"""
-    logInfoMessage('Requested URL: ' + urlGetCoverage)
-    try:
-        networkManager = QgsNetworkAccessManager()
-        resultGetCoverage = networkManager.blockingGet(QNetworkRequest(QUrl(urlGetCoverage)))
-        replyContent = resultGetCoverage.content()
-    except HTTPError as e:
-        logWarnMessage(str(e))
-        logWarnMessage(str(e.read().decode()))
-        return None
-    except URLError as e:
-        logWarnMessage(str(e))
-        logWarnMessage(str(e.read().decode()))
-        return None
-    except:
-        return None
-    try:
-        replyString = bytes(replyContent).decode()
-        root = ET.fromstring(replyString) # nosec
-        coverageXmlMainTag = root.tag
-        if 'ExceptionReport' in coverageXmlMainTag:
-            return None
-    except:
-        return {'file': replyContent, 'coverage': covId}
+        self.lwCatalogResults.clear()
+        for entry in entries:
+            label = entry.coverageId
+            if entry.title and entry.title != entry.coverageId:
+                label += f' - {entry.title}'
+            item = QListWidgetItem(f'{label}\n    {entry.serviceTitle or entry.serviceUrl}')
+            item.setToolTip(f'{entry.serviceUrl} [{entry.version}]\n{", ".join(entry.crs)}')
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self.lwCatalogResults.addItem(item)
+
+        coverageCount = catalog.countCoverages()
+        if coverageCount:
+            self.lblCatalogStatus.setText(f'{len(entries)} of {coverageCount} coverages')
+        else:
+            self.lblCatalogStatus.setText('Catalog is empty: refresh it to harvest all saved services')
+        self.updateCatalogButtons()
 
+    def updateCatalogButtons(self) -> None:
+        self.btnOpenCatalogEntry.setEnabled(self.lwCatalogResults.currentItem() is not None and not self.serviceLoading)
+        self.btnHarvestCatalog.setEnabled(self.harvestTask is None)
+
+    def harvestCatalog(self) -> None:
+        """Refreshes the catalog from all saved services in a background task."""
+        if not self.savedServices:
+            self.writeToPluginMessageBar('There are no saved WCS services to harvest.',
+                                         level=Qgis.Warning,
+                                         duration=4)
+            return
 
-def sendRequest(request: str) -> str:
-    networkManager = QgsNetworkAccessManager.instance()
-    request = QNetworkRequest(QUrl(request))
-    reply = networkManager.blockingGet(request)
-    replyContent = reply.content()
-    reply = bytes(replyContent).decode()
-    return reply
+        self.harvestTask = CatalogHarvestTask([dict(service) for service in self.savedServices])
+        self.harvestTask.taskCompleted.connect(self.onCatalogHarvestFinished)
+        self.harvestTask.taskTerminated.connect(self.onCatalogHarvestFinished)
+        self.harvestTask.progressChanged.connect(
+            lambda progress: self.lblCatalogStatus.setText(f'Harvesting saved services: {progress:.0f} %'))
+        QgsApplication.taskManager().addTask(self.harvestTask)
+        self.updateCatalogButtons()
+
+    def onCatalogHarvestFinished(self) -> None:
+        harvestTask = self.harvestTask
+        self.harvestTask = None
+        if harvestTask is None:
+            return
+
+        infoMessage = f'Catalog: {harvestTask.harvestedCount} of {len(harvestTask.services)} services harvested.'
+        if harvestTask.failedServices:
+            infoMessage += ' See log for failed services.'
+        self.writeToPluginMessageBar(infoMessage,
+                                     level=Qgis.Warning if harvestTask.failedServices else Qgis.Info,
+                                     duration=6)
+        self.searchCatalog()
+
+    def openCatalogEntry(self) -> None:
+        """Loads the service of the selected catalog entry and selects its coverage in the "Get Coverage" tab."""
+        item = self.lwCatalogResults.currentItem()
+        if item is None or self.serviceLoading:
+            return
+        entry: CatalogEntry = item.data(Qt.ItemDataRole.UserRole)
+
+        savedIndex = self.savedServiceIndexById.get(self.serviceRegistry.findService(entry.serviceUrl, entry.version))
+        if savedIndex is not None:
+            self.refreshSavedServicesCombo(selectedIndex=savedIndex)
+        else:
+            self.leServiceName.setText(entry.serviceTitle)
+            self.leBaseUrl.setText(entry.serviceUrl)
+            versionIndex = self.cbVersion.findText(entry.version)
+            if versionIndex >= 0:
+                self.cbVersion.setCurrentIndex(versionIndex)
+
+        self.adjustGetCoverageAndInformationTabsToService()
+
+        coverageIndex = self.cbCoverage.findText(entry.coverageId)
+        if coverageIndex < 0:
+            self.writeToPluginMessageBar(f'Coverage {entry.coverageId} is no longer offered by the service.',
+                                         level=Qgis.Warning,
+                                         duration=6)
+            return
+        self.cbCoverage.setCurrentIndex(coverageIndex)
+        self.tabWidget.setCurrentWidget(self.tabGetCoverage)
+
+    def writeToPluginMessageBar(self, msg: str, level=Qgis.MessageLevel.Warning, duration=0) -> None:
+        self.messageBar.pushMessage(msg, level=level, duration=duration)
@@ -0,0 +1,113 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+from dataclasses import dataclass
+from typing import List, Optional
+
+from osgeo import gdal
+from qgis.PyQt.QtCore import QDateTime, Qt
+from qgis.core import QgsProcessingUtils
+
+from .adaptive_concurrency import AdaptiveController
+from .coverage import AxisInformation
+from .network import getCoverages
+
+
+STACK_MODE_SINGLE = 'single'
+STACK_MODE_VRT = 'vrt'
+STACK_MODE_LAYERS = 'layers'
+
+
+@dataclass
+class StackSlice:
+    position: str
+    url: str
+
+
+def formatAxisPosition(axis: AxisInformation, position: str) -> str:
+    """Returns a position as used in a SUBSET parameter, temporal positions are quoted."""
+    return f'"{position}"' if axis.isTemporal else position
+
+
+def buildSliceSubset(axis: AxisInformation, position: str) -> str:
+    return f'{axis.label}({formatAxisPosition(axis, position)})'
+
+
+def getPositionSortKey(axis: AxisInformation, position: str):
+    """
+    Returns the sort key of a position: its value on numeric axes, its time on temporal axes
+    (ISO 8601 positions differ in precision and time zone, so they do not sort as strings).
+    Temporal positions that are not ISO 8601 dates sort after the dates, as strings.
+    """
+    if not axis.isTemporal:
+        return float(position)
+    dateTime = QDateTime.fromString(position, Qt.DateFormat.ISODateWithMs)
+    if dateTime.isValid():
+        return 0, dateTime.toMSecsSinceEpoch(), ''
+    return 1, 0, position
+
+
+def selectAxisPositions(axis: AxisInformation, fromPosition: str, toPosition: str) -> List[str]:
+    """
+    Returns the known slice positions of the axis between fromPosition and toPosition (inclusive), in ascending order.
+    Raises:
+        ValueError, if a position of a numeric axis is not a number
+    """
+    lower, upper = sorted((getPositionSortKey(axis, fromPosition), getPositionSortKey(axis, toPosition)))
+    return sorted((position for position in axis.positions if lower <= getPositionSortKey(axis, position) <= upper),
+                  key=lambda position: getPositionSortKey(axis, position))
+
+
+def getCoverageStack(task,
+                     slices: List[StackSlice],
+                     covId: str,
+                     axisLabel: str,
+                     mode: str,
+                     controller: Optional[AdaptiveController] = None) -> Optional[dict]:
+    """
+    Requests the slices of a stack concurrently (through the coverage cache, like single requests).
+    Returns the coverage id, the axis label and
+    - the path of a VRT with one band per slice (mode STACK_MODE_VRT)
+    - the positions and paths of the slices (mode STACK_MODE_LAYERS)
+    Slices that could not be loaded are left out. Canceling the task aborts all transfers.
+    The controller of the service, if given, adjusts the number of parallel requests.
+    Raises:
+        RequestCanceledException
+        RuntimeError, if GDAL could not combine the slices into a VRT
+    """
+    paths = getCoverages(task, [stackSlice.url for stackSlice in slices], covId, controller)
+    loadedSlices = [(stackSlice.position, paths[stackSlice.url]) for stackSlice in slices
+                    if stackSlice.url in paths]
+    if not loadedSlices:
+        return None
+
+    result = {'coverage': covId, 'axis': axisLabel}
+    if mode == STACK_MODE_VRT:
+        result['path'] = buildStackVrt(loadedSlices)
+    else:
+        result['slices'] = loadedSlices
+    return result
+
+
+def buildStackVrt(loadedSlices: List[tuple]) -> str:
+    """
+    Combines the first band of every slice into one VRT, band descriptions are the slice positions.
+    Raises:
+        RuntimeError, if GDAL could not combine the slices
+    """
+    vrtPath = QgsProcessingUtils.generateTempFilename('wcs_stack.vrt')
+    options = gdal.BuildVRTOptions(separate=True, bandList=[1])
+    dataset = gdal.BuildVRT(vrtPath, [path for _, path in loadedSlices], options=options)
+    if dataset is None:
+        raise RuntimeError(f'Slices could not be combined: {gdal.GetLastErrorMsg()}')
+    for bandIndex, (position, _) in enumerate(loadedSlices, start=1):
+        dataset.GetRasterBand(bandIndex).SetDescription(position)
+    dataset = None
+    return vrtPath
@@ -0,0 +1,135 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import time
+
+import pytest
+
+from .. import network
+from ..adaptive_concurrency import (MAX_CONCURRENCY,
+                                    MAX_TILES_PER_SIDE,
+                                    MIN_CONCURRENCY,
+                                    MIN_TILES_PER_SIDE,
+                                    AdaptiveController,
+                                    ServiceTuning)
+from ..custom_exceptions import OwsException, RequestCanceledException
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the monotonic clock by a clock that only advances when the test sets it."""
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+def runWindow(controller: AdaptiveController, clock: list, bytesPerRequest: int, failed: bool = False) -> int:
+    """Runs as many requests as allowed in parallel for one second, returns the concurrency afterwards."""
+    requests = controller.concurrency
+    for _ in range(requests):
+        controller.acquireSlot()
+    clock[0] += 1.0
+    for index in range(requests):
+        controller.releaseSlot(0 if failed else bytesPerRequest, 1.0, failed=failed and index == 0)
+    return controller.concurrency
+
+
+def testTuningIsLimitedToBounds():
+    controller = AdaptiveController(ServiceTuning(concurrency=100, tilesPerSide=0))
+    assert controller.getTuning() == ServiceTuning(concurrency=MAX_CONCURRENCY, tilesPerSide=MIN_TILES_PER_SIDE)
+    controller = AdaptiveController(ServiceTuning(concurrency=0, tilesPerSide=100))
+    assert controller.getTuning() == ServiceTuning(concurrency=MIN_CONCURRENCY, tilesPerSide=MAX_TILES_PER_SIDE)
+
+
+def testConcurrencyIncreasesAdditivelyWithThroughput(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=2, tilesPerSide=4))
+    assert [runWindow(controller, clock, MB) for _ in range(3)] == [3, 4, 5]
+
+
+def testConcurrencyStaysWithoutClearGainOfThroughput(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=2, tilesPerSide=4))
+    assert runWindow(controller, clock, MB) == 3
+    # 3 MB/s in both windows
+    assert runWindow(controller, clock, MB) == 4
+    assert runWindow(controller, clock, 3 * MB // 4) == 4
+
+
+def testConcurrencyIsHalvedOnErrors(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=MAX_CONCURRENCY, tilesPerSide=4))
+    assert [runWindow(controller, clock, MB, failed=True) for _ in range(5)] == [4, 2, 1, 1, 1]
+
+
+def testConcurrencyIsHalvedOnDropOfThroughput(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=4, tilesPerSide=4))
+    assert runWindow(controller, clock, MB) == 5
+    # 2.5 MB/s is less than 70 % of 4 MB/s
+    assert runWindow(controller, clock, MB // 2) == 2
+
+
+def testConcurrencyIsLimitedToMaximum(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=MAX_CONCURRENCY - 1, tilesPerSide=4))
+    assert [runWindow(controller, clock, bytesPerRequest * MB) for bytesPerRequest in (1, 2, 4)] == [
+        MAX_CONCURRENCY, MAX_CONCURRENCY, MAX_CONCURRENCY]
+
+
+def testConcurrencySequence(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=2, tilesPerSide=4))
+    windows = [(MB, False), (MB, False), (3 * MB // 4, False), (MB, True), (MB // 2, False), (4 * MB, False)]
+    assert [runWindow(controller, clock, size, failed) for size, failed in windows] == [3, 4, 4, 2, 1, 2]
+
+
+def respondWithoutCoverage(task, url, covId):
+    # e.g. 429 or 503 with an html page
+    return None
+
+
+def respondWithException(task, url, covId):
+    raise OwsException('NoApplicableCode', 'Service temporarily unavailable')
+
+
+@pytest.mark.parametrize('getCoverage', [respondWithoutCoverage, respondWithException])
+def testControlledCoverageBacksOffOnFailedRequests(clock, monkeypatch, getCoverage):
+    monkeypatch.setattr(network, 'getCoverage', getCoverage)
+    controller = AdaptiveController(ServiceTuning(concurrency=2, tilesPerSide=4))
+    for _ in range(2):
+        try:
+            network.getControlledCoverage(None, 'https://example.com/wcs', 'dgm', controller)
+        except OwsException:
+            pass
+    assert controller.concurrency == 1
+    assert controller.running == 0
+
+
+def testCanceledRequestsDoNotChangeConcurrency(clock, monkeypatch):
+    def cancel(task, url, covId):
+        raise RequestCanceledException('Request canceled')
+
+    monkeypatch.setattr(network, 'getCoverage', cancel)
+    controller = AdaptiveController(ServiceTuning(concurrency=1, tilesPerSide=4))
+    for _ in range(3):
+        with pytest.raises(RequestCanceledException):
+            network.getControlledCoverage(None, 'https://example.com/wcs', 'dgm', controller)
+    assert (controller.concurrency, controller.running, controller.windowCount) == (1, 0, 0)
+
+
+def testTileSizeFollowsRequestDuration(clock):
+    controller = AdaptiveController(ServiceTuning(concurrency=1, tilesPerSide=4))
+    controller.acquireSlot()
+    controller.releaseSlot(MB, 30.0)
+    controller.adjustTileSize()
+    assert controller.tilesPerSide == 5
+
+    for _ in range(10):
+        controller.acquireSlot()
+        controller.releaseSlot(MB, 0.5)
+    controller.adjustTileSize()
+    assert controller.tilesPerSide == 4
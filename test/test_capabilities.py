@@ -0,0 +1,57 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import xml.etree.ElementTree as ET # nosec
+
+from ..capabilities import Capabilities, CoverageSummaryDiff, compareCoverageSummaries
+
+
+def buildCapabilities(coverages: dict) -> Capabilities:
+    """Returns the capabilities of a service with the coverages, given by id with lower and upper corner."""
+    coverageSummaries = ''.join(f"""
+                <wcs:CoverageSummary>
+                    <wcs:CoverageId>{covId}</wcs:CoverageId>
+                    <ows:WGS84BoundingBox>
+                        <ows:LowerCorner>{lowerCorner}</ows:LowerCorner>
+                        <ows:UpperCorner>{upperCorner}</ows:UpperCorner>
+                    </ows:WGS84BoundingBox>
+                </wcs:CoverageSummary>""" for covId, (lowerCorner, upperCorner) in coverages.items())
+    return Capabilities(ET.fromstring(f"""
+        <wcs:Capabilities xmlns:wcs="http://www.opengis.net/wcs/2.0" xmlns:ows="http://www.opengis.net/ows/2.0">
+            <ows:ServiceIdentification>
+                <ows:Title>DGM</ows:Title>
+                <ows:ServiceTypeVersion>2.0.1</ows:ServiceTypeVersion>
+            </ows:ServiceIdentification>
+            <wcs:ServiceMetadata>
+                <wcs:formatSupported>image/tiff</wcs:formatSupported>
+            </wcs:ServiceMetadata>
+            <wcs:Contents>{coverageSummaries}
+            </wcs:Contents>
+        </wcs:Capabilities>""")) # nosec
+
+
+def testCompareCoverageSummaries():
+    previous = buildCapabilities({'dgm': ('11.2 51.3', '14.8 53.6'),
+                                  'dom': ('11.2 51.3', '14.8 53.6'),
+                                  'dop': ('11.2 51.3', '14.8 53.6')})
+    current = buildCapabilities({'dgm': ('11.2 51.3', '14.8 53.6'),
+                                 'dom': ('11.2 51.3', '14.9 53.6'),
+                                 'bdom': ('11.2 51.3', '14.8 53.6')})
+    diff = compareCoverageSummaries(previous.coverageSummary, current.coverageSummary)
+    assert diff == CoverageSummaryDiff(added={'bdom'}, removed={'dop'}, changed={'dom'})
+    assert not diff.isEmpty()
+
+
+def testCompareEqualCoverageSummaries():
+    coverages = {'dgm': ('11.2 51.3', '14.8 53.6'), 'dom': ('11.2 51.3', '14.8 53.6')}
+    diff = compareCoverageSummaries(buildCapabilities(coverages).coverageSummary,
+                                    buildCapabilities(dict(reversed(coverages.items()))).coverageSummary)
+    assert diff == CoverageSummaryDiff()
+    assert diff.isEmpty()
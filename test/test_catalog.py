@@ -0,0 +1,51 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import pytest
+
+from ..catalog import CatalogEntry, CoverageCatalog, buildFullTextQuery
+
+
+@pytest.fixture
+def catalog():
+    catalog = CoverageCatalog(':memory:')
+    catalog.replaceService('https://example.com/wcs', '2.0.1', 'Example service', [
+        CatalogEntry(serviceUrl='https://example.com/wcs', version='2.0.1', serviceTitle='Example service',
+                     coverageId='dgm1_brandenburg', title='DGM1 Brandenburg',
+                     crs=['http://www.opengis.net/def/crs/EPSG/0/25833'], footprint=(11.2, 51.3, 14.8, 53.6)),
+        CatalogEntry(serviceUrl='https://example.com/wcs', version='2.0.1', serviceTitle='Example service',
+                     coverageId='dop20', title='Orthophotos', footprint=(5.0, 47.0, 6.0, 48.0)),
+    ])
+    yield catalog
+    catalog.close()
+
+
+def testBuildFullTextQueryPrefixesEveryWord():
+    assert buildFullTextQuery('DGM1 Brandenburg') == '"dgm1"* "brandenburg"*'
+
+
+@pytest.mark.parametrize('searchText', ['', '   ', '-', '(', '*', '"', '- ( *'])
+def testBuildFullTextQueryWithoutWordsIsEmpty(searchText):
+    assert buildFullTextQuery(searchText) == ''
+
+
+def testSearchByWords(catalog):
+    assert [entry.coverageId for entry in catalog.search('dgm brand')] == ['dgm1_brandenburg']
+
+
+@pytest.mark.parametrize('searchText', ['-', '(', '*', '"', 'dgm -'])
+def testSearchWithoutWordsDoesNotFail(catalog, searchText):
+    entries = catalog.search(searchText)
+    expected = {'dgm1_brandenburg'} if 'dgm' in searchText else {'dgm1_brandenburg', 'dop20'}
+    assert {entry.coverageId for entry in entries} == expected
+
+
+def testSearchByExtent(catalog):
+    assert [entry.coverageId for entry in catalog.search('-', extent=(13.0, 52.0, 13.5, 52.5))] == ['dgm1_brandenburg']
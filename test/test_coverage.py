@@ -0,0 +1,126 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import xml.etree.ElementTree as ET # nosec
+
+import pytest
+
+from ..coverage import GRID_SNAP_TOLERANCE, DescribeCoverage, GridAxis, getRangeSubsetParams
+
+
+def buildDescribeCoverage(srsName: str, axisLabels: str, lowerCorner: str, upperCorner: str,
+                          origin: str, offsetVectors: list, rangeType: str = '') -> DescribeCoverage:
+    offsetVectorElements = ''.join(f'<gml:offsetVector>{offsets}</gml:offsetVector>' for offsets in offsetVectors)
+    return DescribeCoverage(ET.ElementTree(ET.fromstring(f"""
+        <wcs:CoverageDescriptions xmlns:wcs="http://www.opengis.net/wcs/2.0" xmlns:gml="http://www.opengis.net/gml/3.2"
+                                  xmlns:gmlcov="http://www.opengis.net/gmlcov/1.0" xmlns:swe="http://www.opengis.net/swe/2.0">
+            <wcs:CoverageDescription gml:id="dgm">
+                <gml:boundedBy>
+                    <gml:Envelope srsName="{srsName}" axisLabels="{axisLabels}">
+                        <gml:lowerCorner>{lowerCorner}</gml:lowerCorner>
+                        <gml:upperCorner>{upperCorner}</gml:upperCorner>
+                    </gml:Envelope>
+                </gml:boundedBy>
+                <gml:domainSet>
+                    <gml:RectifiedGrid gml:id="grid" dimension="{len(axisLabels.split())}">
+                        <gml:origin><gml:Point gml:id="origin"><gml:pos>{origin}</gml:pos></gml:Point></gml:origin>
+                        {offsetVectorElements}
+                    </gml:RectifiedGrid>
+                </gml:domainSet>
+                {rangeType}
+            </wcs:CoverageDescription>
+        </wcs:CoverageDescriptions>"""))) # nosec
+
+
+def testSnapIntervalEnlargesToCellEdges():
+    gridAxis = GridAxis(origin=0.5, resolution=1.0)
+    assert gridAxis.snapInterval(0.2, 2.7) == (0.0, 3.0)
+
+
+@pytest.mark.parametrize('lower, upper', [
+    (10.0, 20.0),
+    (10.0 + GRID_SNAP_TOLERANCE / 10, 20.0 - GRID_SNAP_TOLERANCE / 10),
+    (10.0 - GRID_SNAP_TOLERANCE / 10, 20.0 + GRID_SNAP_TOLERANCE / 10),
+])
+def testSnapIntervalKeepsCellEdgesWithinTolerance(lower, upper):
+    gridAxis = GridAxis(origin=1.0, resolution=2.0)
+    assert gridAxis.snapInterval(lower, upper) == pytest.approx((10.0, 20.0))
+
+
+def testSnapIntervalCoversAtLeastOneCell():
+    gridAxis = GridAxis(origin=1.0, resolution=2.0)
+    assert gridAxis.snapInterval(10.5, 10.5) == (10.0, 12.0)
+
+
+def testReadGridAxesWithNegativeOffsetVector():
+    describeCov = buildDescribeCoverage('http://www.opengis.net/def/crs/EPSG/0/25833', 'E N',
+                                        '390000 5810000', '392000 5811000',
+                                        '390000.5 5810999.5', ['1 0', '0 -1'])
+    gridAxes = describeCov.coverageInformation['dgm'].gridAxes
+    assert gridAxes == {'E': GridAxis(origin=390000.5, resolution=1.0), 'N': GridAxis(origin=5810999.5, resolution=1.0)}
+    assert gridAxes['N'].snapInterval(5810000.2, 5810010.7) == (5810000.0, 5810011.0)
+
+
+def testReadGridAxesOfCompoundCrs():
+    describeCov = buildDescribeCoverage('http://www.opengis.net/def/crs-compound?'
+                                        '1=http://www.opengis.net/def/crs/OGC/0/AnsiDate'
+                                        '&amp;2=http://www.opengis.net/def/crs/EPSG/0/4326',
+                                        'ansi Lat Long',
+                                        '"2020-01-01" 50 10', '"2020-12-01" 55 15',
+                                        '"2020-01-01" 54.995 10.005', ['0 0 0', '0 -0.01 0', '0 0 0.01'])
+    coverageInformation = describeCov.coverageInformation['dgm']
+    assert coverageInformation.nativeCrs == 'http://www.opengis.net/def/crs/EPSG/0/4326'
+    assert coverageInformation.axisLabels == ['Lat', 'Long']
+    assert coverageInformation.gridAxes['Lat'] == GridAxis(origin=54.995, resolution=0.01)
+    assert coverageInformation.gridAxes['Long'] == GridAxis(origin=10.005, resolution=0.01)
+
+
+def testReadGridAxesOfRotatedGrid():
+    describeCov = buildDescribeCoverage('http://www.opengis.net/def/crs/EPSG/0/25833', 'E N',
+                                        '390000 5810000', '392000 5811000',
+                                        '390000.5 5810999.5', ['1 0.5', '0 -1'])
+    assert describeCov.coverageInformation['dgm'].gridAxes == {}
+
+
+def buildBandDescribeCoverage(rangeType: str) -> DescribeCoverage:
+    return buildDescribeCoverage('http://www.opengis.net/def/crs/EPSG/0/25833', 'E N',
+                                 '390000 5810000', '392000 5811000',
+                                 '390000.1 5810999.9', ['0.2 0', '0 -0.2'], rangeType)
+
+
+def testReadBands():
+    describeCov = buildBandDescribeCoverage("""
+        <gmlcov:rangeType>
+            <swe:DataRecord>
+                <swe:field name="red"><swe:Quantity/></swe:field>
+                <swe:field name="green"><swe:Quantity/></swe:field>
+                <swe:field name="blue"><swe:Quantity/></swe:field>
+                <swe:field name="nir"><swe:Quantity/></swe:field>
+                <swe:field><swe:Quantity/></swe:field>
+            </swe:DataRecord>
+        </gmlcov:rangeType>""")
+    assert describeCov.coverageInformation['dgm'].bands == ['red', 'green', 'blue', 'nir']
+
+
+def testReadBandsWithoutRangeType():
+    assert buildBandDescribeCoverage('').coverageInformation['dgm'].bands == []
+
+
+def testRangeSubsetOfAllBandsIsOmitted():
+    assert getRangeSubsetParams(['red', 'green', 'blue', 'nir'], ['red', 'green', 'blue', 'nir']) == []
+
+
+def testRangeSubsetOfChosenBands():
+    assert getRangeSubsetParams(['red', 'green', 'blue', 'nir'], ['nir', 'red']) == [('RANGESUBSET', 'nir,red')]
+
+
+def testRangeSubsetRequiresABand():
+    with pytest.raises(ValueError):
+        getRangeSubsetParams(['red', 'green', 'blue', 'nir'], [])
@@ -0,0 +1,112 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import pytest
+from qgis.core import QgsPointXY, QgsRectangle
+
+from .. import crs_utils
+from ..crs_utils import (SUBSET_EDGE_POINTS,
+                         densifyRectangle,
+                         formatCoordinate,
+                         getCoordinateTransform,
+                         invalidateTransformCache)
+
+
+class FakeCrs:
+
+    def __init__(self, authid: str) -> None:
+        self.authid = lambda: authid
+
+
+class FakeTransform:
+    """Counts the transforms set up with a transform context, copies only refer to their original."""
+
+    created = 0
+
+    def __init__(self, *args) -> None:
+        if len(args) == 1:
+            self.original = args[0]
+            return
+        FakeTransform.created += 1
+        self.original = self
+        self.sourceCrs, self.destCrs, _ = args
+
+
+@pytest.fixture
+def transforms(monkeypatch):
+    monkeypatch.setattr(crs_utils, 'QgsCoordinateTransform', FakeTransform)
+    monkeypatch.setattr(FakeTransform, 'created', 0)
+    invalidateTransformCache()
+    yield FakeTransform
+    invalidateTransformCache()
+
+
+def testTransformIsCreatedOncePerCrsPair(transforms):
+    etrs89, wgs84 = FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326')
+    first = getCoordinateTransform(etrs89, wgs84)
+    second = getCoordinateTransform(FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326'))
+    assert transforms.created == 1
+    assert first.original is second.original
+    assert (first.original.sourceCrs, first.original.destCrs) == (etrs89, wgs84)
+
+    getCoordinateTransform(wgs84, etrs89)
+    assert transforms.created == 2
+
+
+def testCallersGetCopiesOfTheCachedTransform(transforms):
+    first = getCoordinateTransform(FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326'))
+    second = getCoordinateTransform(FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326'))
+    # copies can be used in other threads and changed without affecting the cache
+    assert first is not second
+    assert first is not first.original
+
+
+def testInvalidateTransformCache(transforms):
+    before = getCoordinateTransform(FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326'))
+    # e.g. the transform context of the project changed
+    invalidateTransformCache()
+    after = getCoordinateTransform(FakeCrs('EPSG:25833'), FakeCrs('EPSG:4326'))
+    assert transforms.created == 2
+    assert after.original is not before.original
+
+
+def testDensifiedRectangleHasPointsPerEdgeIncludingCorners():
+    rectangle = QgsRectangle(390000, 5810000, 392000, 5811000)
+    points = [(point.x(), point.y()) for point in densifyRectangle(rectangle)]
+    assert SUBSET_EDGE_POINTS == 21
+    # corners are shared by two edges
+    assert len(points) == len(set(points)) == 4 * (SUBSET_EDGE_POINTS - 1)
+    for corner in [(390000, 5810000), (392000, 5810000), (392000, 5811000), (390000, 5811000)]:
+        assert corner in points
+
+    bottomEdge = sorted(x for x, y in points if y == 5810000)
+    assert bottomEdge == pytest.approx([390000 + 100 * step for step in range(SUBSET_EDGE_POINTS)])
+    leftEdge = sorted(y for x, y in points if x == 390000)
+    assert leftEdge == pytest.approx([5810000 + 50 * step for step in range(SUBSET_EDGE_POINTS)])
+    assert all(x in (390000, 392000) or y in (5810000, 5811000) for x, y in points)
+
+
+def testDensifiedRectangleWithCornersOnly():
+    assert densifyRectangle(QgsRectangle(0, 0, 2, 1), pointsPerEdge=2) == [
+        QgsPointXY(0, 0), QgsPointXY(2, 0), QgsPointXY(2, 1), QgsPointXY(0, 1)]
+
+
+@pytest.mark.parametrize('value, text', [
+    (390000.00000000006, '390000'),
+    (5810999.999999999, '5811000'),
+    (5810000.25, '5810000.25'),
+    (0.1 + 0.2, '0.3'),
+    (-12.345678901234567, '-12.3456789012346'),
+    (1e-7, '1e-07'),
+    (1.5e-10, '1.5e-10'),
+    (1e20, '1e+20'),
+])
+def testFormatCoordinate(value, text):
+    assert formatCoordinate(value) == text
@@ -0,0 +1,121 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+from types import SimpleNamespace
+
+import pytest
+from osgeo import gdal
+
+from ..geotiff_encoding import (COMPRESSION_AUTOMATIC,
+                                GeoTiffEncoding,
+                                chooseEncoding,
+                                formatEncodingSavings,
+                                getEncodingParams,
+                                getEncodingSavings,
+                                supportsGeoTiffExtension)
+
+
+class FakeDataset:
+    """Dataset with two bands of 16 bit integers."""
+
+    RasterXSize = 100
+    RasterYSize = 50
+    RasterCount = 2
+
+    def __init__(self, driver: str, compression: str) -> None:
+        self.driver = driver
+        self.compression = compression
+
+    def GetDriver(self):
+        return SimpleNamespace(ShortName=self.driver)
+
+    def GetMetadataItem(self, name: str, domain: str):
+        return self.compression if (name, domain) == ('COMPRESSION', 'IMAGE_STRUCTURE') else None
+
+    def GetRasterBand(self, bandIndex: int):
+        return SimpleNamespace(DataType='Int16')
+
+
+@pytest.fixture
+def openDataset(monkeypatch):
+    """Lets gdal.Open return the dataset set by the test."""
+    datasets = {}
+    monkeypatch.setattr(gdal, 'Open', lambda path: datasets.get(path))
+    monkeypatch.setattr(gdal, 'GetDataTypeSize', lambda dataType: {'Int16': 16}[dataType])
+    return datasets
+
+
+def testAutomaticEncodingIsTiledDeflate():
+    encoding = chooseEncoding(COMPRESSION_AUTOMATIC, 'None', tiling=False)
+    assert encoding == GeoTiffEncoding(compression='Deflate', predictor='None', tiling=True, tileSize=256)
+
+
+def testServiceDefaultsAreKeptWithoutCompressionAndTiling():
+    assert chooseEncoding('None', 'None', tiling=False) is None
+    assert chooseEncoding('None', 'None', tiling=True) == GeoTiffEncoding(compression='None', tiling=True)
+
+
+@pytest.mark.parametrize('profiles, supported', [
+    (['http://www.opengis.net/spec/GMLCOV_geotiff-coverages/1.0/conf/geotiff-coverage'], True),
+    (['http://www.opengis.net/spec/WCS/2.0/conf/core',
+      'http://www.opengis.net/spec/GMLCOV_geotiff-coverages/1.0/conf/GeoTIFF-Coverage'], True),
+    (['http://www.opengis.net/spec/WCS/2.0/conf/core'], False),
+    ([], False),
+])
+def testSupportsGeoTiffExtension(profiles, supported):
+    assert supportsGeoTiffExtension(profiles) == supported
+
+
+def testEncodingParamsRequireTheGeoTiffExtension():
+    profile = 'http://www.opengis.net/spec/GMLCOV_geotiff-coverages/1.0/conf/geotiff-coverage'
+    assert getEncodingParams([profile], 'image/tiff', COMPRESSION_AUTOMATIC, 'None', False) == [
+        ('GEOTIFF:COMPRESSION', 'Deflate'), ('GEOTIFF:TILING', 'true'),
+        ('GEOTIFF:TILEWIDTH', '256'), ('GEOTIFF:TILEHEIGHT', '256')]
+    assert getEncodingParams([], 'image/tiff', COMPRESSION_AUTOMATIC, 'None', False) == []
+    assert getEncodingParams([profile], 'image/png', COMPRESSION_AUTOMATIC, 'None', False) == []
+
+
+def testDeflateParamsWithPredictorAndTiling():
+    encoding = GeoTiffEncoding(compression='Deflate', predictor='Horizontal', tiling=True, tileSize=512)
+    assert encoding.toParams() == [('GEOTIFF:COMPRESSION', 'Deflate'),
+                                   ('GEOTIFF:PREDICTOR', 'Horizontal'),
+                                   ('GEOTIFF:TILING', 'true'),
+                                   ('GEOTIFF:TILEWIDTH', '512'),
+                                   ('GEOTIFF:TILEHEIGHT', '512')]
+
+
+def testJpegParamsWithoutTiling():
+    encoding = GeoTiffEncoding(compression='JPEG', predictor='Horizontal', tiling=False, jpegQuality=90)
+    assert encoding.toParams() == [('GEOTIFF:COMPRESSION', 'JPEG'),
+                                   ('GEOTIFF:JPEG_QUALITY', '90'),
+                                   ('GEOTIFF:TILING', 'false')]
+
+
+def testPredictorIsOnlySentForDeflateAndLzw():
+    encoding = GeoTiffEncoding(compression='PackBits', predictor='Horizontal', tiling=False)
+    assert encoding.toParams() == [('GEOTIFF:COMPRESSION', 'PackBits'), ('GEOTIFF:TILING', 'false')]
+
+
+def testEncodingSavingsOfCompressedGeoTiff(openDataset, tmp_path):
+    path = tmp_path / 'coverage.tif'
+    path.write_bytes(b'0' * 4000)
+    openDataset[str(path)] = FakeDataset('GTiff', 'DEFLATE')
+    assert getEncodingSavings(str(path)) == (4000, 100 * 50 * 2 * 2)
+
+
+@pytest.mark.parametrize('dataset', [None, FakeDataset('GTiff', None), FakeDataset('PNG', 'DEFLATE')])
+def testNoEncodingSavingsOfOtherFiles(openDataset, dataset):
+    openDataset['coverage'] = dataset
+    assert getEncodingSavings('coverage') is None
+
+
+def testFormatEncodingSavings():
+    assert formatEncodingSavings(1024 * 1024, 4 * 1024 * 1024) == '1.0 MB received instead of 4.0 MB uncompressed (75% saved)'
+    assert formatEncodingSavings(0, 0).endswith('(0% saved)')
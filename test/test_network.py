@@ -0,0 +1,150 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import urllib.parse
+import xml.etree.ElementTree as ET # nosec
+
+import pytest
+
+from ..coverage_cache import getMatchingParams
+from ..network import (OWS_EXCEPTION_INVALID_REQUEST,
+                       OWS_EXCEPTION_SERVER,
+                       OWS_EXCEPTION_SIZE_LIMIT,
+                       findCachedUrls,
+                       isCoveredByTrims,
+                       readOwsException,
+                       splitRequestIntoQuadrants,
+                       splitTrimSubsets)
+
+
+def buildExceptionReport(exceptionCode: str, text: str) -> ET.Element:
+    return ET.fromstring(f"""
+        <ows:ExceptionReport xmlns:ows="http://www.opengis.net/ows/2.0" version="2.0.0">
+            <ows:Exception exceptionCode="{exceptionCode}" locator="subset">
+                <ows:ExceptionText>{text}</ows:ExceptionText>
+            </ows:Exception>
+        </ows:ExceptionReport>""") # nosec
+
+
+@pytest.mark.parametrize('exceptionCode, text, category', [
+    ('ResponseSizeExceeded', 'Response too large', OWS_EXCEPTION_SIZE_LIMIT),
+    ('NoApplicableCode', 'Requested image is too large', OWS_EXCEPTION_SIZE_LIMIT),
+    ('NoApplicableCode', 'Raster size exceeds the maximum of 4000 x 4000 pixels', OWS_EXCEPTION_SIZE_LIMIT),
+    ('NoApplicableCode', 'Size limit is 100 MB', OWS_EXCEPTION_SIZE_LIMIT),
+    ('InvalidSubsetting', 'Subset out of range of the coverage extent', OWS_EXCEPTION_INVALID_REQUEST),
+    ('InvalidParameterValue', 'subset exceeds the coverage bounds', OWS_EXCEPTION_INVALID_REQUEST),
+    ('InvalidSubsetting', 'Requested image is too large', OWS_EXCEPTION_INVALID_REQUEST),
+    ('NoApplicableCode', 'Subset out of range of the coverage extent', OWS_EXCEPTION_SERVER),
+    ('NoApplicableCode', 'subset exceeds the coverage bounds', OWS_EXCEPTION_SERVER),
+    ('NoApplicableCode', 'Too many axes in the request', OWS_EXCEPTION_SERVER),
+])
+def testReadOwsExceptionCategory(exceptionCode, text, category):
+    exception = readOwsException(buildExceptionReport(exceptionCode, text))
+    assert exception.exceptionCode == exceptionCode
+    assert exception.text == text
+    assert exception.category == category
+
+
+URL = ('https://example.com/wcs?SERVICE=WCS&REQUEST=GetCoverage&COVERAGEID=dgm'
+       '&SUBSET=E(390000,392000)&SUBSET=N(5810000,5811000)&SUBSET=time("2020-01-01")')
+
+
+def testSplitRequestIntoQuadrants():
+    quadrantUrls = splitRequestIntoQuadrants(URL)
+    assert len(quadrantUrls) == 4
+
+    params, trims = splitTrimSubsets(URL)
+    quadrantTrims = []
+    for quadrantUrl in quadrantUrls:
+        quadrantParams, axisTrims = splitTrimSubsets(quadrantUrl)
+        # other parameters (e.g. the time slice) are kept
+        assert quadrantParams == params
+        quadrantTrims.append(axisTrims)
+
+    assert sorted((axisTrims['E'], axisTrims['N']) for axisTrims in quadrantTrims) == [
+        ((390000.0, 391000.0), (5810000.0, 5810500.0)),
+        ((390000.0, 391000.0), (5810500.0, 5811000.0)),
+        ((391000.0, 392000.0), (5810000.0, 5810500.0)),
+        ((391000.0, 392000.0), (5810500.0, 5811000.0)),
+    ]
+
+
+def testSplitRequestIntoQuadrantsKeepsParameterOrder():
+    quadrantUrl = splitRequestIntoQuadrants(URL)[0]
+    keys = [key for key, _ in urllib.parse.parse_qsl(urllib.parse.urlsplit(quadrantUrl).query)]
+    assert keys == ['SERVICE', 'REQUEST', 'COVERAGEID', 'SUBSET', 'SUBSET', 'SUBSET']
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/wcs?SERVICE=WCS&REQUEST=GetCoverage&COVERAGEID=dgm',
+    'https://example.com/wcs?SERVICE=WCS&REQUEST=GetCoverage&COVERAGEID=dgm&SUBSET=E(390000,392000)',
+    'https://example.com/wcs?SERVICE=WCS&REQUEST=GetCoverage&COVERAGEID=dgm&SUBSET=Lat(52)&SUBSET=Long(13)',
+])
+def testSplitRequestWithoutTwoTrimsIsNotSplit(url):
+    assert splitRequestIntoQuadrants(url) == []
+
+
+class CachedUrls:
+    """Index of cached requests with the lookups used by findCachedUrls."""
+
+    def __init__(self, urls):
+        self.urls = urls
+
+    def contains(self, url):
+        return url in self.urls
+
+    def listEntries(self, covId, params=None):
+        return [(url, None) for url in self.urls if params is None or getMatchingParams(url) == params]
+
+
+def buildTrimUrl(east: str, north: str, time: str = '2020-01-01') -> str:
+    return ('https://example.com/wcs?SERVICE=WCS&REQUEST=GetCoverage&COVERAGEID=dgm'
+            f'&SUBSET=E({east})&SUBSET=N({north})&SUBSET=time("{time}")')
+
+
+def testFindCachedUrlsReturnsExactHit():
+    requestUrl = buildTrimUrl('390000,392000', '5810000,5811000')
+    coveringUrl = buildTrimUrl('389000,393000', '5809000,5812000')
+    assert findCachedUrls(CachedUrls([coveringUrl, requestUrl]), requestUrl, 'dgm') == ([requestUrl], False)
+
+
+def testFindCachedUrlsReturnsCoveringResponse():
+    requestUrl = buildTrimUrl('390500,391500', '5810000,5811000')
+    coveringUrl = buildTrimUrl('389000,393000', '5810000,5811000')
+    otherSliceUrl = buildTrimUrl('380000,400000', '5800000,5820000', time='2021-01-01')
+    assert findCachedUrls(CachedUrls([otherSliceUrl, coveringUrl]), requestUrl, 'dgm') == ([coveringUrl], False)
+
+
+def testFindCachedUrlsCombinesIntersectingResponses():
+    requestUrl = buildTrimUrl('390500,391500', '5810000,5811000')
+    westUrl = buildTrimUrl('389000,391000', '5810000,5811000')
+    eastUrl = buildTrimUrl('391000,393000', '5810000,5811000')
+    distantUrl = buildTrimUrl('395000,397000', '5810000,5811000')
+
+    urls, partial = findCachedUrls(CachedUrls([westUrl, distantUrl, eastUrl]), requestUrl, 'dgm')
+    assert sorted(urls) == sorted([westUrl, eastUrl])
+    assert not partial
+
+    assert findCachedUrls(CachedUrls([westUrl, distantUrl]), requestUrl, 'dgm') == ([westUrl], True)
+    assert findCachedUrls(CachedUrls([distantUrl]), requestUrl, 'dgm') == ([], True)
+
+
+def testIsCoveredByTrimsToleratesRoundingGaps():
+    trims = {'E': (0.0, 1000.0), 'N': (0.0, 1000.0)}
+    west = {'E': (0.0, 500.0), 'N': (0.0, 1000.0)}
+    assert isCoveredByTrims(trims, [west, {'E': (500.0, 1000.0), 'N': (0.0, 1000.0)}])
+    # a gap of half a thousandth of a unit along one edge is below the tolerance
+    assert isCoveredByTrims(trims, [west, {'E': (500.0005, 1000.0), 'N': (0.0, 1000.0)}])
+    assert not isCoveredByTrims(trims, [west, {'E': (501.0, 1000.0), 'N': (0.0, 1000.0)}])
+
+
+def testIsCoveredByTrimsNeedsTwoTrims():
+    assert not isCoveredByTrims({'E': (0.0, 1.0)}, [{'E': (0.0, 1.0)}])
+    assert not isCoveredByTrims({'E': (0.0, 1.0), 'N': (0.0, 1.0)}, [])
@@ -0,0 +1,47 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import tracemalloc
+
+import pytest
+
+from ..profiling import startTracing, stopTracing
+
+
+@pytest.fixture
+def withoutTracing():
+    wasTracing = tracemalloc.is_tracing()
+    tracemalloc.stop()
+    yield
+    tracemalloc.stop()
+    if wasTracing:
+        tracemalloc.start()
+
+
+def testTracingIsStoppedAfterTheLastOperation(withoutTracing):
+    startTracing()
+    startTracing()
+    stopTracing()
+    assert tracemalloc.is_tracing()
+    stopTracing()
+    assert not tracemalloc.is_tracing()
+
+
+def testTracingStartedElsewhereIsNotStopped(withoutTracing):
+    # e.g. python -X tracemalloc
+    tracemalloc.start()
+    startTracing()
+    stopTracing()
+    assert tracemalloc.is_tracing()
+
+    tracemalloc.stop()
+    startTracing()
+    stopTracing()
+    assert not tracemalloc.is_tracing()
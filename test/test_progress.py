@@ -0,0 +1,109 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import time
+
+import pytest
+
+from ..progress import THROUGHPUT_WINDOW_SECONDS, ProgressSnapshot, TransferProgress
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the monotonic clock by a clock that only advances when the test sets it."""
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+def testSnapshotOfTransferWithContentLength(clock):
+    progress = TransferProgress()
+    token = progress.startTransfer()
+    clock[0] += 1
+    progress.updateTransfer(token, MB, 4 * MB)
+    clock[0] += 1
+    progress.updateTransfer(token, 2 * MB, 4 * MB)
+    assert progress.snapshot() == ProgressSnapshot(fraction=0.5, receivedBytes=2 * MB, bytesPerSecond=MB,
+                                                   etaSeconds=pytest.approx(2.0))
+
+
+def testSnapshotOfTransferWithoutContentLength(clock):
+    progress = TransferProgress()
+    token = progress.startTransfer()
+    for received in (MB, 3 * MB):
+        clock[0] += 1
+        progress.updateTransfer(token, received, -1)
+    assert progress.snapshot() == ProgressSnapshot(fraction=None, receivedBytes=3 * MB, bytesPerSecond=2 * MB,
+                                                   etaSeconds=None)
+
+
+def testThroughputIsAveragedOverTheLatestSeconds(clock):
+    progress = TransferProgress()
+    token = progress.startTransfer()
+    received = 0
+    for bytesPerSecond in [4 * MB] * 3 + [MB] * 10:
+        clock[0] += 1
+        received += bytesPerSecond
+        progress.updateTransfer(token, received, -1)
+    assert progress.snapshot().bytesPerSecond == MB
+
+
+def testThroughputOfStalledTransferIsZero(clock):
+    progress = TransferProgress()
+    token = progress.startTransfer()
+    for received in (MB, 2 * MB):
+        clock[0] += 1
+        progress.updateTransfer(token, received, 4 * MB)
+    clock[0] += THROUGHPUT_WINDOW_SECONDS
+    snapshot = progress.snapshot()
+    assert (snapshot.fraction, snapshot.bytesPerSecond, snapshot.etaSeconds) == (0.5, 0.0, None)
+
+
+def testSnapshotOfPlannedRequests(clock):
+    progress = TransferProgress()
+    progress.setPlannedRequests(4)
+    finishedToken = progress.startTransfer()
+    progress.updateTransfer(finishedToken, 2 * MB, 2 * MB)
+    progress.finishTransfer(finishedToken)
+    progress.finishRequest()
+    runningToken = progress.startTransfer()
+    clock[0] += 3
+    progress.updateTransfer(runningToken, MB, 2 * MB)
+
+    snapshot = progress.snapshot()
+    # one finished and a half of a running request of four requests after 3 seconds
+    assert snapshot.fraction == pytest.approx(1.5 / 4)
+    assert snapshot.etaSeconds == pytest.approx(3 * 2.5 / 1.5)
+    assert snapshot.receivedBytes == 3 * MB
+
+
+def testPlannedRequestsWithoutProgressHaveNoEta(clock):
+    progress = TransferProgress()
+    progress.setPlannedRequests(4)
+    progress.startTransfer()
+    clock[0] += 3
+    assert progress.snapshot() == ProgressSnapshot(fraction=0.0, receivedBytes=0, bytesPerSecond=0.0, etaSeconds=None)
+
+
+def testFinishedRequestsComplete(clock):
+    progress = TransferProgress()
+    progress.setPlannedRequests(2)
+    for _ in range(3):
+        progress.finishRequest()
+    clock[0] += 2
+    snapshot = progress.snapshot()
+    assert (snapshot.fraction, snapshot.etaSeconds) == (1.0, 0.0)
+
+
+def testFormatSnapshot():
+    assert ProgressSnapshot(0.5, 3 * MB, 1.5 * MB, 75.4).format() == '3.0 MB, 1.5 MB/s, 1:15 left'
+    assert ProgressSnapshot(None, 3 * MB, 0.0, None).format() == '3.0 MB, 0.0 MB/s'
@@ -0,0 +1,62 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import time
+
+import pytest
+
+from ..rate_limiter import TokenBucket, backgroundRequests, isBackgroundRequest
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the monotonic clock by a clock that only advances when the test sets it."""
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+def testTokenBucketAllowsBurstUpToCapacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert [bucket.consume(1) for _ in range(4)] == [0.0, 0.0, 0.0, 0.0]
+    assert bucket.consume(1) == pytest.approx(0.5)
+
+
+def testTokenBucketDelayCoversTheDebt(clock):
+    bucket = TokenBucket(rate=100)
+    assert bucket.consume(300) == pytest.approx(2.0)
+    clock[0] += 2.0
+    assert bucket.consume(0) == 0.0
+
+
+def testTokenBucketRefillsAtRateUpToCapacity(clock):
+    bucket = TokenBucket(rate=10, capacity=10)
+    bucket.consume(10)
+    clock[0] += 0.5
+    assert bucket.consume(5) == 0.0
+    assert bucket.consume(5) == pytest.approx(0.5)
+
+    clock[0] += 60
+    assert bucket.consume(10) == 0.0
+    assert bucket.consume(1) == pytest.approx(0.1)
+
+
+def testUnlimitedTokenBucketHasNoDelay(clock):
+    assert TokenBucket(rate=0).consume(1e9) == 0.0
+
+
+def testBackgroundRequestsAreMarkedWithinTheContext():
+    assert not isBackgroundRequest()
+    with backgroundRequests():
+        assert isBackgroundRequest()
+        with backgroundRequests():
+            assert isBackgroundRequest()
+        assert isBackgroundRequest()
+    assert not isBackgroundRequest()
@@ -0,0 +1,192 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import threading
+import time
+
+import pytest
+
+from ..custom_exceptions import OwsException, RequestCanceledException
+from ..request_coordinator import RequestCoordinator, normalizeRequestUrl
+
+
+URL_GET_COVERAGE = ('https://example.com/wcs?SERVICE=WCS&VERSION=2.0.1&REQUEST=GetCoverage&COVERAGEID=dgm'
+                    '&SUBSET=E(390000,391000)&SUBSET=N(5810000,5811000)')
+# The same request with other parameter order and case
+URL_GET_COVERAGE_REORDERED = ('HTTPS://Example.COM/wcs?subset=N(5810000,5811000)&CoverageId=dgm&request=GetCoverage'
+                              '&SUBSET=E(390000,391000)&version=2.0.1&service=WCS')
+TIMEOUT = 5.0
+
+
+class BlockingFetch:
+    """Fetch function that blocks until the test releases it, counts its calls."""
+
+    def __init__(self, result=None, exception=None) -> None:
+        self.calls = 0
+        self.released = threading.Event()
+        self.result = result
+        self.exception = exception
+
+    def __call__(self, url: str):
+        self.calls += 1
+        assert self.released.wait(TIMEOUT)
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+
+class FakeFeedback:
+
+    def __init__(self) -> None:
+        self.canceled = False
+
+    def isCanceled(self) -> bool:
+        return self.canceled
+
+
+def runInThread(function, *args) -> dict:
+    """Runs function in a thread, the returned dict gets its result or exception and the thread."""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = function(*args)
+        except Exception as e:
+            outcome['exception'] = e
+
+    outcome['thread'] = threading.Thread(target=run)
+    outcome['thread'].start()
+    return outcome
+
+
+def waitFor(condition) -> None:
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def getWaiters(coordinator: RequestCoordinator, url: str) -> int:
+    with coordinator._lock:
+        inFlightRequest = coordinator._inFlight.get(normalizeRequestUrl(url))
+        return inFlightRequest.waiters if inFlightRequest else 0
+
+
+def testNormalizeRequestUrlIgnoresParameterOrderAndCase():
+    assert normalizeRequestUrl(URL_GET_COVERAGE) == normalizeRequestUrl(URL_GET_COVERAGE_REORDERED)
+    assert normalizeRequestUrl(URL_GET_COVERAGE) == (
+        'https://example.com/wcs?COVERAGEID=dgm&REQUEST=GetCoverage&SERVICE=WCS'
+        '&SUBSET=E%28390000%2C391000%29&SUBSET=N%285810000%2C5811000%29&VERSION=2.0.1')
+
+
+def testNormalizeRequestUrlKeepsValuesAndPath():
+    assert normalizeRequestUrl('https://example.com/WCS?COVERAGEID=dgm') != normalizeRequestUrl('https://example.com/wcs?COVERAGEID=dgm')
+    assert normalizeRequestUrl('https://example.com/wcs?COVERAGEID=DGM') != normalizeRequestUrl('https://example.com/wcs?COVERAGEID=dgm')
+
+
+def testConcurrentIdenticalRequestsShareOneTransfer():
+    coordinator = RequestCoordinator()
+    fetch = BlockingFetch(result={'path': 'coverage.tif'})
+    first = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch)
+    waitFor(lambda: coordinator.isInFlight(URL_GET_COVERAGE))
+    second = runInThread(coordinator.fetch, URL_GET_COVERAGE_REORDERED, fetch)
+    waitFor(lambda: getWaiters(coordinator, URL_GET_COVERAGE) == 1)
+
+    fetch.released.set()
+    first['thread'].join(TIMEOUT)
+    second['thread'].join(TIMEOUT)
+    assert fetch.calls == 1
+    assert first['result'] is second['result'] == {'path': 'coverage.tif'}
+    assert not coordinator.hasInFlightRequests()
+
+
+def testErrorsOfASharedTransferReachAllWaiters():
+    coordinator = RequestCoordinator()
+    fetch = BlockingFetch(exception=OwsException('NoApplicableCode', 'Service unavailable'))
+    first = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch)
+    waitFor(lambda: coordinator.isInFlight(URL_GET_COVERAGE))
+    waiting = [runInThread(coordinator.fetch, URL_GET_COVERAGE_REORDERED, fetch) for _ in range(2)]
+    waitFor(lambda: getWaiters(coordinator, URL_GET_COVERAGE) == 2)
+
+    fetch.released.set()
+    for outcome in [first] + waiting:
+        outcome['thread'].join(TIMEOUT)
+        assert outcome['exception'] is fetch.exception
+    assert fetch.calls == 1
+
+
+def testRequestsAfterATransferStartANewOne():
+    coordinator = RequestCoordinator()
+    fetch = BlockingFetch(result={'path': 'coverage.tif'})
+    fetch.released.set()
+    coordinator.fetch(URL_GET_COVERAGE, fetch)
+    coordinator.fetch(URL_GET_COVERAGE_REORDERED, fetch)
+    assert fetch.calls == 2
+
+
+def testWaiterRetriesWhenTheOwnerIsCanceled():
+    coordinator = RequestCoordinator()
+    canceledFetch = BlockingFetch(exception=RequestCanceledException('Request canceled'))
+    fetch = BlockingFetch(result={'path': 'coverage.tif'})
+    fetch.released.set()
+    first = runInThread(coordinator.fetch, URL_GET_COVERAGE, canceledFetch)
+    waitFor(lambda: coordinator.isInFlight(URL_GET_COVERAGE))
+    second = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch)
+    waitFor(lambda: getWaiters(coordinator, URL_GET_COVERAGE) == 1)
+
+    canceledFetch.released.set()
+    first['thread'].join(TIMEOUT)
+    second['thread'].join(TIMEOUT)
+    assert isinstance(first['exception'], RequestCanceledException)
+    assert second['result'] == {'path': 'coverage.tif'}
+
+
+def testCanceledWaiterStopsWaiting():
+    coordinator = RequestCoordinator()
+    fetch = BlockingFetch(result={'path': 'coverage.tif'})
+    feedback = FakeFeedback()
+    first = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch)
+    waitFor(lambda: coordinator.isInFlight(URL_GET_COVERAGE))
+    second = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch, feedback)
+    waitFor(lambda: getWaiters(coordinator, URL_GET_COVERAGE) == 1)
+
+    feedback.canceled = True
+    second['thread'].join(TIMEOUT)
+    assert isinstance(second['exception'], RequestCanceledException)
+    assert getWaiters(coordinator, URL_GET_COVERAGE) == 0
+
+    fetch.released.set()
+    first['thread'].join(TIMEOUT)
+    assert first['result'] == {'path': 'coverage.tif'}
+
+
+def testReentrantCallOfTheOwnerThreadRunsItsOwnTransfer():
+    coordinator = RequestCoordinator()
+    results = []
+
+    def fetchNested(url: str):
+        # e.g. a nested event loop of a blocking request issues the same request again
+        results.append(coordinator.fetch(URL_GET_COVERAGE_REORDERED, lambda url: 'nested'))
+        return 'outer'
+
+    assert coordinator.fetch(URL_GET_COVERAGE, fetchNested) == 'outer'
+    assert results == ['nested']
+
+
+@pytest.mark.parametrize('url', [URL_GET_COVERAGE, URL_GET_COVERAGE_REORDERED])
+def testInFlightRequestIsFoundByNormalizedUrl(url):
+    coordinator = RequestCoordinator()
+    fetch = BlockingFetch()
+    first = runInThread(coordinator.fetch, URL_GET_COVERAGE, fetch)
+    waitFor(lambda: fetch.calls == 1)
+    assert coordinator.isInFlight(url)
+    fetch.released.set()
+    first['thread'].join(TIMEOUT)
+    assert not coordinator.isInFlight(url)
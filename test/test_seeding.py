@@ -0,0 +1,154 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import json
+import zipfile
+
+import pytest
+from qgis.core import QgsGeometry, QgsRectangle
+
+from .. import coverage_cache, seeding
+from ..coverage_cache import CoverageCache, DocumentCache
+from ..seeding import (BUNDLE_MANIFEST_FILENAME,
+                       MAX_SEED_REQUESTS,
+                       buildSeedTiles,
+                       checkSeedRequestCount,
+                       exportCacheBundle,
+                       importCacheBundle,
+                       parseScaleFactors)
+
+
+URL_GET_COVERAGE = ('https://example.com/wcs?SERVICE=WCS&VERSION=2.0.1&REQUEST=GetCoverage&COVERAGEID=dgm'
+                    '&SUBSET=E(390000,391000)&SUBSET=N(5810000,5811000)')
+
+
+class FakeTask:
+
+    def isCanceled(self) -> bool:
+        return False
+
+    def setProgress(self, progress: float) -> None:
+        pass
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    """Replaces the shared caches by caches in the temporary directory, returns a function to switch installations."""
+    monkeypatch.setattr(coverage_cache, 'getPluginDataDir', lambda: str(tmp_path))
+
+    def useInstallation(name: str):
+        coverageCache = CoverageCache(cacheDir=str(tmp_path / name), maxBytes=1024 * 1024)
+        documentCache = DocumentCache(str(tmp_path / f'{name}.sqlite'))
+        monkeypatch.setattr(seeding, 'getCoverageCache', lambda: coverageCache)
+        monkeypatch.setattr(seeding, 'getDocumentCache', lambda: documentCache)
+        return coverageCache, documentCache
+
+    return useInstallation
+
+
+def getTileCorners(tiles: list) -> list:
+    return sorted((tile.xMinimum(), tile.yMinimum(), tile.xMaximum(), tile.yMaximum()) for tile in tiles)
+
+
+def testSeedTilesAreAlignedToMultiplesOfTheTileSize():
+    tiles = buildSeedTiles(QgsGeometry.fromRect(QgsRectangle(150, 150, 350, 250)), 100)
+    assert getTileCorners(tiles) == [(100, 100, 200, 200), (100, 200, 200, 300),
+                                     (200, 100, 300, 200), (200, 200, 300, 300),
+                                     (300, 100, 400, 200), (300, 200, 400, 300)]
+
+
+def testSeedTilesOnlyIntersectTheArea():
+    area = QgsGeometry.fromWkt('POLYGON((10 10, 190 10, 190 90, 90 90, 90 190, 10 190, 10 10))')
+    tiles = buildSeedTiles(area, 100)
+    assert getTileCorners(tiles) == [(0, 0, 100, 100), (0, 100, 100, 200), (100, 0, 200, 100)]
+
+
+def testSeedTilesOfNegativeCoordinates():
+    tiles = buildSeedTiles(QgsGeometry.fromRect(QgsRectangle(-150, -50, -110, -10)), 100)
+    assert getTileCorners(tiles) == [(-200, -100, -100, 0)]
+
+
+def testTooSmallTileSizeIsRejected():
+    with pytest.raises(ValueError):
+        buildSeedTiles(QgsGeometry.fromRect(QgsRectangle(0, 0, 100000, 100000)), 1)
+
+
+def testSeedRequestCountIsLimited():
+    checkSeedRequestCount(MAX_SEED_REQUESTS)
+    with pytest.raises(ValueError):
+        checkSeedRequestCount(MAX_SEED_REQUESTS + 1)
+
+
+def testParseScaleFactors():
+    assert parseScaleFactors('0.5, 1;0.25, 0.5') == [1.0, 0.5, 0.25]
+
+
+@pytest.mark.parametrize('text', ['', ' , ', '0', '1, -0.5', 'abc', '1 0.5'])
+def testParseScaleFactorsRejectsInvalidInput(text):
+    with pytest.raises(ValueError):
+        parseScaleFactors(text)
+
+
+def testBundleRoundTrip(caches, tmp_path):
+    coverageCache, documentCache = caches('exporting')
+    response = tmp_path / 'response.tif'
+    response.write_bytes(b'coverage')
+    coverageCache.put(URL_GET_COVERAGE, 'dgm', str(response))
+    coverageCache.put(URL_GET_COVERAGE.replace('dgm', 'dom'), 'dom', str(response))
+    capabilitiesUrl = 'https://example.com/wcs?SERVICE=WCS&REQUEST=GetCapabilities'
+    documentCache.put(capabilitiesUrl, b'<wcs:Capabilities/>')
+    documentCache.put('https://other.example.com/wcs?SERVICE=WCS&REQUEST=GetCapabilities', b'<wcs:Capabilities/>')
+
+    bundlePath = str(tmp_path / 'dgm.zip')
+    assert exportCacheBundle(FakeTask(), bundlePath, 'dgm') == {'path': bundlePath, 'coverages': 1, 'documents': 1}
+
+    coverageCache, documentCache = caches('importing')
+    assert importCacheBundle(FakeTask(), bundlePath) == {'path': bundlePath, 'coverages': 1, 'documents': 1, 'cached': 1}
+    with open(coverageCache.get(URL_GET_COVERAGE), 'rb') as cachedResponse:
+        assert cachedResponse.read() == b'coverage'
+    assert coverageCache.listEntries('dom') == []
+    assert documentCache.get(capabilitiesUrl) == b'<wcs:Capabilities/>'
+
+
+def testBundleEntriesNotInTheManifestAreIgnored(caches, tmp_path):
+    coverageCache, _ = caches('importing')
+    bundlePath = str(tmp_path / 'bundle.zip')
+    with zipfile.ZipFile(bundlePath, 'w') as bundle:
+        bundle.writestr('coverages/unlisted.bin', b'coverage')
+        bundle.writestr(BUNDLE_MANIFEST_FILENAME, json.dumps({'version': 1, 'coverages': [], 'documents': []}))
+
+    assert importCacheBundle(FakeTask(), bundlePath)['coverages'] == 0
+    assert coverageCache.totalBytes() == 0
+
+
+@pytest.mark.parametrize('files', [
+    {'readme.txt': b'no manifest'},
+    {BUNDLE_MANIFEST_FILENAME: b'no json'},
+    {BUNDLE_MANIFEST_FILENAME: json.dumps({'version': 1, 'documents': [],
+                                           'coverages': [{'url': URL_GET_COVERAGE, 'coverage_id': 'dgm',
+                                                          'file': 'coverages/missing.bin'}]})},
+])
+def testInvalidBundlesAreRejected(caches, tmp_path, files):
+    caches('importing')
+    bundlePath = str(tmp_path / 'bundle.zip')
+    with zipfile.ZipFile(bundlePath, 'w') as bundle:
+        for name, content in files.items():
+            bundle.writestr(name, content)
+
+    with pytest.raises(ValueError):
+        importCacheBundle(FakeTask(), bundlePath)
+
+
+def testNonZipFileIsRejected(caches, tmp_path):
+    caches('importing')
+    bundlePath = tmp_path / 'bundle.zip'
+    bundlePath.write_bytes(b'not a zip file')
+    with pytest.raises(ValueError):
+        importCacheBundle(FakeTask(), str(bundlePath))
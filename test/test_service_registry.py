@@ -0,0 +1,135 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import json
+
+import pytest
+
+from ..service_registry import (SETTINGS_LAST_SERVICE,
+                                SETTINGS_SAVED_SERVICES,
+                                ServiceRegistry,
+                                migrateServicesFromSettings)
+
+
+DGM = {'name': 'DGM', 'url': 'https://example.com/dgm', 'version': '2.0.1'}
+DOP = {'name': '', 'url': 'https://example.com/dop', 'version': '2.1.0'}
+
+
+class FakeSettings:
+    """QSettings of one plugin version, the values are kept in a dict."""
+
+    def __init__(self, values: dict) -> None:
+        self.values = dict(values)
+
+    def contains(self, key: str) -> bool:
+        return key in self.values
+
+    def value(self, key: str, defaultValue=None, type=None):
+        return self.values.get(key, defaultValue)
+
+    def remove(self, key: str) -> None:
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    serviceRegistry = ServiceRegistry(str(tmp_path / 'saved_services.sqlite'))
+    yield serviceRegistry
+    serviceRegistry.close()
+
+
+def getServices(registry: ServiceRegistry) -> list:
+    return registry.exportServices()
+
+
+def testMigrationFromSettings(registry):
+    settings = FakeSettings({SETTINGS_SAVED_SERVICES: json.dumps([DGM,
+                                                                  {'name': 'Old', 'url': 'https://example.com/old', 'version': '1.0.0'},
+                                                                  {'name': 'No url', 'version': '2.0.1'},
+                                                                  'invalid',
+                                                                  dict(DOP, url=' https://example.com/dop ')]),
+                             SETTINGS_LAST_SERVICE: 'https://example.com/dop [2.1.0]'})
+    migrateServicesFromSettings(registry, settings)
+
+    assert getServices(registry) == [DGM, DOP]
+    assert registry.getLastServiceId() == registry.findService(DOP['url'], DOP['version'])
+    assert settings.values == {}
+
+
+def testMigrationOfUnreadableSettings(registry):
+    settings = FakeSettings({SETTINGS_SAVED_SERVICES: '[{"name": ', SETTINGS_LAST_SERVICE: 'DGM'})
+    migrateServicesFromSettings(registry, settings)
+    assert registry.isEmpty()
+    assert settings.values == {}
+
+
+def testMigrationOnlyIntoEmptyRegistry(registry):
+    registry.saveService(DOP)
+    settings = FakeSettings({SETTINGS_SAVED_SERVICES: json.dumps([DGM])})
+    migrateServicesFromSettings(registry, settings)
+    assert getServices(registry) == [DOP]
+    assert SETTINGS_SAVED_SERVICES in settings.values
+
+
+def testSaveServiceUpdatesServiceWithSameUrlAndVersion(registry):
+    serviceId = registry.saveService(DGM)
+    assert registry.saveService(dict(DGM, name='Terrain')) == serviceId
+    assert getServices(registry) == [dict(DGM, name='Terrain')]
+
+    # another version is another service
+    otherId = registry.saveService(dict(DGM, version='2.0.0'))
+    assert otherId != serviceId
+    assert len(registry.listServices()) == 2
+
+
+def testSaveServiceById(registry):
+    serviceId = registry.saveService(DGM)
+    assert registry.saveService(DOP, serviceId) == serviceId
+    assert registry.listServices() == [dict(DOP, id=serviceId)]
+
+
+def testSaveServiceByIdResolvesDuplicates(registry):
+    dgmId = registry.saveService(DGM)
+    dopId = registry.saveService(DOP)
+    # editing DOP into a copy of DGM updates DGM
+    assert registry.saveService(dict(DGM, name='Terrain'), dopId) == dgmId
+    assert getServices(registry) == [dict(DGM, name='Terrain'), DOP]
+
+
+def testImportServicesUpsertsDuplicates(registry):
+    dgmId = registry.saveService(DGM)
+    lastId = registry.importServices([dict(DGM, name='Terrain'), DOP, dict(DOP, name='Orthophotos')])
+    assert getServices(registry) == [dict(DGM, name='Terrain'), dict(DOP, name='Orthophotos')]
+    assert registry.findService(DGM['url'], DGM['version']) == dgmId
+    assert lastId == registry.findService(DOP['url'], DOP['version'])
+    assert registry.importServices([]) is None
+
+
+def testDeleteServiceRemovesItsState(registry):
+    serviceId = registry.saveService(DGM)
+    registry.setLastServiceId(serviceId)
+    registry.setTuning(serviceId, 4, 2)
+    assert registry.getTuning(serviceId) == {'concurrency': 4, 'tiles_per_side': 2}
+
+    registry.deleteService(serviceId)
+    assert registry.isEmpty()
+    assert registry.getLastServiceId() is None
+    assert registry.getTuning(serviceId) is None
+
+
+def testRegistryIsPersistent(tmp_path):
+    path = str(tmp_path / 'saved_services.sqlite')
+    registry = ServiceRegistry(path)
+    registry.setLastServiceId(registry.saveService(DGM))
+    registry.close()
+
+    registry = ServiceRegistry(path)
+    assert registry.listServices() == [dict(DGM, id=registry.getLastServiceId())]
+    registry.close()
@@ -0,0 +1,63 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import pytest
+
+from ..coverage import AxisInformation
+from ..stack import buildSliceSubset, getPositionSortKey, selectAxisPositions
+
+
+def buildTimeAxis(positions: list) -> AxisInformation:
+    return AxisInformation(label='time', lowerBound=positions[0], upperBound=positions[-1], isTemporal=True,
+                           positions=positions)
+
+
+def buildElevationAxis(positions: list) -> AxisInformation:
+    return AxisInformation(label='elevation', lowerBound=positions[0], upperBound=positions[-1], isTemporal=False,
+                           positions=positions)
+
+
+def testTemporalPositionsSortByTimeNotAsStrings():
+    # 10:00+02:00 is 08:00Z and the fraction of 12:00:00.500Z sorts before 12:00:00Z as string
+    positions = ['2020-01-01T12:00:00.500Z', '2020-01-01T12:00:00Z', '2020-01-01T09:00:00Z', '2020-01-01T10:00:00+02:00']
+    axis = buildTimeAxis(positions)
+    assert sorted(positions) != sorted(positions, key=lambda position: getPositionSortKey(axis, position))
+    assert selectAxisPositions(axis, '2020-01-01T00:00:00Z', '2020-01-02T00:00:00Z') == [
+        '2020-01-01T10:00:00+02:00', '2020-01-01T09:00:00Z', '2020-01-01T12:00:00Z', '2020-01-01T12:00:00.500Z']
+
+
+def testTemporalPositionsWithinTheRange():
+    axis = buildTimeAxis(['2020-01-01T12:00:00.500Z', '2020-01-01T12:00:00Z', '2020-01-01T09:00:00Z',
+                          '2020-01-01T10:00:00+02:00'])
+    # the bounds may be given in any order
+    assert selectAxisPositions(axis, '2020-01-01T12:00:00Z', '2020-01-01T08:30:00Z') == [
+        '2020-01-01T09:00:00Z', '2020-01-01T12:00:00Z']
+
+
+def testTemporalPositionsThatAreNoDatesSortAfterDates():
+    axis = buildTimeAxis(['spring', '2020-01-01T00:00:00Z', 'autumn'])
+    assert sorted(axis.positions, key=lambda position: getPositionSortKey(axis, position)) == [
+        '2020-01-01T00:00:00Z', 'autumn', 'spring']
+
+
+def testNumericPositionsSortByValue():
+    axis = buildElevationAxis(['100', '-2.5', '10', '5', '20'])
+    assert selectAxisPositions(axis, '-5', '50') == ['-2.5', '5', '10', '20']
+    assert selectAxisPositions(axis, '20', '5') == ['5', '10', '20']
+
+
+def testNumericPositionMustBeANumber():
+    with pytest.raises(ValueError):
+        selectAxisPositions(buildElevationAxis(['10', '20']), 'low', '20')
+
+
+def testSliceSubsetQuotesTemporalPositions():
+    assert buildSliceSubset(buildTimeAxis(['2020-01-01']), '2020-01-01') == 'time("2020-01-01")'
+    assert buildSliceSubset(buildElevationAxis(['10']), '10') == 'elevation(10)'
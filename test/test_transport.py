@@ -0,0 +1,95 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import pytest
+
+from ..memory_budget import MemoryBudget, ResponseBuffer
+from ..transport import NetworkTransport, Recording, RecordingTransport, ReplayTransport
+
+
+URL_GET_COVERAGE = ('https://example.com/wcs?SERVICE=WCS&VERSION=2.0.1&REQUEST=GetCoverage&COVERAGEID=dgm'
+                    '&SUBSET=E(390000,391000)&SUBSET=N(5810000,5811000)')
+URL_GET_COVERAGE_REORDERED = ('https://example.com/wcs?subset=N(5810000,5811000)&SUBSET=E(390000,391000)'
+                              '&coverageid=dgm&request=GetCoverage&version=2.0.1&service=WCS')
+RESPONSE = b'II*\x00' + bytes(range(256)) * 64
+
+
+@pytest.fixture
+def network(monkeypatch):
+    """Replaces the network by responses set by the test, returns the responses by url and the sent requests."""
+    responses = {}
+    sentUrls = []
+
+    def transfer(self, url: str, buffer: ResponseBuffer, feedback=None):
+        sentUrls.append(url)
+        content, error = responses[url]
+        buffer.write(content)
+        buffer.finish()
+        buffer.errorString = error
+        return 0.25 if content else None
+
+    monkeypatch.setattr(NetworkTransport, 'transfer', transfer)
+    return responses, sentUrls
+
+
+def createBuffer(spillThresholdBytes: int = 1024 * 1024) -> ResponseBuffer:
+    return ResponseBuffer(MemoryBudget(64 * 1024 * 1024, spillThresholdBytes))
+
+
+@pytest.mark.parametrize('spillThresholdBytes', [1024 * 1024, 1024])
+def testRecordedResponseIsReplayed(network, tmp_path, spillThresholdBytes):
+    responses, sentUrls = network
+    responses[URL_GET_COVERAGE] = (RESPONSE, None)
+    recordingTransport = RecordingTransport(Recording(str(tmp_path)))
+    buffer = createBuffer(spillThresholdBytes)
+    assert recordingTransport.transfer(URL_GET_COVERAGE, buffer) == 0.25
+    assert buffer.getBytes() == RESPONSE
+
+    # another session, requests are identified by their normalized url
+    replayTransport = ReplayTransport(Recording(str(tmp_path)))
+    buffer = createBuffer(spillThresholdBytes)
+    assert replayTransport.transfer(URL_GET_COVERAGE_REORDERED, buffer) == 0.0
+    assert (buffer.getBytes(), buffer.size, buffer.errorString) == (RESPONSE, len(RESPONSE), None)
+    assert sentUrls == [URL_GET_COVERAGE]
+
+
+def testRecordedErrorIsReplayed(network, tmp_path):
+    responses, _ = network
+    responses[URL_GET_COVERAGE] = (b'<html>Service Unavailable</html>', 'Error transferring - server replied: Service Unavailable')
+    RecordingTransport(Recording(str(tmp_path))).transfer(URL_GET_COVERAGE, createBuffer())
+
+    buffer = createBuffer()
+    ReplayTransport(Recording(str(tmp_path))).transfer(URL_GET_COVERAGE, buffer)
+    assert buffer.getBytes() == b'<html>Service Unavailable</html>'
+    assert buffer.errorString == 'Error transferring - server replied: Service Unavailable'
+
+
+def testReplayOfRequestThatWasNotRecorded(network, tmp_path):
+    responses, sentUrls = network
+    responses[URL_GET_COVERAGE] = (RESPONSE, None)
+    RecordingTransport(Recording(str(tmp_path))).transfer(URL_GET_COVERAGE, createBuffer())
+
+    buffer = createBuffer()
+    assert ReplayTransport(Recording(str(tmp_path))).transfer(URL_GET_COVERAGE.replace('dgm', 'dom'), buffer) is None
+    assert (buffer.size, buffer.errorString) == (0, 'Not recorded')
+    assert sentUrls == [URL_GET_COVERAGE]
+
+
+def testRecordingKeepsTheLatestResponse(network, tmp_path):
+    responses, _ = network
+    recording = Recording(str(tmp_path))
+    for content in (b'first', b'second'):
+        responses[URL_GET_COVERAGE] = (content, None)
+        RecordingTransport(recording).transfer(URL_GET_COVERAGE, createBuffer())
+
+    exchange = recording.get(URL_GET_COVERAGE_REORDERED)
+    assert (exchange['size'], exchange['latency'], exchange['error']) == (len(b'second'), 0.25, None)
+    with open(exchange['path'], 'rb') as responseFile:
+        assert responseFile.read() == b'second'
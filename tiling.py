@@ -0,0 +1,161 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+from typing import List, Optional
+
+import numpy as np
+from osgeo import gdal, ogr, osr
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import QgsGeometry, QgsProcessingUtils, QgsRectangle
+
+from .adaptive_concurrency import AdaptiveController
+from .helpers import logInfoMessage
+from .network import buildMosaic, getCoverages
+
+
+SETTINGS_POLYGON_TILES_PER_SIDE = 'plugins/simplewcs2/polygon_tiles_per_side'
+DEFAULT_POLYGON_TILES_PER_SIDE = 4
+
+# Polygons covering at least this share of their bounding box are requested in one piece
+POLYGON_FILL_RATIO_SINGLE_REQUEST = 0.8
+
+# Rows of the mosaic masked at once
+CLIP_BLOCK_ROWS = 1024
+
+
+def buildPolygonTiles(polygon: QgsGeometry, tilesPerSide: Optional[int] = None) -> List[QgsRectangle]:
+    """
+    Splits the bounding box of a polygon into a grid of tiles and returns the tiles intersecting the polygon.
+    Compact polygons are not split.
+    """
+    boundingBox = polygon.boundingBox()
+    if boundingBox.area() == 0 or polygon.area() / boundingBox.area() >= POLYGON_FILL_RATIO_SINGLE_REQUEST:
+        return [boundingBox]
+    if tilesPerSide is None:
+        tilesPerSide = QSettings().value(SETTINGS_POLYGON_TILES_PER_SIDE, DEFAULT_POLYGON_TILES_PER_SIDE, type=int)
+    tilesPerSide = max(1, tilesPerSide)
+
+    tileWidth = boundingBox.width() / tilesPerSide
+    tileHeight = boundingBox.height() / tilesPerSide
+    engine = QgsGeometry.createGeometryEngine(polygon.constGet())
+    engine.prepareGeometry()
+
+    tiles = []
+    for row in range(tilesPerSide):
+        for column in range(tilesPerSide):
+            tile = QgsRectangle(boundingBox.xMinimum() + column * tileWidth,
+                                boundingBox.yMinimum() + row * tileHeight,
+                                boundingBox.xMinimum() + (column + 1) * tileWidth,
+                                boundingBox.yMinimum() + (row + 1) * tileHeight)
+            if engine.intersects(QgsGeometry.fromRect(tile).constGet()):
+                tiles.append(tile)
+
+    logInfoMessage(f'Polygon subset: {len(tiles)} of {tilesPerSide * tilesPerSide} tiles intersect the polygon')
+    return tiles
+
+
+def getPolygonCoverage(task,
+                       urls: List[str],
+                       covId: str,
+                       polygonWkt: str,
+                       polygonCrsWkt: str,
+                       controller: Optional[AdaptiveController] = None) -> Optional[dict]:
+    """
+    Requests the tiles of a polygon subset concurrently, combines them into one mosaic
+    and sets all pixels outside of the polygon (wkt, with the wkt of its crs) to nodata.
+    The controller of the service, if given, adjusts the number of parallel requests and the tile size.
+    Raises:
+        RequestCanceledException
+    """
+    paths = getCoverages(task, urls, covId, controller)
+    if not paths:
+        return None
+
+    mosaicPath = buildMosaic([paths[url] for url in urls if url in paths])
+    return {'path': clipToPolygon(mosaicPath, polygonWkt, polygonCrsWkt), 'coverage': covId}
+
+
+def clipToPolygon(sourcePath: str, polygonWkt: str, polygonCrsWkt: str) -> str:
+    """
+    Writes a GeoTIFF copy of a raster with all pixels outside of the polygon set to nodata.
+    The raster is processed block by block, the polygon is rasterized into a mask of each block only.
+    """
+    source = gdal.Open(sourcePath)
+    if source is None:
+        raise RuntimeError(f'Raster could not be opened: {sourcePath}')
+    columns, rows = source.RasterXSize, source.RasterYSize
+    geoTransform = source.GetGeoTransform()
+    projection = source.GetProjection()
+
+    polygonSource = createPolygonSource(polygonWkt, polygonCrsWkt or projection)
+
+    clippedPath = QgsProcessingUtils.generateTempFilename('wcs_clipped.tif')
+    target = gdal.GetDriverByName('GTiff').Create(clippedPath, columns, rows, source.RasterCount,
+                                                  source.GetRasterBand(1).DataType,
+                                                  options=['COMPRESS=DEFLATE', 'TILED=YES'])
+    target.SetGeoTransform(geoTransform)
+    target.SetProjection(projection)
+
+    noDataValues = []
+    for bandIndex in range(1, source.RasterCount + 1):
+        noData = source.GetRasterBand(bandIndex).GetNoDataValue()
+        if noData is None:
+            noData = 0
+        target.GetRasterBand(bandIndex).SetNoDataValue(noData)
+        noDataValues.append(noData)
+
+    for rowOffset in range(0, rows, CLIP_BLOCK_ROWS):
+        blockRows = min(CLIP_BLOCK_ROWS, rows - rowOffset)
+        mask = rasterizePolygon(polygonSource.GetLayer(0), columns, blockRows, getBlockGeoTransform(geoTransform, rowOffset), projection)
+        for bandIndex, noData in enumerate(noDataValues, start=1):
+            block = source.GetRasterBand(bandIndex).ReadAsArray(0, rowOffset, columns, blockRows)
+            block[~mask] = noData
+            target.GetRasterBand(bandIndex).WriteArray(block, 0, rowOffset)
+
+    target = None
+    source = None
+    return clippedPath
+
+
+def createPolygonSource(polygonWkt: str, polygonCrsWkt: str):
+    """Returns an in-memory data source with one layer containing the polygon."""
+    polygonSrs = osr.SpatialReference()
+    polygonSrs.ImportFromWkt(polygonCrsWkt)
+    polygonSrs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+    vectorSource = ogr.GetDriverByName('Memory').CreateDataSource('')
+    layer = vectorSource.CreateLayer('polygon', polygonSrs, ogr.wkbUnknown)
+    feature = ogr.Feature(layer.GetLayerDefn())
+    feature.SetGeometry(ogr.CreateGeometryFromWkt(polygonWkt))
+    layer.CreateFeature(feature)
+    return vectorSource
+
+
+def getBlockGeoTransform(geoTransform: tuple, rowOffset: int) -> tuple:
+    """Returns the geotransform of the block of a raster that starts at rowOffset."""
+    originX, pixelWidth, rowRotation, originY, columnRotation, pixelHeight = geoTransform
+    return (originX + rowOffset * rowRotation, pixelWidth, rowRotation,
+            originY + rowOffset * pixelHeight, columnRotation, pixelHeight)
+
+
+def rasterizePolygon(polygonLayer,
+                     columns: int,
+                     rows: int,
+                     geoTransform: tuple,
+                     projection: str) -> np.ndarray:
+    """
+    Returns a boolean array of the raster (block) with the geotransform, True for pixels whose center lies inside the polygon.
+    GDAL transforms the polygon to the crs of the raster.
+    """
+    maskDataset = gdal.GetDriverByName('MEM').Create('', columns, rows, 1, gdal.GDT_Byte)
+    maskDataset.SetGeoTransform(geoTransform)
+    maskDataset.SetProjection(projection)
+    gdal.RasterizeLayer(maskDataset, [1], polygonLayer, burn_values=[1])
+    return maskDataset.GetRasterBand(1).ReadAsArray().astype(bool)
@@ -0,0 +1,295 @@
+"""
+        Simple WCS 2 - QGIS Plugin
+        Basic support for OGC WCS 2.X
+
+        created by Landesvermessung und Geobasisinformation Brandenburg
+        email: marcus.mohr@geobasis-bb.de
+        licence: GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+
+        Functions are written in mixedCase, see https://docs.qgis.org/testing/en/docs/developers_guide/codingstandards.html
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from qgis.PyQt.QtCore import QEventLoop, QSettings, QTimer, QUrl
+from qgis.PyQt.QtNetwork import QNetworkReply, QNetworkRequest
+from qgis.core import QgsNetworkAccessManager
+
+from .coverage_cache import getCacheKey
+from .custom_exceptions import RequestCanceledException
+from .helpers import getPluginDataDir, logInfoMessage, logWarnMessage
+from .memory_budget import ResponseBuffer, discardBuffer
+from .progress import getTransferProgress
+from .rate_limiter import getRateLimiter, isBackgroundRequest
+
+
+# Transport of all requests: network (default), record (network, responses and timings are saved)
+# or replay (recorded responses are served locally, nothing is sent). The environment variable overrides the setting.
+SETTINGS_TRANSPORT_MODE = 'plugins/simplewcs2/transport_mode'
+TRANSPORT_ENVIRONMENT_VARIABLE = 'SIMPLEWCS2_TRANSPORT'
+TRANSPORT_NETWORK = 'network'
+TRANSPORT_RECORD = 'record'
+TRANSPORT_REPLAY = 'replay'
+# Directory of the recording, default: recording in the plugin data directory
+SETTINGS_RECORDING_DIR = 'plugins/simplewcs2/recording_dir'
+RECORDING_DIRNAME = 'recording'
+RECORDING_INDEX_FILENAME = 'index.sqlite'
+# Simulated latency and bandwidth of replayed responses: -1 replays the recorded timings, 0 replays without delay
+SETTINGS_REPLAY_LATENCY_MS = 'plugins/simplewcs2/replay_latency_ms'
+SETTINGS_REPLAY_KBYTES_PER_SECOND = 'plugins/simplewcs2/replay_kbytes_per_second'
+REPLAY_RECORDED_TIMING = -1
+
+# Interval in milliseconds in which running transfers check whether they were canceled
+CANCEL_CHECK_INTERVAL_MS = 100
+# Size of the read buffer of replies whose bandwidth is limited, replayed responses are written in chunks of this size
+THROTTLED_READ_BUFFER_BYTES = 64 * 1024
+
+
+def waitForDelay(seconds: float, feedback=None) -> None:
+    """
+    Waits (e.g. for the rate limiter) while the event loop of the thread keeps running.
+    Raises:
+        RequestCanceledException
+    """
+    deadline = time.monotonic() + seconds
+    while True:
+        if feedback is not None and feedback.isCanceled():
+            raise RequestCanceledException('Request canceled')
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        loop = QEventLoop()
+        QTimer.singleShot(int(min(remaining * 1000, CANCEL_CHECK_INTERVAL_MS)), loop.quit)
+        loop.exec()
+
+
+class NetworkTransport:
+    """Sends requests with QgsNetworkAccessManager."""
+
+    def transfer(self, url: str, buffer: ResponseBuffer, feedback=None) -> Optional[float]:
+        """
+        Downloads the response of a request chunk by chunk into the buffer and returns the seconds until
+        the first byte arrived (None for empty responses). The bandwidth is limited by the rate limiter.
+        Network errors are logged and set as errorString of the buffer.
+        Bytes received are reported to the progress of the task, if it has one.
+        Raises:
+            RequestCanceledException, the partial response is removed
+        """
+        start = time.monotonic()
+        firstByteSeconds = None
+        rateLimiter = getRateLimiter()
+        reply = QgsNetworkAccessManager.instance().get(QNetworkRequest(QUrl(url)))
+
+        background = isBackgroundRequest()
+        limitBytes = rateLimiter.isLimitingBytes(url)
+        if limitBytes:
+            # Qt stops reading from the socket while the read buffer is full, so pausing reads limits the bandwidth
+            reply.setReadBufferSize(THROTTLED_READ_BUFFER_BYTES)
+        resumeTimer = QTimer()
+        resumeTimer.setSingleShot(True)
+
+        def readChunk():
+            nonlocal firstByteSeconds
+            if resumeTimer.isActive():
+                return
+            data = bytes(reply.readAll())
+            if data and firstByteSeconds is None:
+                firstByteSeconds = time.monotonic() - start
+            buffer.write(data)
+            if limitBytes and data:
+                delay = rateLimiter.getByteDelay(url, len(data), background)
+                if delay > 0:
+                    resumeTimer.start(int(delay * 1000))
+
+        def abortIfCanceled():
+            if feedback.isCanceled():
+                reply.abort()
+
+        progress = getTransferProgress(feedback)
+        loop = QEventLoop()
+        if progress is not None:
+            progressToken = progress.startTransfer()
+            reply.downloadProgress.connect(lambda received, total: progress.updateTransfer(progressToken, received, total))
+        reply.readyRead.connect(readChunk)
+        resumeTimer.timeout.connect(readChunk)
+        reply.finished.connect(loop.quit)
+        # QgsTask has no signal for cancellation, the flag is polled
+        cancelTimer = QTimer()
+        if feedback is not None:
+            cancelTimer.timeout.connect(abortIfCanceled)
+            cancelTimer.start(CANCEL_CHECK_INTERVAL_MS)
+        if not reply.isFinished():
+            loop.exec()
+        cancelTimer.stop()
+        resumeTimer.stop()
+        if progress is not None:
+            progress.finishTransfer(progressToken)
+
+        if reply.error() == QNetworkReply.NetworkError.OperationCanceledError or (feedback is not None and feedback.isCanceled()):
+            reply.deleteLater()
+            discardBuffer(buffer)
+            logInfoMessage('Request canceled: ' + url)
+            raise RequestCanceledException('Request canceled')
+
+        readChunk()
+        buffer.finish()
+
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            buffer.errorString = reply.errorString()
+            logWarnMessage(f'{url}: {buffer.errorString}')
+        reply.deleteLater()
+        return firstByteSeconds
+
+
+class Recording:
+    """
+    Request/response pairs with their timings, keyed by the normalized request url.
+    The index is a SQLite table next to the response files, so that recordings can be copied to other machines.
+    """
+
+    def __init__(self, recordingDir: str) -> None:
+        self.recordingDir = recordingDir
+        os.makedirs(self.recordingDir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(self.recordingDir, RECORDING_INDEX_FILENAME),
+                                          check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS exchanges (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    error TEXT,
+                    size INTEGER NOT NULL,
+                    latency REAL,
+                    duration REAL NOT NULL,
+                    recorded REAL NOT NULL)""")
+
+    def getResponsePath(self, key: str) -> str:
+        return os.path.join(self.recordingDir, f'{key}.bin')
+
+    def put(self, url: str, buffer: ResponseBuffer, latency: Optional[float], duration: float) -> None:
+        key = getCacheKey(url)
+        with self._lock:
+            try:
+                buffer.copyTo(self.getResponsePath(key))
+            except OSError as e:
+                logWarnMessage(f'Response could not be recorded: {e}')
+                return
+            with self.connection:
+                self.connection.execute("""
+                    INSERT OR REPLACE INTO exchanges (key, url, error, size, latency, duration, recorded)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (key, url, buffer.errorString, buffer.size, latency, duration, time.time()))
+
+    def get(self, url: str) -> Optional[dict]:
+        """Returns path, error, size, latency and duration of the recorded response, None if it was not recorded."""
+        key = getCacheKey(url)
+        with self._lock:
+            row = self.connection.execute('SELECT error, size, latency, duration FROM exchanges WHERE key = ?',
+                                          (key,)).fetchone()
+        if row is None:
+            return None
+        error, size, latency, duration = row
+        return {'path': self.getResponsePath(key), 'error': error, 'size': size, 'latency': latency or 0.0,
+                'duration': duration}
+
+
+class RecordingTransport(NetworkTransport):
+    """Sends requests over the network and records responses and timings."""
+
+    def __init__(self, recording: Recording) -> None:
+        self.recording = recording
+
+    def transfer(self, url: str, buffer: ResponseBuffer, feedback=None) -> Optional[float]:
+        start = time.monotonic()
+        latency = super().transfer(url, buffer, feedback)
+        self.recording.put(url, buffer, latency, time.monotonic() - start)
+        return latency
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses without sending requests, with the recorded or a simulated latency and bandwidth.
+    Requests that were not recorded fail like a network error.
+    """
+
+    def __init__(self, recording: Recording) -> None:
+        self.recording = recording
+
+    def transfer(self, url: str, buffer: ResponseBuffer, feedback=None) -> Optional[float]:
+        """
+        Raises:
+            RequestCanceledException
+        """
+        exchange = self.recording.get(url)
+        if exchange is None:
+            buffer.errorString = 'Not recorded'
+            buffer.finish()
+            logWarnMessage(f'{url}: response was not recorded (replay)')
+            return None
+
+        settings = QSettings()
+        latencyMs = settings.value(SETTINGS_REPLAY_LATENCY_MS, 0, type=float)
+        latency = exchange['latency'] if latencyMs == REPLAY_RECORDED_TIMING else latencyMs / 1000
+        kbytesPerSecond = settings.value(SETTINGS_REPLAY_KBYTES_PER_SECOND, 0, type=float)
+        if kbytesPerSecond == REPLAY_RECORDED_TIMING:
+            transferSeconds = max(exchange['duration'] - exchange['latency'], 0.0)
+            bytesPerSecond = exchange['size'] / transferSeconds if transferSeconds > 0 else 0
+        else:
+            bytesPerSecond = kbytesPerSecond * 1024
+
+        progress = getTransferProgress(feedback)
+        progressToken = progress.startTransfer() if progress is not None else None
+        try:
+            waitForDelay(latency, feedback)
+            with open(exchange['path'], 'rb') as responseFile:
+                while True:
+                    chunk = responseFile.read(THROTTLED_READ_BUFFER_BYTES)
+                    if not chunk:
+                        break
+                    buffer.write(chunk)
+                    if progress is not None:
+                        progress.updateTransfer(progressToken, buffer.size, exchange['size'])
+                    if bytesPerSecond > 0:
+                        waitForDelay(len(chunk) / bytesPerSecond, feedback)
+        except RequestCanceledException:
+            discardBuffer(buffer)
+            logInfoMessage('Request canceled: ' + url)
+            raise
+        finally:
+            if progress is not None:
+                progress.finishTransfer(progressToken)
+        buffer.finish()
+        if exchange['error']:
+            buffer.errorString = exchange['error']
+            logWarnMessage(f'{url}: {buffer.errorString}')
+        return latency
+
+
+_transports: Dict[str, object] = {}
+_transportsLock = threading.Lock()
+
+
+def getTransportMode() -> str:
+    mode = os.environ.get(TRANSPORT_ENVIRONMENT_VARIABLE) or QSettings().value(SETTINGS_TRANSPORT_MODE,
+                                                                              TRANSPORT_NETWORK, type=str)
+    return mode if mode in (TRANSPORT_RECORD, TRANSPORT_REPLAY) else TRANSPORT_NETWORK
+
+
+def getTransport():
+    """Returns the transport of the current mode (NetworkTransport, RecordingTransport or ReplayTransport)."""
+    mode = getTransportMode()
+    with _transportsLock:
+        if mode not in _transports:
+            if mode == TRANSPORT_NETWORK:
+                _transports[mode] = NetworkTransport()
+            else:
+                recordingDir = (QSettings().value(SETTINGS_RECORDING_DIR, '', type=str)
+                                or os.path.join(getPluginDataDir(), RECORDING_DIRNAME))
+                recording = Recording(recordingDir)
+                _transports[mode] = RecordingTransport(recording) if mode == TRANSPORT_RECORD else ReplayTransport(recording)
+                logInfoMessage(f'Transport mode {mode}, recording: {recordingDir}')
+        return _transports[mode]